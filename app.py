@@ -1,8 +1,21 @@
+import logging
+import time
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from utils import classify_sentiment, get_summary, generate_wordcloud, get_keywords
-from scrapers import scrape_links, scrape_article
+from utils import (MODELS, analyze_text, classify_sentiment, embed_texts, generate_wordcloud,
+                   get_keywords_with_embedding, rank_by_relevance, stream_summary)
+from scrapers import scrape_links, scrape_article, FetchError
+from models import MODEL_VERSIONS
+from neardup import AnalysisCache, minhash
+from semantic import EmbeddingIndex
+from store import ArticleStore, age_seconds
+from topic_cache import BackgroundRefresher, data_age, format_age, search_age, stored_results
+from urlcanon import canonicalize
+from monitor import add_subscription, load_history, load_subscriptions, run_all
+from tracing import start_trace
+from metrics import serve as serve_metrics
 
 # Streamlit page config
 st.set_page_config(page_title="News Channel Analyzer", layout="wide")
@@ -14,13 +27,29 @@ This app will:
 2. Classify each article's sentiment
 3. Generate visualizations comparing sentiment across channels
 4. Provide summaries and word clouds for each article
+5. Or search the articles stored by earlier runs, without scraping
 """)
 
+# Search results considered per article shown when ranking by relevance
+RELEVANCE_POOL = 3
+
 # -- User inputs --
 channels = ["BBC", "CNN", "Dawn News", "Fox News", "TRT News", "Al Jazeera"]
 selected_channels = st.multiselect("Select news channels:", channels, default=["BBC", "CNN"])
-topic = st.text_input("Enter topic:")
-num_articles = st.slider("Number of articles per channel:", min_value=1, max_value=5, value=3)
+source = st.radio("Source:", ["Scrape news sites", "Search stored articles (offline)"], horizontal=True)
+offline = source != "Scrape news sites"
+topic = st.text_input(
+    "Enter topic:",
+    help="For stored articles this is a full-text query: words, \"exact phrases\", OR, NOT, NEAR(a b, 10), prefix*",
+)
+if offline:
+    max_matches = st.number_input("Maximum matches per channel:", min_value=1, max_value=500, value=50)
+    semantic_search = st.checkbox(
+        "Match by meaning (semantic search)",
+        help="Rank stored articles by embedding similarity to the topic instead of matching its words",
+    )
+else:
+    num_articles = st.slider("Number of articles per channel:", min_value=1, max_value=5, value=3)
 
 # -- Analysis options --
 st.subheader("Analysis Options")
@@ -29,6 +58,38 @@ with col1:
     generate_summary = st.checkbox("Generate article summaries", value=True)
 with col2:
     show_wordcloud = st.checkbox("Generate word clouds", value=True, disabled=not generate_summary)
+if not offline:
+    rank_results = st.checkbox(
+        "Fetch only the search results most relevant to the topic",
+        value=True,
+        help=f"Collects up to {RELEVANCE_POOL}x as many search results, ranks their headlines "
+             "and descriptions against the topic and only downloads and analyzes the best ones",
+    )
+    freshness_minutes = st.number_input(
+        "Reuse stored results newer than (minutes, 0 = always scrape):",
+        min_value=0, max_value=7 * 24 * 60, value=60, step=15,
+    )
+
+# Fetched and analyzed articles are kept in the local store (articles.db);
+# analyses of earlier articles are reused for the same or near-duplicate text,
+# and article embeddings go to the semantic index (embeddings/)
+@st.cache_resource
+def load_store():
+    store = ArticleStore()
+    embeddings = EmbeddingIndex()
+    return store, AnalysisCache(store, models=MODEL_VERSIONS, embeddings=embeddings)
+
+store, analysis_cache = load_store()
+
+# Stale channels are re-scraped on background threads that outlive a rerun
+@st.cache_resource
+def load_refresher():
+    return BackgroundRefresher(analysis_cache)
+
+refresher = load_refresher()
+
+# Prometheus metrics at http://127.0.0.1:$NEWS_METRICS_PORT/metrics, if set
+serve_metrics()
 
 # Helper function to truncate text
 def truncate_text(text, max_tokens=900):
@@ -37,6 +98,69 @@ def truncate_text(text, max_tokens=900):
         return text
     return " ".join(words[:max_tokens])
 
+# List the closest stored articles from other channels
+def show_similar_coverage(url):
+    similar = analysis_cache.embeddings.similar(url, k=3)
+    if similar:
+        st.write("**Similar coverage from other channels:**")
+        for other_url, other_channel, score in similar:
+            st.write(f"- {other_channel} ({score:.0%} similar): {other_url}")
+
+# Render an article served from the store and return its results row
+def show_stored_article(i, channel, row, age):
+    with st.expander(f"Article #{i} from {channel}"):
+        st.write(f"**URL:** {row['url']}")
+        if row.get("snippet"):
+            st.markdown(f"> {row['snippet']}")
+        st.write(f"**Sentiment:** {row['sentiment']} ({row['score']:.1f}%)")
+        if generate_summary and row["summary"]:
+            st.write("**Summary:**")
+            st.write(row["summary"])
+            if show_wordcloud and row["keywords"]:
+                st.write("**Word Cloud:**")
+                wordcloud = generate_wordcloud(row["keywords"])
+                if wordcloud:
+                    st.pyplot(wordcloud)
+        show_similar_coverage(row["url"])
+    return {
+        "Channel": channel,
+        "URL": row["url"],
+        "Sentiment": row["sentiment"],
+        "Score": row["score"],
+        "Summary": row["summary"] if generate_summary else None,
+        "Text": truncate_text(row.get("text") or row.get("snippet") or ""),
+        "Near_Duplicate_Of": "",
+        "Similarity": None,
+        "Relevance": None,
+        "Data_Age": age,
+    }
+
+# Waterfall of the timing spans recorded during a run (see tracing.py)
+def show_performance(run):
+    spans = sorted(run.spans, key=lambda s: s.offset)
+    with st.expander(f"Performance ({run.duration:.1f} s)"):
+        timeline = pd.DataFrame([{
+            "Stage": s.name,
+            "Start (s)": round(s.offset, 3),
+            "Duration (s)": round(s.duration, 3),
+            "Channel": s.attributes.get("channel", ""),
+            "Details": ", ".join(f"{k}={v}" for k, v in s.attributes.items() if k != "channel"),
+        } for s in spans])
+        fig = px.bar(timeline, base="Start (s)", x="Duration (s)", y="Stage", color="Channel",
+                     orientation="h", hover_data=["Details"], title="Where the time went")
+        fig.update_yaxes(categoryorder="array", categoryarray=list(dict.fromkeys(timeline["Stage"])),
+                         autorange="reversed")
+        fig.update_xaxes(title="Seconds since the run started")
+        st.plotly_chart(fig, use_container_width=True)
+        # Nested stages are also counted in their parents (e.g. article.download in article)
+        totals = timeline.groupby("Stage")["Duration (s)"].agg(["count", "sum", "max"])
+        totals.columns = ["Calls", "Total (s)", "Longest (s)"]
+        st.dataframe(totals.sort_values("Total (s)", ascending=False), use_container_width=True)
+        models = pd.DataFrame(MODELS.report())
+        if not models.empty:
+            st.caption(f"NLP models in memory: {MODELS.resident_bytes() / 1e6:,.0f} MB")
+            st.dataframe(models, use_container_width=True)
+
 # -- Analyze button --
 if st.button("Analyze"):
     if not topic.strip():
@@ -46,33 +170,132 @@ if st.button("Analyze"):
     else:
         all_articles = []
         sentiment_data = []
+        run = start_trace("analyze", topic=topic, channels=", ".join(selected_channels),
+                          source="store" if offline else "scrape")
+        if offline and semantic_search:
+            query_embedding = embed_texts([topic])[0]
         
         # Process each selected channel
         for channel in selected_channels:
             st.write(f"### Analyzing {channel}")
             
-            # 1) Scrape article URLs
+            # Offline: full-text or semantic search over the article store, no scraping
+            if offline:
+                if semantic_search:
+                    hits = analysis_cache.embeddings.search(query_embedding, k=max_matches, channel=channel)
+                    rows = [store.get(url) for url, _, _ in hits]
+                    missing = [url for (url, _, _), row in zip(hits, rows) if row is None]
+                    if missing:
+                        # Indexed but since removed from the store
+                        logging.warning(f"{len(missing)} indexed {channel} articles are not in the store: "
+                                        f"{', '.join(missing[:5])}")
+                    matches = [row for row in rows if row is not None]
+                else:
+                    try:
+                        matches = store.search(topic, channel=channel, limit=max_matches)
+                    except ValueError as e:
+                        st.error(str(e))
+                        break
+                if not matches:
+                    st.warning(f"No stored {channel} articles match this query.")
+                    continue
+                st.success(f"{len(matches)} stored articles match, best match first.")
+                for i, row in enumerate(matches, start=1):
+                    # Stored but not yet analyzed (or analyzed by other models)
+                    if not row["analyzed_at"] or row["models"] != MODEL_VERSIONS:
+                        text = store.get(row["url"])["text"]
+                        if not text:
+                            continue
+                        with st.spinner(f"Analyzing stored article #{i}..."):
+                            analysis = analyze_text(text, summarize=generate_summary,
+                                                    keywords=generate_summary and show_wordcloud)
+                        analysis_cache.add(row["url"], minhash(text), analysis, channel=channel)
+                        row = {**row, **analysis}
+                    age = format_age(age_seconds(row["fetched_at"])) if row["fetched_at"] else ""
+                    all_articles.append(show_stored_article(i, channel, row, age))
+                    sentiment_data.append({
+                        "Channel": channel,
+                        "Sentiment": row["sentiment"],
+                        "Score": row["score"]
+                    })
+                continue
+            
+            # 0) Serve stored results when they are fresh enough
+            if freshness_minutes > 0:
+                ttl = freshness_minutes * 60
+                stored = stored_results(analysis_cache, channel, topic, num_articles, ttl=ttl)
+                # Fresh if searched within the TTL, however few results that search found
+                searched = search_age(stored, refresher.status(channel, topic))
+                stale = searched is None or searched > ttl
+                if stale:
+                    # Show older results while refreshing
+                    stored = stored_results(analysis_cache, channel, topic, num_articles)
+                if not stored and not stale:
+                    st.warning(f"No {channel} articles found for this topic ({format_age(searched)}).")
+                    continue
+                if stored:
+                    age = format_age(data_age(stored))
+                    if stale:
+                        started = refresher.submit(channel, topic, max_articles=num_articles,
+                                                   summarize=generate_summary)
+                        job = refresher.status(channel, topic)
+                        running_for = format_age(time.time() - job["started"]).replace(" ago", "")
+                        st.info(
+                            f"Showing stored results from {age}. "
+                            + ("Refreshing this channel in the background"
+                               if started else f"A background refresh has been running for {running_for}")
+                            + "; click Analyze again to see the refreshed results."
+                        )
+                    else:
+                        st.success(f"Using {len(stored)} stored articles (data from {age}).")
+                    for i, row in enumerate(stored, start=1):
+                        article_data = show_stored_article(i, channel, row, age)
+                        all_articles.append(article_data)
+                        sentiment_data.append({
+                            "Channel": channel,
+                            "Sentiment": row["sentiment"],
+                            "Score": row["score"]
+                        })
+                    continue
+            
+            # 1) Scrape article URLs (with their search-result headlines)
+            pool = num_articles * RELEVANCE_POOL if rank_results else num_articles
             with st.spinner("Scraping article links..."):
-                links = scrape_links(channel, topic)
+                cards = scrape_links(channel, topic, store=store, max_articles=pool,
+                                     max_age=freshness_minutes * 60 or None, details=True)
             
-            if not links:
+            if not cards:
                 st.warning(f"No articles found for {channel} on this topic.")
                 continue
             
-            st.success(f"Found {len(links)} articles. Processing top {min(num_articles, len(links))}.")
+            # Only the results closest to the topic are downloaded and analyzed
+            if rank_results:
+                cards = rank_by_relevance(topic, cards, top_n=num_articles)
+                st.success(f"Found {len(cards)} relevant articles among the search results.")
+            else:
+                st.success(f"Found {len(cards)} articles. Processing top {min(num_articles, len(cards))}.")
             
             # Process articles for this channel
-            for i, url in enumerate(links[:num_articles], start=1):
+            for i, card in enumerate(cards[:num_articles], start=1):
+                url = card["url"]
                 with st.expander(f"Article #{i} from {channel}"):
                     st.write(f"**URL:** {url}")
+                    if card["headline"]:
+                        st.write(f"**Headline:** {card['headline']}")
+                    if "relevance" in card:
+                        st.write(f"**Relevance to topic:** {card['relevance']:.2f}")
                     
                     try:
                         # Fetch and analyze article
                         with st.spinner("Fetching article content..."):
-                            text = scrape_article(url, channel)
+                            try:
+                                text = scrape_article(url, channel, store=store)
+                            except FetchError as e:
+                                st.error(f"Could not download article ({e.kind.replace('_', ' ')}).")
+                                continue
                         
                         if not text:
-                            st.error("Failed to fetch article content.")
+                            st.error("No article text found on this page.")
                             continue
                         
                         # Truncate text if needed
@@ -80,35 +303,80 @@ if st.button("Analyze"):
                         if len(text.split()) > 900:
                             st.info("Note: Article was truncated to fit model limits.")
                         
-                        with st.spinner("Analyzing sentiment..."):
-                            sentiment, score = classify_sentiment(truncated_text)
-                            st.write(f"**Sentiment:** {sentiment} ({score:.1f}%)")
+                        # Near-duplicates of an article analyzed before reuse its results
+                        signature = minhash(text)
+                        match = analysis_cache.find_similar(signature)
+                        cached = {}
+                        duplicate_of = ""
+                        similarity = None
+                        if match:
+                            cached, similarity = match
+                            if cached["url"] != canonicalize(url):
+                                duplicate_of = cached["url"]
+                                st.info(f"Near-duplicate ({similarity:.0%} similar) of {duplicate_of}; reusing its analysis.")
+                            else:
+                                st.info("Analyzed in an earlier run; reusing its analysis.")
+                        # Save unless this exact article's stored analysis was reused as is
+                        save_analysis = not cached or bool(duplicate_of)
+                        embedding = None
+                        
+                        if cached:
+                            sentiment, score = cached["sentiment"], cached["score"]
+                        else:
+                            with st.spinner("Analyzing sentiment..."):
+                                sentiment, score = classify_sentiment(truncated_text)
+                        st.write(f"**Sentiment:** {sentiment} ({score:.1f}%)")
                         
                         # Generate summary if requested
-                        summary = None
+                        summary = cached.get("summary")
+                        keywords = cached.get("keywords")
                         if generate_summary:
-                            with st.spinner("Generating summary..."):
-                                summary = get_summary(truncated_text)
-                                st.write("**Summary:**")
+                            st.write("**Summary:**")
+                            if not summary:
+                                # Shown as it is generated; the last value is get_summary's result
+                                live_summary = st.empty()
+                                live_summary.caption("Generating summary...")
+                                for summary in stream_summary(truncated_text):
+                                    live_summary.write(summary)
+                                save_analysis = True
+                            else:
                                 st.write(summary)
                             
                             # Generate word cloud if requested
                             if show_wordcloud:
                                 with st.spinner("Generating word cloud..."):
                                     st.write("**Word Cloud:**")
-                                    keywords = get_keywords(truncated_text)
+                                    if not keywords:
+                                        keywords, embedding = get_keywords_with_embedding(truncated_text)
+                                        save_analysis = True
                                     wordcloud = generate_wordcloud(keywords)
                                     if wordcloud:
                                         st.pyplot(wordcloud)
                         
+                        if save_analysis:
+                            if embedding is None and url not in analysis_cache.embeddings:
+                                embedding = embed_texts([truncated_text])[0]
+                            analysis_cache.add(url, signature, {
+                                "sentiment": sentiment,
+                                "score": score,
+                                "summary": summary,
+                                "keywords": keywords,
+                                "embedding": embedding,
+                            }, channel=channel)
+                        show_similar_coverage(url)
+                        
                         # Store article data
                         article_data = {
                             "Channel": channel,
                             "URL": url,
                             "Sentiment": sentiment,
                             "Score": score,
-                            "Summary": summary,
-                            "Text": truncated_text
+                            "Summary": summary if generate_summary else None,
+                            "Text": truncated_text,
+                            "Near_Duplicate_Of": duplicate_of,
+                            "Similarity": similarity,
+                            "Relevance": card.get("relevance"),
+                            "Data_Age": "just now"
                         }
                         all_articles.append(article_data)
                         sentiment_data.append({
@@ -121,9 +389,18 @@ if st.button("Analyze"):
                         st.error(f"Failed to analyze this article: {e}")
                         continue
 
+        run.end()
         if not all_articles:
             st.error("No articles could be analyzed. Please try a different topic or channels.")
         else:
+            # Per-article results
+            st.subheader("Articles")
+            results = pd.DataFrame(all_articles)[
+                ["Channel", "URL", "Sentiment", "Score", "Relevance", "Near_Duplicate_Of", "Similarity",
+                 "Data_Age"]
+            ]
+            st.dataframe(results, use_container_width=True)
+            
             # Convert to DataFrame for visualization
             df = pd.DataFrame(sentiment_data)
             
@@ -163,3 +440,40 @@ if st.button("Analyze"):
                          color_discrete_map={"Positive": "green", "Neutral": "yellow", "Negative": "red"},
                          barmode='group')
             st.plotly_chart(fig3, use_container_width=True)
+        show_performance(run)
+
+# -- Monitored topics --
+st.subheader("Monitored Topics")
+st.write("Save a topic to check it later for articles published since the last check.")
+subscriptions = load_subscriptions()
+if subscriptions:
+    st.dataframe(pd.DataFrame(subscriptions), use_container_width=True)
+else:
+    st.write("No monitored topics yet.")
+
+mcol1, mcol2 = st.columns(2)
+with mcol1:
+    if st.button("Monitor this topic"):
+        if not topic.strip() or not selected_channels:
+            st.warning("Enter a topic and select channels to monitor.")
+        else:
+            added = [c for c in selected_channels if add_subscription(c, topic)]
+            st.success(f"Monitoring '{topic.strip()}' on {len(added)} new channel(s).")
+with mcol2:
+    check_monitored = st.button("Check for new articles", disabled=not subscriptions)
+
+if check_monitored:
+    with st.spinner("Checking monitored topics for new articles..."):
+        delta = run_all(cache=analysis_cache, summarize=generate_summary, store=store)
+    if not delta:
+        st.info("No new articles since the last check.")
+    else:
+        st.success(f"{len(delta)} new article(s) since the last check.")
+        st.dataframe(
+            pd.DataFrame(delta)[
+                ["Channel", "Topic", "URL", "Status", "Sentiment", "Score", "Near_Duplicate_Of"]
+            ],
+            use_container_width=True,
+        )
+    st.caption(f"{len(load_history())} articles in the monitoring history, "
+               f"{store.count()} in the article store.")
@@ -0,0 +1,80 @@
+# benchmarks/bench_jsonld.py
+"""
+JSON-LD fast-path benchmark for article extraction.
+
+For every channel in the corpus, reports how many pages carry a JSON-LD
+articleBody (the hit rate of the fast path) and the mean per-page latency of
+`extractors.parse_article` (JSON-LD first, DOM on a miss) against the
+DOM-only extractor, split into hits and misses so the cost of a miss (the
+extra regex scan) is visible too.
+
+Usage:
+    python benchmarks/bench_jsonld.py [--corpus DIR] [--repeat 50] [--json out.json]
+"""
+
+import argparse
+import json
+import time
+
+from corpus import ARTICLES_DIR, load_articles
+
+import extractors
+
+
+def _mean_ms(fn, pages, repeat):
+    if not pages:
+        return None
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            fn(html)
+    return round((time.perf_counter() - started) * 1000 / (repeat * len(pages)), 3)
+
+
+def run(corpus_dir: str = ARTICLES_DIR, repeat: int = 50) -> list[dict]:
+    results = []
+    for channel, pages in load_articles(corpus_dir).items():
+        dom = extractors.ARTICLE_PARSERS[channel]
+
+        def fast(html, channel=channel):
+            return extractors.parse_article(channel, html)
+
+        hits = [html for _, html in pages if extractors.extract_article(channel, html)["method"] == "jsonld"]
+        misses = [html for _, html in pages if extractors.extract_article(channel, html)["method"] == "dom"]
+        results.append({
+            "channel": channel,
+            "pages": len(pages),
+            "jsonld_hits": len(hits),
+            "hit_rate": round(len(hits) / len(pages), 2),
+            "hit_ms_fast": _mean_ms(fast, hits, repeat),
+            "hit_ms_dom": _mean_ms(dom, hits, repeat),
+            "miss_ms_fast": _mean_ms(fast, misses, repeat),
+            "miss_ms_dom": _mean_ms(dom, misses, repeat),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=ARTICLES_DIR)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = run(args.corpus, args.repeat)
+
+    def fmt(value):
+        return "-" if value is None else f"{value:.3f}"
+
+    print(f"{'channel':<12} {'hits':>6} {'rate':>5}  {'hit ms (fast/dom)':>19}  {'miss ms (fast/dom)':>19}")
+    for r in results:
+        hit = f"{fmt(r['hit_ms_fast'])}/{fmt(r['hit_ms_dom'])}"
+        miss = f"{fmt(r['miss_ms_fast'])}/{fmt(r['miss_ms_dom'])}"
+        print(f"{r['channel']:<12} {r['jsonld_hits']:>3}/{r['pages']:<2} {r['hit_rate']:>5}  {hit:>19}  {miss:>19}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
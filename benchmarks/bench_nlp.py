@@ -0,0 +1,182 @@
+# benchmarks/bench_nlp.py
+"""
+Latency, throughput and memory of the NLP functions in utils.py.
+
+Runs `classify_sentiment`, `get_summary`, `get_keywords` and
+`generate_wordcloud` over a fixed corpus built from the fixture articles,
+cut into length buckets (150 to 2,000 words; the longest makes
+`get_summary` summarize in chunks). For each function and bucket it
+reports p50/p95 latency per article, articles/sec and the process's peak
+RSS so far, plus the model load time (importing utils and loading every
+model).
+
+Every configuration runs in its own Python process, so load time and
+peak RSS are not shared between them. A configuration is a name and the
+environment it runs with, which covers the model overrides in models.py
+(NEWS_SENTIMENT_MODEL, NEWS_SUMMARY_MODEL, NEWS_KEYWORD_MODEL) and the
+thread settings of the backend (OMP_NUM_THREADS, MKL_NUM_THREADS):
+
+    python benchmarks/bench_nlp.py \\
+        --config default \\
+        --config 1-thread:OMP_NUM_THREADS=1 \\
+        --config distilbart:NEWS_SUMMARY_MODEL=sshleifer/distilbart-cnn-12-6
+
+Usage:
+    python benchmarks/bench_nlp.py [--config NAME[:VAR=VALUE,...]] [--functions ...]
+        [--buckets 150 400 900 2000] [--per-bucket 6] [--repeat 1] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+from corpus import load_articles
+
+from extractors import parse_article
+
+FUNCTIONS = ("sentiment", "summary", "keywords", "wordcloud")
+BUCKETS = (150, 400, 900, 2000)
+
+
+def corpus_texts(words: int, count: int) -> list[str]:
+    """
+    `count` texts of exactly `words` words: the fixture articles' text
+    joined in a different rotation for each, repeated as needed.
+    """
+    articles = [parse_article(channel, html)
+                for channel, pages in load_articles().items() for _, html in pages]
+    texts = []
+    for i in range(count):
+        rotated = articles[i % len(articles):] + articles[:i % len(articles)]
+        pool = " ".join(rotated).split()
+        while len(pool) < words:
+            pool += pool
+        texts.append(" ".join(pool[:words]))
+    return texts
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1e6 if sys.platform == "darwin" else 1e3), 1)
+
+
+def _functions(utils) -> dict:
+    import matplotlib.pyplot as plt
+
+    def wordcloud(text):
+        # The app draws the cloud from get_keywords' output; the text's first
+        # 50 distinct words stand in for it so the keyword model is not timed
+        keywords = list(dict.fromkeys(utils.preprocess_text(text).split()))[:50]
+        plt.close(utils.generate_wordcloud(keywords))
+
+    return {
+        "sentiment": utils.classify_sentiment,
+        "summary": utils.get_summary,
+        "keywords": utils.get_keywords,
+        "wordcloud": wordcloud,
+    }
+
+
+def measure(functions: list[str], buckets: list[int], per_bucket: int, repeat: int) -> dict:
+    """Load the models and time `functions` in this process."""
+    started = time.perf_counter()
+    import utils
+    from models import MODEL_VERSIONS
+    utils.MODELS.preload()
+    load_s = time.perf_counter() - started
+    result = {
+        "models": MODEL_VERSIONS,
+        "load_s": round(load_s, 2),
+        "load_rss_mb": peak_rss_mb(),
+        "results": [],
+    }
+    texts = {words: corpus_texts(words, per_bucket) for words in buckets}
+    available = _functions(utils)
+    for name in functions:
+        fn = available[name]
+        # Warm-up: first calls pay for lazy initialization
+        fn(texts[buckets[0]][0])
+        for words in buckets:
+            times = []
+            for _ in range(repeat):
+                for text in texts[words]:
+                    t = time.perf_counter()
+                    fn(text)
+                    times.append(time.perf_counter() - t)
+            result["results"].append({
+                "function": name,
+                "words": words,
+                "articles": len(times),
+                "p50_ms": round(statistics.median(times) * 1000, 1),
+                "p95_ms": round(sorted(times)[max(0, int(len(times) * 0.95) - 1)] * 1000, 1),
+                "articles_per_s": round(len(times) / sum(times), 2),
+                "peak_rss_mb": peak_rss_mb(),
+            })
+    return result
+
+
+def parse_config(spec: str) -> tuple:
+    """Parse "name:VAR=VALUE,VAR=VALUE" into (name, {VAR: VALUE})."""
+    name, _, assignments = spec.partition(":")
+    env = {}
+    for item in filter(None, assignments.split(",")):
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"expected VAR=VALUE, got {item!r}")
+        env[key.strip()] = value.strip()
+    return name, env
+
+
+def run_config(name: str, env: dict, args) -> dict:
+    """Run `measure` in a fresh interpreter with `env` added to the environment."""
+    command = [sys.executable, os.path.abspath(__file__), "--worker",
+               "--functions", *args.functions,
+               "--buckets", *map(str, args.buckets),
+               "--per-bucket", str(args.per_bucket), "--repeat", str(args.repeat)]
+    proc = subprocess.run(command, env={**os.environ, **env}, stdout=subprocess.PIPE, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"configuration {name!r} failed (exit code {proc.returncode})")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {"config": name, "env": env, **result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--config", type=parse_config, action="append",
+                        help="NAME[:VAR=VALUE,...], repeatable (default: one run as-is)")
+    parser.add_argument("--functions", nargs="+", choices=FUNCTIONS, default=list(FUNCTIONS))
+    parser.add_argument("--buckets", type=int, nargs="+", default=list(BUCKETS),
+                        help="Article lengths in words")
+    parser.add_argument("--per-bucket", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(args.functions, args.buckets, args.per_bucket, args.repeat)))
+        return
+
+    results = [run_config(name, env, args) for name, env in (args.config or [("default", {})])]
+    for result in results:
+        env = " ".join(f"{k}={v}" for k, v in result["env"].items())
+        print(f"{result['config']}{' (' + env + ')' if env else ''}: models loaded in "
+              f"{result['load_s']} s, {result['load_rss_mb']} MB RSS")
+        print(f"{'function':<10} {'words':>6} {'p50 ms':>9} {'p95 ms':>9} {'art/s':>7} {'peak MB':>8}")
+        for r in result["results"]:
+            print(f"{r['function']:<10} {r['words']:>6} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+                  f"{r['articles_per_s']:>7.2f} {r['peak_rss_mb']:>8.1f}")
+        print()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# benchmarks/bench_parse.py
+"""
+Parse-throughput benchmark for the article extractors.
+
+Compares the scoped extractors in extractors.py (with html.parser and, if
+installed, lxml) against the original full-tree BeautifulSoup extraction,
+checks that the extracted text is identical on every corpus page, and
+reports pages/sec and MB/sec per channel.
+
+Usage:
+    python benchmarks/bench_parse.py [--corpus DIR] [--repeat 20] [--json out.json]
+"""
+
+import argparse
+import json
+import time
+
+from bs4 import BeautifulSoup
+
+from corpus import ARTICLES_DIR, load_articles
+
+import extractors
+
+
+# The extraction code as it was before scoped parsing, kept as the reference output
+def _reference_container_paras(html, name, sep, strip, **attrs):
+    soup = BeautifulSoup(html, "html.parser")
+    if name is None:
+        paras = soup.find_all("p")
+    else:
+        container = soup.find(name, **attrs)
+        if not container:
+            return ""
+        paras = container.find_all("p")
+    if strip:
+        return sep.join(p.get_text(strip=True) for p in paras)
+    return sep.join(p.get_text().strip() for p in paras)
+
+
+REFERENCE = {
+    "BBC": lambda html: _reference_container_paras(html, "article", " ", False),
+    "CNN": lambda html: _reference_container_paras(html, None, " ", False),
+    "Dawn News": lambda html: _reference_container_paras(html, "div", "\n", True, class_="story__content"),
+    "Fox News": lambda html: _reference_container_paras(html, "main", "\n", True),
+    "TRT News": lambda html: _reference_container_paras(html, None, " ", False),
+    "Al Jazeera": lambda html: _reference_container_paras(html, "main", "\n", True),
+}
+
+
+def _available_parsers():
+    parsers = ["html.parser"]
+    try:
+        import lxml  # noqa: F401
+        parsers.append("lxml")
+    except ImportError:
+        pass
+    return parsers
+
+
+def _time(fn, pages, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for _, html in pages:
+            fn(html)
+    return time.perf_counter() - started
+
+
+def run(corpus_dir: str = ARTICLES_DIR, repeat: int = 20) -> list[dict]:
+    corpus = load_articles(corpus_dir)
+    results = []
+    for channel, pages in corpus.items():
+        total_mb = sum(len(html.encode("utf-8")) for _, html in pages) / 1e6
+        expected = {name: REFERENCE[channel](html) for name, html in pages}
+
+        variants = [("reference (full tree)", REFERENCE[channel], None)]
+        for parser in _available_parsers():
+            variants.append((f"scoped {parser}", extractors.ARTICLE_PARSERS[channel], parser))
+
+        for label, fn, parser in variants:
+            if parser:
+                extractors.HTML_PARSER = parser
+            mismatches = [name for name, html in pages if fn(html) != expected[name]]
+            elapsed = _time(fn, pages, repeat)
+            n = len(pages) * repeat
+            results.append({
+                "channel": channel,
+                "variant": label,
+                "pages": len(pages),
+                "pages_per_sec": round(n / elapsed, 1),
+                "mb_per_sec": round(total_mb * repeat / elapsed, 2),
+                "mismatches": mismatches,
+            })
+    extractors.HTML_PARSER = "html.parser"
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=ARTICLES_DIR)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = run(args.corpus, args.repeat)
+    print(f"{'channel':<12} {'variant':<24} {'pages/s':>9} {'MB/s':>7}  parity")
+    for r in results:
+        parity = "ok" if not r["mismatches"] else f"DIFF {r['mismatches']}"
+        print(f"{r['channel']:<12} {r['variant']:<24} {r['pages_per_sec']:>9} {r['mb_per_sec']:>7}  {parity}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# benchmarks/bench_search.py
+"""
+Full-text search latency benchmark for the article store.
+
+Builds a temporary store with N synthetic articles (default 100,000 of
+about 400 words drawn from a Zipf-distributed vocabulary, with topic terms
+planted at known document frequencies from 10% down to 0.1%), reports the
+insert rate with the FTS5 triggers active and the database size, then
+times `ArticleStore.search` (top 50 by bm25) for term, boolean, phrase,
+NEAR and prefix queries, with and without a channel filter (p50/p95 over
+`--repeat` runs). The fixture pages are too small a vocabulary for
+realistic posting lists, so the text is synthetic.
+
+Usage:
+    python benchmarks/bench_search.py [--articles 100000] [--repeat 20] [--db path] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+import corpus  # noqa: F401  (puts the repo root on sys.path)
+from extractors import CHANNELS
+from store import ArticleStore, content_hash, now
+
+VOCABULARY = 50_000
+# Planted topic terms and the share of articles containing them
+TOPIC_TERMS = {
+    "climate change": 0.10,
+    "election": 0.05,
+    "prime minister": 0.02,
+    "ceasefire": 0.005,
+    "cyclone": 0.001,
+}
+QUERIES = [
+    ("common term", "climate"),
+    ("rare term", "cyclone"),
+    ("and", "climate election"),
+    ("phrase", '"prime minister"'),
+    ("or", "ceasefire OR cyclone"),
+    ("not", "climate NOT election"),
+    ("near", "NEAR(election minister, 10)"),
+    ("prefix", "elect*"),
+]
+
+
+def build(store: ArticleStore, n: int, seed: int = 7) -> float:
+    """Insert `n` synthetic articles; returns the elapsed seconds."""
+    rng = np.random.default_rng(seed)
+    words = np.array([f"w{i}" for i in range(VOCABULARY)])
+    cdf = np.cumsum(1.0 / np.arange(1, VOCABULARY + 1) ** 1.1)
+    cdf /= cdf[-1]
+    started = time.perf_counter()
+    batch = []
+    for i in range(n):
+        ranks = np.searchsorted(cdf, rng.random(rng.integers(250, 550)))
+        body = list(words[np.minimum(ranks, VOCABULARY - 1)])
+        for term, share in TOPIC_TERMS.items():
+            if rng.random() < share:
+                body.insert(int(rng.integers(len(body))), term)
+        text = " ".join(body)
+        batch.append({
+            "url": f"https://example.com/article/{i}",
+            "channel": CHANNELS[i % len(CHANNELS)],
+            "headline": " ".join(body[:10]),
+            "text": text,
+            "content_hash": content_hash(text),
+            "fetched_at": now(),
+        })
+        if len(batch) == 1000:
+            store.upsert(batch)
+            batch = []
+    store.upsert(batch)
+    return time.perf_counter() - started
+
+
+def _time_ms(fn, repeat: int) -> list[float]:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+
+def run(n: int = 100_000, repeat: int = 20, db: str = None) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = db or os.path.join(tmp, "bench.db")
+        store = ArticleStore(path)
+        try:
+            existing = store.count()
+            build_s = build(store, n - existing) if existing < n else None
+            size_mb = sum(os.path.getsize(path + suffix) for suffix in ("", "-wal")
+                          if os.path.exists(path + suffix)) / 1e6
+            queries = []
+            for label, query in QUERIES:
+                for channel in (None, "BBC"):
+                    hits = len(store.search(query, channel=channel, limit=1_000_000))
+                    times = _time_ms(lambda: store.search(query, channel=channel, limit=50), repeat)
+                    queries.append({
+                        "query": label if channel is None else f"{label} + channel",
+                        "fts": query,
+                        "matches": hits,
+                        "p50_ms": round(statistics.median(times), 2),
+                        "p95_ms": round(sorted(times)[max(0, int(len(times) * 0.95) - 1)], 2),
+                    })
+        finally:
+            store.close()
+    return {
+        "articles": max(n, existing),
+        "insert_per_s": round((n - existing) / build_s) if build_s else None,
+        "db_mb": round(size_mb, 1),
+        "queries": queries,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--articles", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--db", help="Build (or reuse) the store at this path instead of a temporary one")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    result = run(args.articles, args.repeat, args.db)
+
+    print(f"{result['articles']} articles, {result['db_mb']} MB"
+          + (f", {result['insert_per_s']} inserts/s" if result["insert_per_s"] else ""))
+    print(f"{'query':<22} {'matches':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for q in result["queries"]:
+        print(f"{q['query']:<22} {q['matches']:>8} {q['p50_ms']:>8.2f} {q['p95_ms']:>8.2f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
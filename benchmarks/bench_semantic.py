@@ -0,0 +1,168 @@
+# benchmarks/bench_semantic.py
+"""
+Recall/latency tradeoff of the semantic (embedding) index.
+
+Builds a temporary `semantic.EmbeddingIndex` with N synthetic 768-d
+embeddings (default 100,000), queries it with new synthetic articles and,
+for each `nprobe`, reports recall@10 against an exact scan, the share of
+vectors scanned and the p50/p95 query latency. Two datasets bracket real
+embeddings:
+
+  clustered   articles scattered around 2,000 "story" directions, like
+              coverage of the same events; near neighbours share a list
+  continuous  articles spread over a 16-d topic space with no clusters,
+              so neighbours often fall in adjacent lists (pessimistic)
+
+`--db` measures an existing index (`python semantic.py backfill`)
+instead, read-only: nothing is added to it, IVF lists missing from it are
+trained in memory only, and the queries are stored articles' own vectors
+(each query excludes its own article), so recall reflects your articles.
+
+Usage:
+    python benchmarks/bench_semantic.py [--vectors 100000] [--queries 200] [--data clustered] [--db DIR] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+import corpus  # noqa: F401  (puts the repo root on sys.path)
+from extractors import CHANNELS
+from semantic import EmbeddingIndex
+
+DIM = 768
+STORIES = 2_000
+TOPIC_DIMS = 16
+NPROBES = (1, 2, 4, 8, 16, 32, 64)
+DATASETS = ("clustered", "continuous")
+
+
+def articles(rng, count: int, data: str = "clustered") -> np.ndarray:
+    """Embeddings of `count` synthetic articles."""
+    basis = np.random.default_rng(0)
+    if data == "clustered":
+        stories = basis.standard_normal((STORIES, DIM)).astype(np.float32)
+        vectors = stories[rng.integers(STORIES, size=count)]
+        return vectors + 0.8 * rng.standard_normal((count, DIM)).astype(np.float32)
+    topics = basis.standard_normal((TOPIC_DIMS, DIM)).astype(np.float32)
+    vectors = rng.standard_normal((count, TOPIC_DIMS)).astype(np.float32) @ topics
+    return vectors + 0.1 * rng.standard_normal((count, DIM)).astype(np.float32)
+
+
+def build(index: EmbeddingIndex, n: int, data: str = "clustered", seed: int = 7) -> float:
+    """Add `n` synthetic embeddings in batches of 1000; returns the elapsed seconds."""
+    rng = np.random.default_rng(seed)
+    started = time.perf_counter()
+    for start in range(0, n, 1000):
+        count = min(1000, n - start)
+        vectors = articles(rng, count, data)
+        index.add_many([f"https://example.com/article/{i}" for i in range(start, start + count)],
+                       [CHANNELS[i % len(CHANNELS)] for i in range(start, start + count)], vectors)
+    return time.perf_counter() - started
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def _summary(times: list[float]) -> tuple:
+    return round(statistics.median(times), 2), round(sorted(times)[max(0, int(len(times) * 0.95) - 1)], 2)
+
+
+def run(n: int = 100_000, queries: int = 200, data: str = "clustered", db: str = None,
+        k: int = 10) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        if db:
+            # A real index: opened with the app's model and never written to
+            index = EmbeddingIndex(db)
+            if not len(index):
+                raise SystemExit(f"No embeddings in {db}; run `python semantic.py backfill` first")
+            added, build_s = 0, None
+        else:
+            index = EmbeddingIndex(os.path.join(tmp, "embeddings"), model=f"benchmark-{data}")
+            added = n
+            build_s = build(index, added, data)
+        if index._centroids is None:
+            index.train(save=not db)
+        size_mb = sum(os.path.getsize(os.path.join(index.directory, f))
+                      for f in os.listdir(index.directory)) / 1e6
+        if db:
+            urls = list(index._rows)
+            picked = np.random.default_rng(11).choice(len(urls), min(queries, len(urls)), replace=False)
+            own = [urls[i] for i in picked]
+            probes = [index.get(url) for url in own]
+        else:
+            own = [None] * queries
+            probes = articles(np.random.default_rng(11), queries, data)
+
+        exact, times = [], []
+        for q, url in zip(probes, own):
+            result, ms = _timed(lambda: index.search(q, k, exact=True, exclude_url=url))
+            exact.append({url for url, _, _ in result})
+            times.append(ms)
+        p50, p95 = _summary(times)
+        results = [{"nprobe": "exact", "recall": 1.0, "scanned": 1.0, "p50_ms": p50, "p95_ms": p95}]
+        lists = len(index._centroids)
+        sizes = np.bincount(index._assign[:index._size], minlength=lists)
+        for nprobe in NPROBES:
+            if nprobe > lists:
+                break
+            recalls, times, scanned = [], [], []
+            for q, url, truth in zip(probes, own, exact):
+                result, ms = _timed(lambda: index.search(q, k, nprobe=nprobe, exclude_url=url))
+                recalls.append(len(truth & {url for url, _, _ in result}) / k)
+                times.append(ms)
+                nearest = np.argsort(-(index._centroids @ (q / np.linalg.norm(q))))[:nprobe]
+                scanned.append(sizes[nearest].sum() / index._size)
+            p50, p95 = _summary(times)
+            results.append({
+                "nprobe": nprobe,
+                "recall": round(float(np.mean(recalls)), 3),
+                "scanned": round(float(np.mean(scanned)), 3),
+                "p50_ms": p50,
+                "p95_ms": p95,
+            })
+        vectors = len(index)
+    return {
+        "data": data,
+        "vectors": vectors,
+        "lists": lists,
+        "add_per_s": round(added / build_s) if build_s else None,
+        "index_mb": round(size_mb, 1),
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--data", choices=DATASETS, nargs="+", default=list(DATASETS))
+    parser.add_argument("--db", help="Measure the existing index in this directory (read-only) instead of a synthetic one")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for data in ["stored"] if args.db else args.data:
+        result = run(args.vectors, args.queries, data, args.db)
+        results.append(result)
+        print(f"{data}: {result['vectors']} vectors in {result['lists']} lists, {result['index_mb']} MB"
+              + (f", {result['add_per_s']} adds/s (incl. training)" if result["add_per_s"] else ""))
+        print(f"{'nprobe':>6} {'recall@10':>10} {'scanned':>8} {'p50 ms':>8} {'p95 ms':>8}")
+        for r in result["results"]:
+            print(f"{r['nprobe']:>6} {r['recall']:>10.3f} {r['scanned']:>8.1%} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f}")
+        print()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/bench_startup.py
+"""
+Model start-up time: Hugging Face Hub cache vs. the local snapshot.
+
+Each run is a fresh Python process that imports utils, loads every model
+(ModelManager.preload) and runs one sentiment call. It reports the import
+time, each model's load time, the time to the first result and the peak
+RSS. Runs are repeated (`--repeat`), so the first shows a cold OS page
+cache only if the cache was dropped beforehand
+(`sync; echo 3 > /proc/sys/vm/drop_caches` as root).
+
+The default configurations are "hub" (NEWS_MODEL_SNAPSHOT pointing at an
+empty directory, i.e. how the app started before model_snapshot.py) and
+"snapshot" (the default snapshot directory, which must be prepared
+first). Other configurations take the same NAME:VAR=VALUE form as
+bench_nlp.py.
+
+Usage:
+    python model_snapshot.py prepare
+    python benchmarks/bench_startup.py [--repeat 3] [--config NAME:VAR=VALUE,...] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# bench_nlp imports corpus, which puts the repo root on sys.path
+from bench_nlp import parse_config, peak_rss_mb
+
+
+def measure() -> dict:
+    started = time.perf_counter()
+    import utils
+    import_s = time.perf_counter() - started
+    utils.MODELS.preload()
+    loaded_s = time.perf_counter() - started
+    utils.classify_sentiment("Markets rallied after the announcement.")
+    return {
+        "import_s": round(import_s, 2),
+        "models": {row["model"]: row["load_s"] for row in utils.MODELS.report()},
+        "loaded_s": round(loaded_s, 2),
+        "first_result_s": round(time.perf_counter() - started, 2),
+        "peak_rss_mb": peak_rss_mb(),
+        "offline": os.environ.get("HF_HUB_OFFLINE") == "1",
+    }
+
+
+def run_config(name: str, env: dict) -> dict:
+    command = [sys.executable, os.path.abspath(__file__), "--worker"]
+    proc = subprocess.run(command, env={**os.environ, **env}, stdout=subprocess.PIPE, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"configuration {name!r} failed (exit code {proc.returncode})")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--config", type=parse_config, action="append",
+                        help="NAME[:VAR=VALUE,...], repeatable (default: hub and snapshot)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure()))
+        return
+
+    with tempfile.TemporaryDirectory() as empty:
+        configs = args.config or [("hub", {"NEWS_MODEL_SNAPSHOT": empty}), ("snapshot", {})]
+        results = []
+        for name, env in configs:
+            runs = [run_config(name, env) for _ in range(args.repeat)]
+            results.append({"config": name, "env": env, "runs": runs})
+
+    print(f"{'config':<10} {'run':>3} {'import s':>9} {'models s':>9} {'first s':>8} {'peak MB':>8}  per model")
+    for result in results:
+        for i, run in enumerate(result["runs"], start=1):
+            per_model = ", ".join(f"{k} {v:.1f}" for k, v in run["models"].items() if v is not None)
+            print(f"{result['config']:<10} {i:>3} {run['import_s']:>9.2f} {run['loaded_s']:>9.2f} "
+                  f"{run['first_result_s']:>8.2f} {run['peak_rss_mb']:>8.1f}  {per_model}"
+                  f"{'' if run['offline'] else '  (online)'}")
+        median = statistics.median(run["first_result_s"] for run in result["runs"])
+        print(f"{result['config']:<10} median time to first result: {median:.2f} s")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# benchmarks/bench_stream.py
+"""
+Streaming-fetch benchmark for article downloads.
+
+Serves the fixture corpus from a local HTTP server (optionally throttled to
+a given bandwidth), then downloads every page twice: whole, as the
+scrape_*_article functions did before streaming, and streamed with early
+termination (streaming.read_article_html). Reports bytes downloaded and time
+per article for both, and checks that the extracted text is identical. A
+stream that stops at the article container gives the DOM extractor's text
+even when the full page has JSON-LD after the container; such pages are
+counted as `dom_fallbacks` rather than mismatches when the streamed text
+equals the DOM extractor's text of the full page. fixtures/stream/ holds
+pages laid out that way and is benchmarked alongside the corpus.
+
+Usage:
+    python benchmarks/bench_stream.py [--corpus DIR] [--kbps 2000] [--repeat 3] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from corpus import ARTICLES_DIR, CHANNEL_SLUGS, STREAM_DIR, load_articles
+
+from extractors import ARTICLE_PARSERS, parse_article
+from politeness import PolitenessScheduler
+from streaming import read_article_html
+
+
+class ThrottledHandler(SimpleHTTPRequestHandler):
+    kbps = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def guess_type(self, path):
+        return "text/html; charset=utf-8"
+
+    def copyfile(self, source, outputfile):
+        if not self.kbps:
+            return super().copyfile(source, outputfile)
+        chunk = 4096
+        delay = chunk / (self.kbps * 1024)
+        try:
+            while True:
+                data = source.read(chunk)
+                if not data:
+                    break
+                outputfile.write(data)
+                time.sleep(delay)
+        except (BrokenPipeError, ConnectionResetError):
+            # The streaming client hung up once it had the article
+            pass
+
+
+def serve(directory: str, kbps: int = 0) -> ThreadingHTTPServer:
+    handler = type("Handler", (ThrottledHandler,), {"kbps": kbps})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(handler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _full(scheduler, url, channel):
+    resp = scheduler.fetch(url)
+    return parse_article(channel, resp.text), len(resp.content), resp.text
+
+
+def _streamed(scheduler, url, channel):
+    read = []
+
+    def reader(resp):
+        html = read_article_html(resp, channel)
+        read.append(resp.raw.tell())
+        return html
+
+    html = scheduler.fetch(url, reader=reader)
+    return parse_article(channel, html), read[0], html
+
+
+def run(corpus_dir: str = ARTICLES_DIR, kbps: int = 0, repeat: int = 3) -> list[dict]:
+    server = serve(corpus_dir, kbps)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    scheduler = PolitenessScheduler(rate=1000.0, burst=1000, concurrency=4, max_retries=0)
+    results = []
+    try:
+        for channel, pages in load_articles(corpus_dir).items():
+            urls = [f"{base}/{CHANNEL_SLUGS[channel]}/{name}" for name, _ in pages]
+            row = {"channel": channel, "corpus": os.path.basename(corpus_dir), "pages": len(pages)}
+            texts, full_html = {}, {}
+            for label, fetch in (("full", _full), ("stream", _streamed)):
+                total_bytes = 0
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    for url in urls:
+                        text, n, html = fetch(scheduler, url, channel)
+                        texts.setdefault(label, {})[url] = text
+                        if label == "full":
+                            full_html[url] = html
+                        total_bytes += n
+                elapsed = time.perf_counter() - started
+                n = len(urls) * repeat
+                row[f"{label}_kb"] = round(total_bytes / n / 1024, 1)
+                row[f"{label}_ms"] = round(elapsed * 1000 / n, 1)
+            differ = [u for u in urls if texts["full"][u] != texts["stream"][u]]
+            # Stopped at the container before a later JSON-LD: must match the full page's DOM text
+            fallbacks = [u for u in differ if texts["stream"][u] == ARTICLE_PARSERS[channel](full_html[u])]
+            row["dom_fallbacks"] = [os.path.basename(u) for u in fallbacks]
+            row["mismatches"] = [os.path.basename(u) for u in differ if u not in fallbacks]
+            results.append(row)
+    finally:
+        server.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=ARTICLES_DIR)
+    parser.add_argument("--kbps", type=int, default=2000,
+                        help="Server bandwidth per connection in KB/s (0 = unthrottled)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = run(args.corpus, args.kbps, args.repeat)
+    if os.path.isdir(STREAM_DIR):
+        results += run(STREAM_DIR, args.kbps, args.repeat)
+    print(f"{'corpus':<9} {'channel':<12} {'KB full':>8} {'KB stream':>10} {'ms full':>8} {'ms stream':>10}  parity")
+    for r in results:
+        parity = "ok" if not r["mismatches"] else f"DIFF {r['mismatches']}"
+        if r["dom_fallbacks"]:
+            parity += f" (DOM text, JSON-LD after the container: {r['dom_fallbacks']})"
+        print(f"{r['corpus']:<9} {r['channel']:<12} {r['full_kb']:>8} {r['stream_kb']:>10} "
+              f"{r['full_ms']:>8} {r['stream_ms']:>10}  {parity}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# benchmarks/bench_workers.py
+"""
+Throughput of the inference worker pool from 1 to N workers.
+
+Analyzes the same corpus (fixture article text cut to `--words` words, as
+in bench_nlp.py) with `utils.analyze_text` on an InferencePool of each
+size. For every size it reports the start-up time (every worker loading
+the models), articles/sec, speed-up over one worker and parallel
+efficiency (speed-up / workers). `--baseline` adds a run in this process
+with PyTorch's default threading, i.e. what the app does without a pool.
+The cores are split evenly between the workers; `--threads` overrides the
+intra-op threads per worker.
+
+Usage (a 32-core node):
+    python benchmarks/bench_workers.py --workers 1 2 4 8 16 32 --articles 64 --baseline
+    python benchmarks/bench_workers.py --workers 4 8 --threads 2 --no-summary --json out.json
+"""
+
+import argparse
+import json
+import time
+
+# bench_nlp imports corpus, which puts the repo root on sys.path
+from bench_nlp import corpus_texts, peak_rss_mb
+
+from inference_pool import InferencePool, available_cores
+
+
+def default_workers() -> list[int]:
+    """1, 2, 4, ... up to the number of available cores."""
+    cores = len(available_cores())
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+    return counts
+
+
+def run_pool(workers: int, texts: list[str], summarize: bool, threads: int) -> dict:
+    started = time.perf_counter()
+    with InferencePool(workers, threads=threads) as pool:
+        pool.wait_ready()
+        startup_s = time.perf_counter() - started
+        started = time.perf_counter()
+        pool.analyze(texts, summarize=summarize)
+        elapsed = time.perf_counter() - started
+        core_sets = pool.core_sets
+    return {
+        "workers": workers,
+        "cores_per_worker": len(core_sets[0]),
+        "startup_s": round(startup_s, 2),
+        "elapsed_s": round(elapsed, 2),
+        "articles_per_s": round(len(texts) / elapsed, 2),
+    }
+
+
+def run_baseline(texts: list[str], summarize: bool) -> dict:
+    started = time.perf_counter()
+    import utils
+    utils.MODELS.preload()
+    startup_s = time.perf_counter() - started
+    utils.analyze_text(texts[0], summarize=summarize)
+    started = time.perf_counter()
+    for text in texts:
+        utils.analyze_text(text, summarize=summarize)
+    elapsed = time.perf_counter() - started
+    return {
+        "workers": 0,
+        "cores_per_worker": len(available_cores()),
+        "startup_s": round(startup_s, 2),
+        "elapsed_s": round(elapsed, 2),
+        "articles_per_s": round(len(texts) / elapsed, 2),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers())
+    parser.add_argument("--articles", type=int, default=64)
+    parser.add_argument("--words", type=int, default=400, help="Article length in words")
+    parser.add_argument("--threads", type=int, default=0,
+                        help="Intra-op threads per worker (default: its share of the cores)")
+    parser.add_argument("--no-summary", action="store_true", help="Skip the summarizer (sentiment + embedding only)")
+    parser.add_argument("--baseline", action="store_true", help="Also run without a pool, in this process")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    texts = corpus_texts(args.words, args.articles)
+    summarize = not args.no_summary
+    print(f"{args.articles} articles of {args.words} words on {len(available_cores())} cores"
+          f"{'' if summarize else ', no summaries'}")
+    results = [run_pool(n, texts, summarize, args.threads) for n in args.workers]
+    single = next((r for r in results if r["workers"] == 1), None)
+    for r in results:
+        if single:
+            r["speedup"] = round(r["articles_per_s"] / single["articles_per_s"], 2)
+            r["efficiency"] = round(r["speedup"] / r["workers"], 2)
+    if args.baseline:
+        # Last: this loads the models into this process
+        results.append(run_baseline(texts, summarize))
+
+    print(f"{'workers':>7} {'cores/w':>7} {'start s':>8} {'art/s':>7} {'speed-up':>8} {'eff.':>5}")
+    for r in results:
+        label = r["workers"] or "in-proc"
+        print(f"{label:>7} {r['cores_per_worker']:>7} {r['startup_s']:>8.1f} {r['articles_per_s']:>7.2f} "
+              f"{r.get('speedup', ''):>8} {r.get('efficiency', ''):>5}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# benchmarks/corpus.py
+"""
+Helpers for the benchmark page corpus under benchmarks/fixtures/.
+
+Article pages live in fixtures/articles/<slug>/*.html and search-result
+pages in fixtures/search/<slug>/*.html, one directory per channel. The
+shipped pages are synthetic, hand-built to match each site's markup with
+generated text; none were recorded from the live sites. Use
+record_corpus.py to add real article pages.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+ARTICLES_DIR = os.path.join(FIXTURES, "articles")
+SEARCH_DIR = os.path.join(FIXTURES, "search")
+# Article pages laid out to exercise streamed downloads (bench_stream.py only)
+STREAM_DIR = os.path.join(FIXTURES, "stream")
+
+CHANNEL_SLUGS = {
+    "BBC": "bbc",
+    "CNN": "cnn",
+    "Dawn News": "dawn",
+    "Fox News": "fox",
+    "TRT News": "trt",
+    "Al Jazeera": "aljazeera",
+}
+
+# Page the search fixtures stand in for; relative result links resolve against it
+SEARCH_URLS = {
+    "BBC": "https://www.bbc.com/search?q=climate",
+    "CNN": "https://edition.cnn.com/search?q=climate&from=0&size=10&page=1&sort=newest&types=article&section=",
+    "Dawn News": "https://www.dawn.com/search?q=climate",
+    "Fox News": "https://www.foxnews.com/search-results/search#q=climate",
+    "TRT News": "https://www.trtworld.com/search?q=climate",
+    "Al Jazeera": "https://www.aljazeera.com/search/climate",
+}
+
+
+def load_articles(directory: str = ARTICLES_DIR) -> dict:
+    """Return {channel: [(filename, html), ...]} for every channel with pages."""
+    corpus = {}
+    for channel, slug in CHANNEL_SLUGS.items():
+        path = os.path.join(directory, slug)
+        if not os.path.isdir(path):
+            continue
+        pages = []
+        for name in sorted(os.listdir(path)):
+            if name.endswith(".html"):
+                with open(os.path.join(path, name), "r", encoding="utf-8") as f:
+                    pages.append((name, f.read()))
+        if pages:
+            corpus[channel] = pages
+    return corpus
+
+
+def load_search_pages(directory: str = SEARCH_DIR) -> dict:
+    """Return {channel: [(filename, html), ...]} of saved search-result pages."""
+    return load_articles(directory)
@@ -0,0 +1,53 @@
+# benchmarks/record_corpus.py
+"""
+Record real article pages into the benchmark corpus.
+
+Reads a links CSV (Link column, optional Source column) and saves up to
+`--per-channel` pages per channel into fixtures/articles/<slug>/. Downloads
+go through the politeness scheduler.
+
+Usage:
+    python benchmarks/record_corpus.py bbc_articles_dataset.csv --per-channel 5
+"""
+
+import argparse
+import hashlib
+import os
+
+from corpus import ARTICLES_DIR, CHANNEL_SLUGS
+
+from enrich import iter_links
+from extractors import normalize_channel
+from politeness import FetchError, PolitenessScheduler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Save article pages into the benchmark corpus.")
+    parser.add_argument("links", help="Links file (.csv or .parquet) with a Link column")
+    parser.add_argument("--per-channel", type=int, default=5)
+    parser.add_argument("--out", default=ARTICLES_DIR)
+    args = parser.parse_args()
+
+    scheduler = PolitenessScheduler()
+    saved = {}
+    for row in iter_links(args.links):
+        link = str(row.get("Link") or "")
+        channel = normalize_channel(str(row.get("Source") or ""), link)
+        if channel not in CHANNEL_SLUGS or saved.get(channel, 0) >= args.per_channel:
+            continue
+        try:
+            html = scheduler.fetch(link).text
+        except FetchError as e:
+            print(f"Skipping {link}: {e}")
+            continue
+        directory = os.path.join(args.out, CHANNEL_SLUGS[channel])
+        os.makedirs(directory, exist_ok=True)
+        name = "recorded_" + hashlib.sha1(link.encode("utf-8")).hexdigest()[:12] + ".html"
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(html)
+        saved[channel] = saved.get(channel, 0) + 1
+        print(f"Saved {link} -> {CHANNEL_SLUGS[channel]}/{name}")
+
+
+if __name__ == "__main__":
+    main()
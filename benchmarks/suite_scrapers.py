@@ -0,0 +1,123 @@
+# benchmarks/suite_scrapers.py
+"""
+pytest-benchmark suite for the scrapers' parsing, on the synthetic fixture corpus.
+
+Times every `scrape_*_article` extractor (with `_fetch_html` serving the
+fixture article pages) and the search-result card extraction
+(`extractors.parse_search_cards`, which the link crawlers run on each
+results page) per channel. Each benchmark also records pages/s, MB/s and
+the tracemalloc peak of one pass in `extra_info`, and checks its output
+against the digests in fixtures/expected.json so a faster parser cannot
+silently change what it extracts. After an intentional change (or new
+real pages), refresh the digests with NEWS_UPDATE_EXPECTED=1.
+
+Usage (from the repository root, needs `pip install pytest-benchmark`):
+    python -m pytest benchmarks/suite_scrapers.py --benchmark-autosave
+    python -m pytest benchmarks/suite_scrapers.py --benchmark-compare --benchmark-compare-fail=mean:10%
+"""
+
+import hashlib
+import json
+import os
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from corpus import CHANNEL_SLUGS, FIXTURES, SEARCH_URLS, load_articles, load_search_pages  # noqa: E402
+
+import scrapers  # noqa: E402
+from extractors import parse_search_cards  # noqa: E402
+
+EXPECTED_PATH = os.path.join(FIXTURES, "expected.json")
+UPDATE_EXPECTED = os.environ.get("NEWS_UPDATE_EXPECTED") == "1"
+
+EXTRACTORS = {
+    "BBC": scrapers.scrape_bbc_article,
+    "CNN": scrapers.scrape_cnn_article,
+    "Dawn News": scrapers.scrape_dawn_article,
+    "Fox News": scrapers.scrape_fox_article,
+    "TRT News": scrapers.scrape_trt_article,
+    "Al Jazeera": scrapers.scrape_aljazeera_article,
+}
+
+ARTICLES = load_articles()
+SEARCH_PAGES = load_search_pages()
+
+
+@pytest.fixture(scope="module")
+def expected():
+    digests = {}
+    if os.path.exists(EXPECTED_PATH):
+        with open(EXPECTED_PATH, "r", encoding="utf-8") as f:
+            digests = json.load(f)
+    yield digests
+    if UPDATE_EXPECTED:
+        with open(EXPECTED_PATH, "w", encoding="utf-8") as f:
+            json.dump(digests, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _check_stable(expected: dict, key: str, value):
+    if UPDATE_EXPECTED:
+        expected[key] = _digest(value)
+        return
+    assert key in expected, f"no digest for {key}; rerun with NEWS_UPDATE_EXPECTED=1"
+    assert _digest(value) == expected[key], f"output of {key} changed"
+
+
+def _record(benchmark, pages: list, run):
+    """Add throughput and one pass's allocation peak to the benchmark's extra_info."""
+    size = sum(len(html.encode("utf-8")) for _, html in pages)
+    mean = benchmark.stats.stats.mean
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    benchmark.extra_info.update({
+        "pages": len(pages),
+        "bytes": size,
+        "pages_per_s": round(len(pages) / mean, 1),
+        "mb_per_s": round(size / mean / 1e6, 2),
+        "peak_alloc_kib": round(peak / 1024, 1),
+    })
+
+
+@pytest.mark.parametrize("channel", [c for c in CHANNEL_SLUGS if c in ARTICLES])
+def test_article_extractor(benchmark, monkeypatch, expected, channel):
+    pages = ARTICLES[channel]
+    # The scrape_*_article functions fetch by URL; serve each saved page for its own URL
+    by_url = {f"fixture://{CHANNEL_SLUGS[channel]}/{name}": html for name, html in pages}
+    monkeypatch.setattr(scrapers, "_fetch_html", lambda url, _channel: by_url[url])
+    extractor = EXTRACTORS[channel]
+
+    def run():
+        return [extractor(url) for url in by_url]
+
+    texts = benchmark(run)
+    _record(benchmark, pages, run)
+    assert all(texts), "an extractor returned no text"
+    for (name, _), text in zip(pages, texts):
+        _check_stable(expected, f"articles/{CHANNEL_SLUGS[channel]}/{name}", text)
+
+
+@pytest.mark.parametrize("channel", [c for c in CHANNEL_SLUGS if c in SEARCH_PAGES])
+def test_search_cards(benchmark, expected, channel):
+    pages = SEARCH_PAGES[channel]
+
+    def run():
+        return [parse_search_cards(channel, html, SEARCH_URLS[channel]) for _, html in pages]
+
+    results = benchmark(run)
+    _record(benchmark, pages, run)
+    benchmark.extra_info["cards"] = sum(len(cards) for cards in results)
+    assert all(results), "a search page yielded no cards"
+    for (name, _), cards in zip(pages, results):
+        _check_stable(expected, f"search/{CHANNEL_SLUGS[channel]}/{name}", cards)
@@ -0,0 +1,104 @@
+# checkpoint.py
+"""
+Resumable crawl checkpoints.
+
+A checkpoint records how many result pages of a crawl have been fully
+processed, every link collected so far (in order) and the durable offset of
+the crawl's output sink. It is rewritten atomically after each page, so a
+crawl that dies mid-run can be restarted and will pick up after the last
+committed page without re-collecting links it already has.
+"""
+
+import json
+import os
+import re
+
+
+def crawl_slug(channel: str, topic: str) -> str:
+    return re.sub(r"[^\w]+", "_", f"{channel}_{topic}".lower()).strip("_")
+
+
+def checkpoint_path(directory: str, channel: str, topic: str) -> str:
+    return os.path.join(directory, f"{crawl_slug(channel, topic)}.checkpoint.json")
+
+
+class CrawlCheckpoint:
+    """
+    `key` identifies the crawl (e.g. channel + topic); a checkpoint file
+    written for a different key is ignored rather than resumed.
+    """
+
+    def __init__(self, path: str, key: str = ""):
+        self.path = path
+        self.key = key
+        self.page = 0
+        self.links = []
+        self.offset = None
+        self.done = False
+        self._seen = set()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if state.get("key", "") != self.key:
+            return
+        self.page = int(state.get("page", 0))
+        self.links = list(state.get("links", []))
+        self.offset = state.get("offset")
+        self.done = bool(state.get("done", False))
+        self._seen = set(self.links)
+
+    @property
+    def resuming(self) -> bool:
+        return self.page > 0 and not self.done
+
+    def seen(self, url: str) -> bool:
+        return url in self._seen
+
+    def add(self, url: str) -> bool:
+        """Record `url` as collected; returns False if it was already known."""
+        if url in self._seen:
+            return False
+        self._seen.add(url)
+        self.links.append(url)
+        return True
+
+    def commit(self, page: int, offset: int = None, done: bool = False):
+        """Atomically persist the state after `page` pages have been processed."""
+        self.page = page
+        if offset is not None:
+            self.offset = offset
+        self.done = done
+        state = {
+            "key": self.key,
+            "page": self.page,
+            "offset": self.offset,
+            "done": self.done,
+            "links": self.links,
+        }
+        parent = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(parent, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def finish(self, offset: int = None):
+        self.commit(self.page, offset=offset, done=True)
+
+    def reset(self):
+        self.page = 0
+        self.links = []
+        self.offset = None
+        self.done = False
+        self._seen = set()
+        if os.path.exists(self.path):
+            os.remove(self.path)
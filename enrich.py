@@ -0,0 +1,189 @@
+# enrich.py
+"""
+Concurrent article-content fetcher for links files.
+
+Takes any links CSV or Parquet file produced by the scraping/ crawlers (it
+needs a `Link` column; `Source` is used to pick the extractor and falls
+back to the URL's host), downloads the pages with bounded concurrency under
+the per-host politeness scheduler, and streams rows with `Article_Content`,
+`Author` and `Fetch_Status` filled in to the output as they complete.
+
+Usage:
+    python enrich.py BBC_articles_climate_final.csv -o bbc_articles_dataset.csv
+    python enrich.py links.parquet -o articles.jsonl --workers 32 --per-host 4
+"""
+
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from extractors import DEFAULT_AUTHORS, normalize_channel, parse_article, parse_author
+from politeness import FetchError, PolitenessScheduler
+from record_sink import RecordSink, require_pyarrow
+from store import ArticleStore, content_hash, now
+from streaming import read_article_html
+from urlcanon import SeenIndex, canonicalize
+
+
+def _is_parquet(path: str) -> bool:
+    return path.endswith(".parquet") or os.path.isdir(path)
+
+
+def iter_links(path: str, batch_size: int = 1000):
+    """Yield rows of a links CSV or Parquet file without loading it all at once."""
+    if _is_parquet(path):
+        import pyarrow.dataset as ds
+
+        for batch in ds.dataset(path, format="parquet").to_batches(batch_size=batch_size):
+            yield from batch.to_pylist()
+    else:
+        import pandas as pd
+
+        for chunk in pd.read_csv(path, chunksize=batch_size):
+            yield from chunk.to_dict("records")
+
+
+def fetch_row(row: dict, scheduler: PolitenessScheduler, channel: str = None,
+              timeout: float = 15, stream: bool = True) -> dict:
+    """
+    Fills in Article_Content and Author. `Fetch_Status` is "ok", "empty"
+    (page fetched but nothing extracted) or the scheduler's failure class,
+    so blocked or rate-limited pages are not mistaken for empty articles.
+    With `stream`, the download stops once the article body is complete.
+    """
+    link = str(row.get("Link") or "")
+    channel = channel or normalize_channel(str(row.get("Source") or ""), link)
+    row["Author"] = DEFAULT_AUTHORS.get(channel, channel)
+    try:
+        if stream:
+            html = scheduler.fetch(link, timeout=timeout,
+                                   reader=lambda resp: read_article_html(resp, channel))
+        else:
+            html = scheduler.fetch(link, timeout=timeout).text
+        row["Article_Content"] = parse_article(channel, html)
+        row["Author"] = parse_author(channel, html)
+        row["Fetch_Status"] = "ok" if row["Article_Content"] else "empty"
+        row["Fetch_Error"] = ""
+    except FetchError as e:
+        row["Article_Content"] = ""
+        row["Fetch_Status"] = e.kind
+        row["Fetch_Error"] = str(e)
+    except Exception as e:
+        row["Article_Content"] = ""
+        row["Fetch_Status"] = "error"
+        row["Fetch_Error"] = f"{type(e).__name__}: {e}"
+    return row
+
+
+def enrich(input_path: str, output_path: str, workers: int = 16, per_host: int = 4,
+           rate: float = 2.0, channel: str = None, timeout: float = 15,
+           report_every: int = 50, stream: bool = True, seen_path: str = None,
+           store_path: str = None) -> int:
+    """
+    Fetch and extract every link in `input_path`, writing rows to
+    `output_path` (.jsonl, .parquet or .csv) in completion order. CSV output
+    is exported from a JSONL sink next to it once all rows are done.
+    Each host gets `per_host` concurrent requests at up to `rate`
+    requests/sec (see politeness.py). Links that canonicalize to one already
+    in this run are skipped; with `seen_path`, so are links fetched
+    successfully by earlier runs, and this run's successes are added to it.
+    With `store_path`, fetched articles are also upserted (in batches) into
+    that article store. Returns the number of rows written.
+    """
+    if _is_parquet(input_path):
+        # Before the sink below discards the previous output
+        require_pyarrow(f"Reading links from {input_path}")
+    scheduler = PolitenessScheduler(rate=rate, burst=per_host, concurrency=per_host)
+    csv_output = output_path.endswith(".csv")
+    sink_path = os.path.splitext(output_path)[0] + ".jsonl" if csv_output else output_path
+    sink = RecordSink(sink_path, append=False)
+    seen_index = SeenIndex(seen_path) if seen_path else None
+    store = ArticleStore(store_path) if store_path else None
+    queued = set()
+
+    started = time.monotonic()
+    done = 0
+    failed = 0
+    skipped = 0
+
+    def drain(futures):
+        nonlocal done, failed
+        for future in futures:
+            row = future.result()
+            if row["Fetch_Status"] != "ok":
+                failed += 1
+            else:
+                if seen_index is not None:
+                    seen_index.add(row["Link"])
+                if store is not None:
+                    store.write({
+                        "url": row["Link"],
+                        "channel": channel or normalize_channel(str(row.get("Source") or ""), row["Link"]),
+                        "headline": row.get("Headline"),
+                        "author": row["Author"],
+                        "text": row["Article_Content"],
+                        "content_hash": content_hash(row["Article_Content"]),
+                        "fetched_at": now(),
+                    })
+            sink.write(row)
+            done += 1
+            if done % report_every == 0:
+                elapsed = time.monotonic() - started
+                logging.info(f"{done} rows, {done / elapsed:.1f} rows/sec, {failed} failed")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for row in iter_links(input_path):
+            key = canonicalize(str(row.get("Link") or ""))
+            if key in queued or (seen_index is not None and key in seen_index):
+                skipped += 1
+                continue
+            queued.add(key)
+            # Keep a bounded window of submitted rows so memory stays flat
+            if len(pending) >= workers * 2:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                drain(finished)
+            pending.add(pool.submit(fetch_row, row, scheduler, channel, timeout, stream))
+        finished, _ = wait(pending)
+        drain(finished)
+
+    sink.close()
+    if seen_index is not None:
+        seen_index.close()
+    if store is not None:
+        store.close()
+    if csv_output:
+        sink.export_csv(output_path)
+    elapsed = max(time.monotonic() - started, 1e-9)
+    logging.info(f"Done: {done} rows in {elapsed:.1f}s ({done / elapsed:.1f} rows/sec), "
+                 f"{failed} failed, {skipped} duplicates skipped")
+    for host, counts in scheduler.stats().items():
+        logging.info(f"{host}: {counts}")
+    return done
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Fetch article contents for a links CSV/Parquet file.")
+    parser.add_argument("input", help="Links file (.csv or .parquet) with a Link column")
+    parser.add_argument("-o", "--output", required=True, help="Output file (.csv, .jsonl or .parquet)")
+    parser.add_argument("--workers", type=int, default=16, help="Maximum concurrent downloads")
+    parser.add_argument("--per-host", type=int, default=4, help="Maximum concurrent downloads per host")
+    parser.add_argument("--rate", type=float, default=2.0, help="Maximum requests/sec per host")
+    parser.add_argument("--channel", default=None, help="Force a channel instead of using Source/host")
+    parser.add_argument("--timeout", type=float, default=15, help="Per-request timeout in seconds")
+    parser.add_argument("--no-stream", action="store_true",
+                        help="Download whole pages instead of stopping after the article body")
+    parser.add_argument("--seen", default=None,
+                        help="Seen-URL index file; links already fetched by earlier runs are skipped")
+    parser.add_argument("--store", default=None, help="Also save fetched articles to this article store (SQLite)")
+    args = parser.parse_args()
+    enrich(args.input, args.output, workers=args.workers, per_host=args.per_host,
+           rate=args.rate, channel=args.channel, timeout=args.timeout,
+           stream=not args.no_stream, seen_path=args.seen, store_path=args.store)
+
+
+if __name__ == "__main__":
+    main()
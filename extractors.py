@@ -0,0 +1,367 @@
+# extractors.py
+"""
+Per-channel article extractors.
+
+These work on already-downloaded HTML so that the app's scrapers and the
+batch content fetcher (enrich.py) share exactly the same extraction logic.
+
+`parse_article` first looks for a JSON-LD NewsArticle with an articleBody,
+which only needs a regex scan and a json.loads; the per-channel DOM
+extractors run only when a page has no usable JSON-LD.
+
+Each DOM extractor only builds the part of the tree it reads (via SoupStrainer)
+instead of the whole page. The parser defaults to the stdlib "html.parser";
+set NEWS_HTML_PARSER=lxml to use lxml when it is installed. Run
+benchmarks/bench_parse.py to check output parity and throughput on the
+fixture corpus before switching parsers.
+
+`parse_search_cards` reads the result cards (link, headline, description)
+off a saved or live search-results page.
+"""
+
+import json
+import os
+import re
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+CHANNELS = ["BBC", "CNN", "Dawn News", "Fox News", "TRT News", "Al Jazeera"]
+
+# Host suffix -> channel, used when a links file has no usable Source column
+CHANNEL_HOSTS = {
+    "bbc.com": "BBC",
+    "bbc.co.uk": "BBC",
+    "cnn.com": "CNN",
+    "dawn.com": "Dawn News",
+    "foxnews.com": "Fox News",
+    "trtworld.com": "TRT News",
+    "aljazeera.com": "Al Jazeera",
+}
+
+# Source values written by the scraping/ crawlers -> channel
+SOURCE_ALIASES = {
+    "DAWN.COM": "Dawn News",
+    "TRT World": "TRT News",
+    "AlJazeera": "Al Jazeera",
+}
+
+
+def channel_for_url(url: str) -> str:
+    host = (urlparse(url).hostname or "").lower()
+    for suffix, channel in CHANNEL_HOSTS.items():
+        if host == suffix or host.endswith("." + suffix):
+            return channel
+    return ""
+
+
+def normalize_channel(source: str, url: str = "") -> str:
+    """Map a Source value (or, failing that, the URL's host) to a channel name."""
+    source = (source or "").strip()
+    if source in CHANNELS:
+        return source
+    if source in SOURCE_ALIASES:
+        return SOURCE_ALIASES[source]
+    return channel_for_url(url)
+
+
+HTML_PARSER = os.environ.get("NEWS_HTML_PARSER", "html.parser")
+
+# Only the subtrees each extractor reads
+_ARTICLE_ONLY = SoupStrainer("article")
+_MAIN_ONLY = SoupStrainer("main")
+_PARAGRAPHS_ONLY = SoupStrainer("p")
+# Strainers see the raw, unsplit class attribute, so match the class as a word
+_DAWN_STORY_ONLY = SoupStrainer("div", class_=re.compile(r"(^|\s)story__content(\s|$)"))
+_CNN_BYLINE_ONLY = SoupStrainer("span", class_=re.compile(r"(^|\s)byline__name(\s|$)"))
+
+
+def _soup(html: str, parse_only: SoupStrainer) -> BeautifulSoup:
+    return BeautifulSoup(html, HTML_PARSER, parse_only=parse_only)
+
+
+def parse_bbc_article(html: str) -> str:
+    soup = _soup(html, _ARTICLE_ONLY)
+    art = soup.find("article")
+    if not art:
+        return ""
+    paras = art.find_all("p")
+    return " ".join(p.get_text().strip() for p in paras)
+
+
+def parse_cnn_article(html: str) -> str:
+    soup = _soup(html, _PARAGRAPHS_ONLY)
+    paras = soup.find_all("p")
+    return " ".join(p.get_text().strip() for p in paras)
+
+
+def parse_dawn_article(html: str) -> str:
+    soup = _soup(html, _DAWN_STORY_ONLY)
+    container = soup.find("div", class_="story__content")
+    if not container:
+        return ""
+    paras = container.find_all("p")
+    return "\n".join(p.get_text(strip=True) for p in paras)
+
+
+def parse_fox_article(html: str) -> str:
+    soup = _soup(html, _MAIN_ONLY)
+    main = soup.find("main")
+    if not main:
+        return ""
+    paras = main.find_all("p")
+    return "\n".join(p.get_text(strip=True) for p in paras)
+
+
+def parse_trt_article(html: str) -> str:
+    soup = _soup(html, _PARAGRAPHS_ONLY)
+    paras = soup.find_all("p")
+    return " ".join(p.get_text().strip() for p in paras)
+
+
+def parse_aljazeera_article(html: str) -> str:
+    soup = _soup(html, _MAIN_ONLY)
+    main = soup.find("main")
+    if not main:
+        return ""
+    paras = main.find_all("p")
+    return "\n".join(p.get_text(strip=True) for p in paras)
+
+
+_JSONLD_RE = re.compile(
+    r"<script[^>]*type=[\"']application/ld\+json[\"'][^>]*>(.*?)</script>",
+    re.IGNORECASE | re.DOTALL,
+)
+JSONLD_ARTICLE_TYPES = {
+    "NewsArticle",
+    "Article",
+    "ReportageNewsArticle",
+    "AnalysisNewsArticle",
+    "OpinionNewsArticle",
+    "BackgroundNewsArticle",
+    "ReviewNewsArticle",
+    "BlogPosting",
+}
+
+
+def _jsonld_objects(data):
+    if isinstance(data, list):
+        for item in data:
+            yield from _jsonld_objects(item)
+    elif isinstance(data, dict):
+        yield data
+        if "@graph" in data:
+            yield from _jsonld_objects(data["@graph"])
+
+
+def _jsonld_author(author) -> str:
+    if isinstance(author, list):
+        names = [_jsonld_author(a) for a in author]
+        return ", ".join(n for n in names if n)
+    if isinstance(author, dict):
+        return str(author.get("name") or "")
+    if isinstance(author, str):
+        return author
+    return ""
+
+
+def jsonld_article(script: str) -> dict:
+    """
+    Parse the contents of one ld+json script tag. Returns {"headline",
+    "date_published", "author", "body"} for the first news article object
+    in it with an articleBody, else for the first one without, or None.
+    """
+    try:
+        data = json.loads(script.strip())
+    except ValueError:
+        return None
+    first = None
+    for obj in _jsonld_objects(data):
+        types = obj.get("@type")
+        types = types if isinstance(types, list) else [types]
+        if not any(t in JSONLD_ARTICLE_TYPES for t in types):
+            continue
+        article = {
+            "headline": str(obj.get("headline") or ""),
+            "date_published": str(obj.get("datePublished") or ""),
+            "author": _jsonld_author(obj.get("author")),
+            "body": str(obj.get("articleBody") or "").strip(),
+        }
+        if article["body"]:
+            return article
+        first = first or article
+    return first
+
+
+def extract_jsonld(html: str) -> dict:
+    """
+    Scan the page's JSON-LD script tags for a news article object without
+    building a DOM. Returns `jsonld_article` for the first one with a body
+    (the one the streaming reader stops at), else the first one found, or
+    None.
+    """
+    if "application/ld+json" not in html:
+        return None
+    first = None
+    for match in _JSONLD_RE.finditer(html):
+        article = jsonld_article(match.group(1))
+        if article and article["body"]:
+            return article
+        first = first or article
+    return first
+
+
+ARTICLE_PARSERS = {
+    "BBC": parse_bbc_article,
+    "CNN": parse_cnn_article,
+    "Dawn News": parse_dawn_article,
+    "Fox News": parse_fox_article,
+    "TRT News": parse_trt_article,
+    "Al Jazeera": parse_aljazeera_article,
+}
+
+DEFAULT_AUTHORS = {
+    "BBC": "BBC",
+    "CNN": "CNN",
+    "Dawn News": "Dawn News",
+    "Fox News": "Fox News",
+    "TRT News": "TRT World",
+    "Al Jazeera": "AlJazeera",
+}
+
+
+def extract_article(channel: str, html: str) -> dict:
+    """
+    Returns {"text", "headline", "date_published", "author", "method"},
+    where method is "jsonld" when the text came from JSON-LD articleBody and
+    "dom" when the channel's DOM extractor had to run.
+    """
+    meta = extract_jsonld(html) or {}
+    if meta.get("body"):
+        return {
+            "text": meta["body"],
+            "headline": meta["headline"],
+            "date_published": meta["date_published"],
+            "author": meta["author"],
+            "method": "jsonld",
+        }
+    parser = ARTICLE_PARSERS.get(channel)
+    return {
+        "text": parser(html) if parser else "",
+        "headline": meta.get("headline", ""),
+        "date_published": meta.get("date_published", ""),
+        "author": meta.get("author", ""),
+        "method": "dom",
+    }
+
+
+def parse_article(channel: str, html: str) -> str:
+    if channel not in ARTICLE_PARSERS:
+        return ""
+    return extract_article(channel, html)["text"]
+
+
+def parse_author(channel: str, html: str) -> str:
+    """BBC names the author in JSON-LD and CNN in a byline; other channels use a fixed credit."""
+    default = DEFAULT_AUTHORS.get(channel, channel)
+    if channel == "BBC":
+        meta = extract_jsonld(html)
+        if meta and meta["author"]:
+            return meta["author"]
+    elif channel == "CNN":
+        soup = _soup(html, _CNN_BYLINE_ONLY)
+        author_element = soup.find("span", class_="byline__name")
+        if author_element:
+            return author_element.get_text().strip()
+        # A streamed download can stop at the JSON-LD, before the byline
+        meta = extract_jsonld(html)
+        if meta and meta["author"]:
+            return meta["author"]
+    return default
+
+
+# Search-result cards per channel: the card element, and inside it the link,
+# headline and description. `prefix` keeps only links to articles; `strainer`
+# limits parsing to the cards. The crawlers in scrapers.py use the same
+# selectors on the live page. `newest_first` marks the searches they sort by
+# date, the only ones where a seen link means every later result is older.
+SEARCH_CARDS = {
+    "BBC": {
+        "card": 'div[data-testid="newport-card"]',
+        "link": "a[data-testid='internal-link']",
+        "headline": "h2[data-testid='card-headline']",
+        "description": "div.sc-cdecfb63-3.pGVVH, p[data-testid='card-description']",
+        "prefix": "https://www.bbc.com/news/articles",
+        "strainer": SoupStrainer("div", attrs={"data-testid": "newport-card"}),
+    },
+    "CNN": {
+        "card": 'div[data-component-name="card"]',
+        "link": "a.container__link",
+        "headline": "span.container__headline-text",
+        "description": "div.container__description",
+        "strainer": SoupStrainer("div", attrs={"data-component-name": "card"}),
+        "newest_first": True,
+    },
+    "Dawn News": {
+        "card": "div.gsc-webResult.gsc-result",
+        "link": "div.gs-title a.gs-title",
+        "headline": "div.gs-title",
+        "description": "div.gs-snippet",
+        "strainer": SoupStrainer("div", class_=re.compile(r"(^|\s)gsc-webResult(\s|$)")),
+    },
+    "Fox News": {
+        "card": "article.article",
+        "link": "h2.title a",
+        "headline": "h2.title a",
+        "description": "div.content p.dek a",
+        "strainer": SoupStrainer("article", class_=re.compile(r"(^|\s)article(\s|$)")),
+    },
+    "TRT News": {
+        "card": "div.Card.Card-Search",
+        "link": "a",
+        "headline": "div.news-title h3",
+        "description": "div.news-summary p",
+        "strainer": SoupStrainer("div", class_=re.compile(r"(^|\s)Card-Search(\s|$)")),
+    },
+    "Al Jazeera": {
+        "card": "article.gc.u-clickable-card",
+        "link": "a.u-clickable-card__link",
+        "headline": "h3.gc__title span",
+        "description": "div.gc__excerpt p",
+        "strainer": SoupStrainer("article", class_=re.compile(r"(^|\s)u-clickable-card(\s|$)")),
+    },
+}
+
+
+def _card_field(card, selector: str) -> str:
+    element = card.select_one(selector)
+    if element is None:
+        return None
+    return " ".join(element.get_text(" ").split()) or None
+
+
+def parse_search_cards(channel: str, html: str, base_url: str = "") -> list[dict]:
+    """
+    Result cards on a search page, in page order: {"url", "headline",
+    "description"} with the link resolved against `base_url`. Cards without
+    a link (or, for BBC, not linking to an article) are skipped.
+    """
+    config = SEARCH_CARDS.get(channel)
+    if config is None:
+        return []
+    soup = _soup(html, config["strainer"])
+    cards = []
+    for card in soup.select(config["card"]):
+        link = card.select_one(config["link"])
+        href = link.get("href") if link is not None else None
+        if not href:
+            continue
+        url = urljoin(base_url, href)
+        if config.get("prefix") and not url.startswith(config["prefix"]):
+            continue
+        cards.append({
+            "url": url,
+            "headline": _card_field(card, config["headline"]),
+            "description": _card_field(card, config["description"]),
+        })
+    return cards
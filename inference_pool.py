@@ -0,0 +1,225 @@
+# inference_pool.py
+"""
+Article-level inference on a pool of worker processes.
+
+One process running the models uses PyTorch's default threading, which
+spreads each small matrix product over every core and scales poorly for
+many short articles. This pool starts `workers` processes instead. Each
+worker is pinned to its own slice of the available cores
+(os.sched_setaffinity) and runs PyTorch with one intra-op thread per core
+of that slice. Each worker loads the models once. Articles are then sent
+out one at a time, and `analyze` returns their analyses in input order.
+
+Set NEWS_INFERENCE_WORKERS to use a pool for monitoring runs
+(`analyze_texts`). NEWS_INFERENCE_THREADS overrides the threads per worker
+(default: the size of its core slice). With 0 workers (the default) the
+articles are analyzed in this process as before.
+
+    with InferencePool(workers=8) as pool:
+        analyses = pool.analyze(texts, summarize=True)
+
+benchmarks/bench_workers.py measures throughput from 1 to N workers.
+"""
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+WORKERS = int(os.environ.get("NEWS_INFERENCE_WORKERS", "0"))
+THREADS = int(os.environ.get("NEWS_INFERENCE_THREADS", "0"))
+
+_THREAD_VARIABLES = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+def available_cores() -> list[int]:
+    """The CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def partition_cores(workers: int, cores: list[int] = None) -> list[list[int]]:
+    """
+    Split `cores` (default: all available) into `workers` contiguous slices
+    of nearly equal size. With more workers than cores, the cores are shared
+    round-robin.
+    """
+    cores = list(cores) if cores is not None else available_cores()
+    if workers <= len(cores):
+        size, extra = divmod(len(cores), workers)
+        slices, start = [], 0
+        for i in range(workers):
+            end = start + size + (1 if i < extra else 0)
+            slices.append(cores[start:end])
+            start = end
+        return slices
+    return [[cores[i % len(cores)]] for i in range(workers)]
+
+
+_worker = {}
+
+
+def _init_worker(core_sets, ready, threads: int):
+    try:
+        _load_worker(core_sets, threads)
+    except BaseException as e:
+        # Tell wait_ready instead of leaving it waiting; the pool is broken now
+        ready.put(f"{type(e).__name__}: {e}")
+        raise
+    ready.put(None)
+
+
+def _load_worker(core_sets, threads: int):
+    # One slice per worker: the executor never starts more than `workers`
+    # processes, and does not replace one that dies (the pool breaks instead)
+    cores = core_sets.get_nowait()
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    threads = threads or (len(cores) if cores else 1)
+    # Set before torch is imported so its OpenMP runtime starts with this many threads
+    for name in _THREAD_VARIABLES:
+        os.environ[name] = str(threads)
+    import torch
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Only allowed before the first parallel operation
+        pass
+    import utils
+
+    utils.MODELS.preload()
+    _worker["analyze"] = utils.analyze_text
+
+
+def _noop():
+    pass
+
+
+def _analyze(job: tuple) -> dict:
+    text, summarize, keywords = job
+    return _worker["analyze"](text, summarize=summarize, keywords=keywords)
+
+
+class InferencePool:
+    """`workers` pinned model processes; use as a context manager or call `close()`."""
+
+    def __init__(self, workers: int, cores: list[int] = None, threads: int = THREADS):
+        self.workers = workers
+        self.core_sets = partition_cores(workers, cores)
+        # spawn, not fork: a forked copy of a process that already started
+        # PyTorch's thread pools can deadlock
+        context = multiprocessing.get_context("spawn")
+        queue = context.Queue()
+        for core_set in self.core_sets:
+            queue.put(core_set)
+        self._ready = context.Queue()
+        self._started = False
+        self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                             initializer=_init_worker,
+                                             initargs=(queue, self._ready, threads))
+
+    def wait_ready(self, timeout: float = None):
+        """Start every worker and wait until each has loaded the models."""
+        if self._started:
+            return
+        # Workers are started on demand, one per queued task while none is idle
+        for _ in range(self.workers):
+            self._executor.submit(_noop)
+        for _ in range(self.workers):
+            error = self._ready.get(timeout=timeout)
+            if error:
+                raise RuntimeError(f"inference worker failed to start: {error}")
+        self._started = True
+
+    def analyze(self, texts: list[str], summarize: bool = True, keywords: bool = False,
+                return_exceptions: bool = False) -> list[dict]:
+        """
+        `utils.analyze_text` for every text, one article per task, results in
+        input order. With `return_exceptions`, an article that fails gives its
+        exception in place of an analysis instead of failing the batch.
+        """
+        futures = [self._executor.submit(_analyze, (text, summarize, keywords)) for text in texts]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                if not return_exceptions:
+                    for other in futures:
+                        other.cancel()
+                    raise
+                results.append(e)
+        return results
+
+    def close(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_pool = None
+
+
+def _shared_pool() -> InferencePool:
+    global _pool
+    if _pool is None:
+        _pool = InferencePool(WORKERS)
+        logging.info(f"Started {WORKERS} inference workers on cores "
+                     f"{', '.join(f'{s[0]}-{s[-1]}' for s in _pool.core_sets)}")
+    return _pool
+
+
+def _discard_pool():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+
+
+def analyze_texts(texts: list[str], summarize: bool = True, keywords: bool = False,
+                  return_exceptions: bool = False) -> list[dict]:
+    """
+    Analyze `texts` on the shared pool when NEWS_INFERENCE_WORKERS is set,
+    otherwise one after another in this process. Articles lost to a pool
+    broken by a dead worker (e.g. killed for memory) are retried once on a
+    new pool. `return_exceptions` as for `InferencePool.analyze`.
+    """
+    if WORKERS <= 0:
+        # Importing utils pulls in transformers, so only pay for it when needed
+        from utils import analyze_text
+
+        results = []
+        for text in texts:
+            try:
+                results.append(analyze_text(text, summarize=summarize, keywords=keywords))
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+    results = _shared_pool().analyze(texts, summarize=summarize, keywords=keywords, return_exceptions=True)
+    broken = [i for i, result in enumerate(results) if isinstance(result, BrokenProcessPool)]
+    if broken:
+        logging.warning(f"Inference pool broken ({results[broken[0]]}); "
+                        f"retrying {len(broken)} articles on a new one")
+        _discard_pool()
+        retried = _shared_pool().analyze([texts[i] for i in broken], summarize=summarize,
+                                         keywords=keywords, return_exceptions=True)
+        for i, result in zip(broken, retried):
+            results[i] = result
+        if any(isinstance(result, BrokenProcessPool) for result in retried):
+            # Leave no broken pool behind for the next call
+            _discard_pool()
+    if not return_exceptions:
+        error = next((result for result in results if isinstance(result, Exception)), None)
+        if error is not None:
+            raise error
+    return results
@@ -0,0 +1,284 @@
+# metrics.py
+"""
+In-process metrics in the Prometheus text format.
+
+A small registry of counters, gauges and histograms (labelled by keyword
+arguments) with an optional local HTTP endpoint. Set NEWS_METRICS_PORT to
+serve them at http://127.0.0.1:<port>/metrics; the app and monitor.py
+start the endpoint themselves. The counters and gauges below are updated
+where the work happens. Latencies come from the tracing spans (see
+tracing.py) through `record_span`, so a timed stage is not timed twice.
+
+    news_articles_fetched_total{channel,outcome} downloads by outcome
+    news_fetch_seconds{channel}                 article download latency
+    news_article_cache_lookups_total{result}    stored text reused (hit) or downloaded (miss)
+    news_analysis_cache_lookups_total{result}   near-duplicate analysis found (hit) or not
+    news_analysis_cache_hit_ratio               share of analysis lookups that were hits
+    news_inference_seconds{function,model}      latency of each NLP call
+    news_browser_start_seconds                  Chrome start-up time
+    news_browsers                               Chrome instances currently running
+    news_result_pages_total{channel}            search-results pages read
+    news_refresh_queue_depth                    background refreshes queued or running
+    news_refresh_jobs_total{state}              finished background refreshes
+    news_model_resident_bytes{model}            memory of each loaded NLP model (model_manager.py)
+    news_model_evictions_total{model,reason}    models unloaded when idle or over budget
+    process_resident_memory_bytes               current RSS
+"""
+
+import bisect
+import logging
+import os
+import resource
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import tracing
+from models import KEYWORD_MODEL, SENTIMENT_MODEL, SUMMARY_MODEL
+
+PORT = int(os.environ.get("NEWS_METRICS_PORT", "0"))
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _samples(self):
+        with self._lock:
+            return [(_format_labels(self.labelnames, key), value)
+                    for key, value in sorted(self._values.items())]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{self.name}{labels} {_format_value(value)}" for labels, value in self._samples()]
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), function=None):
+        super().__init__(name, help, labels)
+        # Unlabelled gauge read at collection time
+        self.function = function
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def _samples(self):
+        if self.function is not None:
+            return [("", self.function())]
+        return super()._samples()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(key, list(counts), total, count)
+                     for key, (counts, total, count) in sorted(self._values.items())]
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            plain = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{plain} {_format_value(total)}")
+            lines.append(f"{self.name}_count{plain} {count}")
+        return "\n".join(lines)
+
+
+REGISTRY = []
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format."""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+def resident_memory_bytes() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # No /proc (e.g. macOS): fall back to the peak
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+ARTICLES_FETCHED = Counter("news_articles_fetched_total", "Article downloads by outcome.",
+                           ("channel", "outcome"))
+FETCH_SECONDS = Histogram("news_fetch_seconds", "Article download latency in seconds.", ("channel",))
+ARTICLE_CACHE = Counter("news_article_cache_lookups_total",
+                        "Article text served from the store (hit) or downloaded (miss).", ("result",))
+ANALYSIS_CACHE = Counter("news_analysis_cache_lookups_total",
+                         "Near-duplicate analysis lookups that found (hit) or missed an earlier analysis.",
+                         ("result",))
+
+
+def _analysis_hit_ratio() -> float:
+    hits, misses = ANALYSIS_CACHE.value(result="hit"), ANALYSIS_CACHE.value(result="miss")
+    return hits / (hits + misses) if hits + misses else 0.0
+
+
+ANALYSIS_HIT_RATIO = Gauge("news_analysis_cache_hit_ratio",
+                           "Share of analysis cache lookups that were hits.", function=_analysis_hit_ratio)
+INFERENCE_SECONDS = Histogram("news_inference_seconds", "NLP call latency in seconds.",
+                              ("function", "model"),
+                              buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
+BROWSER_START_SECONDS = Histogram("news_browser_start_seconds", "Chrome start-up time in seconds.")
+BROWSERS = Gauge("news_browsers", "Chrome instances currently running.")
+RESULT_PAGES = Counter("news_result_pages_total", "Search-results pages read.", ("channel",))
+REFRESH_QUEUE = Gauge("news_refresh_queue_depth", "Background topic refreshes queued or running.")
+REFRESH_JOBS = Counter("news_refresh_jobs_total", "Finished background topic refreshes.", ("state",))
+MODEL_RESIDENT_BYTES = Gauge("news_model_resident_bytes", "Memory of each loaded NLP model in bytes.",
+                             ("model",))
+MODEL_EVICTIONS = Counter("news_model_evictions_total", "NLP models unloaded, by reason.",
+                          ("model", "reason"))
+BROWSERS.set(0)
+REFRESH_QUEUE.set(0)
+RSS = Gauge("process_resident_memory_bytes", "Resident memory size in bytes.",
+            function=resident_memory_bytes)
+
+# tracing span name -> (function, model) for news_inference_seconds
+_INFERENCE_SPANS = {
+    "nlp.sentiment": ("sentiment", SENTIMENT_MODEL),
+    "nlp.summary": ("summary", SUMMARY_MODEL),
+    "nlp.keywords": ("keywords", KEYWORD_MODEL),
+    "nlp.embed": ("embed", KEYWORD_MODEL),
+    "nlp.rank": ("rank", KEYWORD_MODEL),
+    "nlp.wordcloud": ("wordcloud", "wordcloud"),
+}
+
+
+def record_span(span: tracing.Span):
+    """Update the latency metrics from a finished tracing span."""
+    name = span.name
+    if name in _INFERENCE_SPANS:
+        function, model = _INFERENCE_SPANS[name]
+        INFERENCE_SECONDS.observe(span.duration, function=function, model=model)
+    elif name == "article.download":
+        channel = span.attributes.get("channel", "")
+        ARTICLES_FETCHED.inc(channel=channel, outcome="error" if span.error else "ok")
+        if not span.error:
+            FETCH_SECONDS.observe(span.duration, channel=channel)
+    elif name == "article":
+        ARTICLE_CACHE.inc(result="hit" if span.attributes.get("stored") else "miss")
+    elif name == "links.page":
+        RESULT_PAGES.inc(channel=span.attributes.get("channel", ""))
+    elif name == "browser.start" and not span.error:
+        BROWSER_START_SECONDS.observe(span.duration)
+
+
+tracing.add_listener(record_span)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+
+
+def serve(port: int = PORT, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Serve /metrics on a background thread (once per process). Returns the
+    server, or None if no port is configured or it is already taken (e.g.
+    by another app replica).
+    """
+    global _server
+    if _server is not None or not port:
+        return _server
+    try:
+        _server = ThreadingHTTPServer((host, port), _Handler)
+    except OSError as e:
+        logging.warning(f"Metrics endpoint not started on {host}:{port}: {e}")
+        return None
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, daemon=True, name="metrics").start()
+    logging.info(f"Serving metrics at http://{host}:{port}/metrics")
+    return _server
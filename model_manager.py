@@ -0,0 +1,222 @@
+# model_manager.py
+"""
+On-demand model loading under a memory budget.
+
+utils.py used to load every model at import and keep it resident, so an
+app instance that never generates summaries still held BART-large
+(~1.6 GB). The ModelManager loads each registered model the first time it
+is used and records when it was last used. It unloads models that are
+idle (NEWS_MODEL_IDLE_SECONDS, checked every minute) or, when the next
+load would exceed NEWS_MODEL_BUDGET_MB, the least recently used ones
+first. A model that is running is never unloaded. 0 (the default for both)
+means no limit.
+
+`proxy(name)` returns a stand-in that is called like the model itself
+(`summarizer(text, ...)`, `keyword_model.encode(...)`), so callers keep
+their module-level names. A model's memory is the size of its parameters
+and buffers (or the RSS growth while loading it, for other objects);
+`report()` lists every model with its state, size, last use and
+load/eviction counts, and the news_model_resident_bytes metric exports
+it.
+"""
+
+import ctypes
+import gc
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import MODEL_EVICTIONS, MODEL_RESIDENT_BYTES, resident_memory_bytes
+
+BUDGET_MB = float(os.environ.get("NEWS_MODEL_BUDGET_MB", "0"))
+IDLE_SECONDS = float(os.environ.get("NEWS_MODEL_IDLE_SECONDS", "0"))
+
+
+def model_bytes(model) -> int:
+    """Bytes of parameters and buffers of a torch module (or a pipeline's model), else 0."""
+    module = getattr(model, "model", model)
+    if not hasattr(module, "parameters"):
+        return 0
+    tensors = list(module.parameters()) + list(getattr(module, "buffers", lambda: [])())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def _release_memory():
+    """Collect the dropped model and hand freed heap pages back to the OS."""
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        # Not glibc: the allocator keeps the pages for reuse
+        pass
+
+
+class _Entry:
+    def __init__(self, name: str, loader):
+        self.name = name
+        self.loader = loader
+        self.model = None
+        self.bytes = 0
+        self.last_used = None
+        self.users = 0
+        self.loads = 0
+        self.load_s = None
+        self.evictions = 0
+        self.load_lock = threading.Lock()
+
+
+class ModelManager:
+    def __init__(self, budget_mb: float = BUDGET_MB, idle_seconds: float = IDLE_SECONDS):
+        self.budget = int(budget_mb * 1024 * 1024)
+        self.idle_seconds = idle_seconds
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    def register(self, name: str, loader):
+        """Register `loader()` as the way to load `name` (not loaded until used)."""
+        self._entries[name] = _Entry(name, loader)
+
+    def proxy(self, name: str) -> "ModelProxy":
+        return ModelProxy(self, name)
+
+    def resident_bytes(self) -> int:
+        with self._lock:
+            return sum(e.bytes for e in self._entries.values() if e.model is not None)
+
+    def _evictable(self, keep: str) -> list:
+        with self._lock:
+            loaded = [e for e in self._entries.values()
+                      if e.model is not None and e.users == 0 and e.name != keep]
+        return sorted(loaded, key=lambda e: e.last_used)
+
+    def _make_room(self, needed: int, keep: str):
+        """Unload least recently used models until `needed` more bytes fit in the budget."""
+        if not self.budget:
+            return
+        for entry in self._evictable(keep):
+            if self.resident_bytes() + needed <= self.budget:
+                return
+            self.evict(entry.name, reason="budget")
+
+    def _load(self, entry: _Entry):
+        with entry.load_lock:
+            if entry.model is not None:
+                return
+            # A model seen before needs as much room again
+            self._make_room(entry.bytes, keep=entry.name)
+            rss = resident_memory_bytes()
+            started = time.perf_counter()
+            try:
+                model = entry.loader()
+            except Exception as e:
+                # Callers may swallow the error (e.g. classify_sentiment), so say it here
+                logging.error(f"Could not load model {entry.name}: {e}")
+                raise
+            size = model_bytes(model) or max(0, int(resident_memory_bytes() - rss))
+            with self._lock:
+                entry.model = model
+                entry.bytes = size
+                entry.loads += 1
+                entry.load_s = time.perf_counter() - started
+            MODEL_RESIDENT_BYTES.set(size, model=entry.name)
+            logging.info(f"Loaded model {entry.name} ({size / 1e6:.0f} MB) in {entry.load_s:.1f} s")
+        # Over budget even before the next load (e.g. a first load of unknown size)
+        self._make_room(0, keep=entry.name)
+        self._start_reaper()
+
+    @contextmanager
+    def use(self, name: str):
+        """The loaded model `name`, which is not unloaded while the block runs."""
+        entry = self._entries[name]
+        with self._lock:
+            entry.users += 1
+        try:
+            if entry.model is None:
+                self._load(entry)
+            yield entry.model
+        finally:
+            with self._lock:
+                entry.users -= 1
+                entry.last_used = time.monotonic()
+
+    def get(self, name: str):
+        with self.use(name) as model:
+            return model
+
+    def preload(self, names: list[str] = None):
+        """Load `names` (default: every registered model) now rather than on first use."""
+        for name in names or list(self._entries):
+            self.get(name)
+
+    def evict(self, name: str, reason: str = "manual") -> bool:
+        entry = self._entries[name]
+        with self._lock:
+            if entry.model is None or entry.users:
+                return False
+            entry.model = None
+            entry.evictions += 1
+        _release_memory()
+        MODEL_RESIDENT_BYTES.set(0, model=name)
+        MODEL_EVICTIONS.inc(model=name, reason=reason)
+        logging.info(f"Unloaded model {name} ({entry.bytes / 1e6:.0f} MB, {reason})")
+        return True
+
+    def evict_idle(self, now: float = None) -> list[str]:
+        """Unload every model unused for `idle_seconds`; returns their names."""
+        if not self.idle_seconds:
+            return []
+        now = time.monotonic() if now is None else now
+        return [e.name for e in self._evictable(keep=None)
+                if now - e.last_used >= self.idle_seconds and self.evict(e.name, reason="idle")]
+
+    def _start_reaper(self):
+        if not self.idle_seconds or self._reaper is not None:
+            return
+        interval = min(60.0, self.idle_seconds)
+
+        def reap():
+            while True:
+                time.sleep(interval)
+                self.evict_idle()
+
+        self._reaper = threading.Thread(target=reap, daemon=True, name="model-reaper")
+        self._reaper.start()
+
+    def report(self) -> list[dict]:
+        """One row per registered model: loaded, MB, idle seconds, last load time, loads, evictions."""
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                "model": e.name,
+                "loaded": e.model is not None,
+                "mb": round(e.bytes / 1e6, 1) if e.model is not None else 0.0,
+                "idle_s": round(now - e.last_used, 1) if e.last_used is not None else None,
+                "load_s": round(e.load_s, 2) if e.load_s is not None else None,
+                "loads": e.loads,
+                "evictions": e.evictions,
+            } for e in self._entries.values()]
+
+
+class ModelProxy:
+    """Stands in for a managed model: calls and method calls load it on demand."""
+
+    def __init__(self, manager: ModelManager, name: str):
+        self._manager = manager
+        self._name = name
+
+    def __call__(self, *args, **kwargs):
+        with self._manager.use(self._name) as model:
+            return model(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        value = getattr(self._manager.get(self._name), attr)
+        if not callable(value):
+            return value
+
+        def call(*args, **kwargs):
+            with self._manager.use(self._name) as model:
+                return getattr(model, attr)(*args, **kwargs)
+        return call
@@ -0,0 +1,313 @@
+# model_server.py
+"""
+Shared model server: one process hosts the NLP models for many app processes.
+
+Every app process that imports utils.py normally loads its own sentiment,
+summarization and sentence-embedding models (several GB each time). Run
+this server once per machine instead and start the apps with
+NEWS_MODEL_SERVER set to its Unix socket: utils.py then replaces its three
+model objects with the thin clients below, and every utils function keeps
+its signature and behaviour.
+
+Requests that arrive at about the same time are merged into one model
+call (dynamic micro-batching): each operation has a queue, and its worker
+takes the first waiting request plus whatever arrives within
+`--max-wait-ms`, up to `--max-batch` inputs. Requests with different
+options (e.g. summary lengths) are run as separate batches. With
+`--max-batch 1` every request runs on its own.
+
+Wire format: each message is a 4-byte big-endian length followed by that
+many bytes of JSON. Requests are {"op", "inputs", "options"} with op
+"sentiment", "summarize", "embed" or "stats"; embeddings come back as
+base64-encoded float32 with their shape.
+
+Usage:
+    python model_server.py [--socket /tmp/news-models.sock] [--max-batch 16] [--max-wait-ms 10]
+    NEWS_MODEL_SERVER=/tmp/news-models.sock streamlit run app.py
+"""
+
+import argparse
+import base64
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_SOCKET = os.environ.get("NEWS_MODEL_SOCKET", "/tmp/news-models.sock")
+MAX_BATCH = int(os.environ.get("NEWS_MODEL_BATCH", "16"))
+MAX_WAIT_MS = float(os.environ.get("NEWS_MODEL_BATCH_WAIT_MS", "10"))
+
+_HEADER = struct.Struct(">I")
+
+
+def send_message(sock: socket.socket, message: dict):
+    data = json.dumps(message).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_message(sock: socket.socket) -> dict:
+    (size,) = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+    return json.loads(_recv_exactly(sock, size))
+
+
+def encode_array(array: np.ndarray) -> dict:
+    array = np.ascontiguousarray(array, dtype=np.float32)
+    return {"shape": list(array.shape), "data": base64.b64encode(array.tobytes()).decode("ascii")}
+
+
+def decode_array(value: dict) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(value["data"]), dtype=np.float32).reshape(value["shape"])
+
+
+class MicroBatcher:
+    """
+    Merges concurrent `submit(inputs, options)` calls into `run(inputs,
+    options) -> outputs` calls of at most `max_batch` inputs, waiting up to
+    `max_wait` seconds after the first request for others to join.
+    """
+
+    def __init__(self, name: str, run, max_batch: int = MAX_BATCH, max_wait: float = MAX_WAIT_MS / 1000):
+        self.name = name
+        self.run = run
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self.stats = {"requests": 0, "inputs": 0, "batches": 0, "busy_s": 0.0}
+        self._queue = queue.Queue()
+        threading.Thread(target=self._loop, daemon=True, name=f"batch-{name}").start()
+
+    def submit(self, inputs: list, options: dict = None) -> list:
+        item = {"inputs": inputs, "options": options or {}, "done": threading.Event()}
+        self._queue.put(item)
+        item["done"].wait()
+        if "error" in item:
+            raise RuntimeError(item["error"])
+        return item["outputs"]
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        size = len(batch[0]["inputs"])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item["inputs"])
+        return batch
+
+    def _loop(self):
+        while True:
+            groups = {}
+            for item in self._collect():
+                groups.setdefault(json.dumps(item["options"], sort_keys=True), []).append(item)
+            for items in groups.values():
+                inputs = [x for item in items for x in item["inputs"]]
+                started = time.perf_counter()
+                try:
+                    outputs = self.run(inputs, items[0]["options"])
+                    start = 0
+                    for item in items:
+                        item["outputs"] = outputs[start:start + len(item["inputs"])]
+                        start += len(item["inputs"])
+                except Exception as e:
+                    if len(items) == 1:
+                        item = items[0]
+                        item["error"] = f"{type(e).__name__}: {e}"
+                    else:
+                        # Run the requests one by one so a bad input fails only its own request
+                        for item in items:
+                            try:
+                                item["outputs"] = self.run(item["inputs"], item["options"])
+                            except Exception as e:
+                                item["error"] = f"{type(e).__name__}: {e}"
+                self.stats["requests"] += len(items)
+                self.stats["inputs"] += len(inputs)
+                self.stats["batches"] += 1
+                self.stats["busy_s"] += time.perf_counter() - started
+                for item in items:
+                    item["done"].set()
+
+
+def load_batchers(max_batch: int = MAX_BATCH, max_wait: float = MAX_WAIT_MS / 1000) -> dict:
+    """Load the models the way utils.py does and put a MicroBatcher in front of each."""
+    # This process hosts the models, so utils must not act as a client here
+    os.environ.pop("NEWS_MODEL_SERVER", None)
+    import utils
+
+    utils.MODELS.preload()
+
+    def sentiment(inputs, options):
+        results = utils.sentiment_pipeline(inputs, batch_size=len(inputs), **options)
+        return [{"label": r["label"], "score": float(r["score"])} for r in results]
+
+    def summarize(inputs, options):
+        results = utils.summarizer(inputs, batch_size=len(inputs), **options)
+        # One dict per input (a list of one dict in some transformers versions)
+        return [dict(r[0] if isinstance(r, list) else r) for r in results]
+
+    def embed(inputs, options):
+        return list(utils.keyword_model.encode(inputs, batch_size=len(inputs), **options))
+
+    return {
+        "sentiment": MicroBatcher("sentiment", sentiment, max_batch, max_wait),
+        "summarize": MicroBatcher("summarize", summarize, max_batch, max_wait),
+        "embed": MicroBatcher("embed", embed, max_batch, max_wait),
+    }
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        batchers = self.server.batchers
+        while True:
+            try:
+                request = recv_message(self.request)
+            except (ConnectionError, OSError):
+                return
+            op = request.get("op")
+            try:
+                if op == "stats":
+                    response = {"stats": {name: b.stats for name, b in batchers.items()}}
+                elif op not in batchers:
+                    response = {"error": f"unknown op {op!r}"}
+                else:
+                    outputs = batchers[op].submit(request.get("inputs") or [], request.get("options"))
+                    response = ({"embeddings": encode_array(np.array(outputs))} if op == "embed"
+                                else {"outputs": outputs})
+            except Exception as e:
+                response = {"error": str(e)}
+            try:
+                send_message(self.request, response)
+            except OSError:
+                return
+
+
+class ModelServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, batchers: dict):
+        if os.path.exists(path):
+            # A socket left behind by a server that did not shut down cleanly
+            os.unlink(path)
+        self.batchers = batchers
+        super().__init__(path, _Handler)
+        os.chmod(path, 0o660)
+
+
+class ModelClient:
+    """Connection to a model server; one socket per thread, reconnected on failure."""
+
+    def __init__(self, path: str = DEFAULT_SOCKET, timeout: float = 600):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _socket(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def call(self, op: str, inputs: list = None, options: dict = None) -> dict:
+        message = {"op": op, "inputs": inputs or [], "options": options or {}}
+        for attempt in range(2):
+            try:
+                sock = self._socket()
+                send_message(sock, message)
+                response = recv_message(sock)
+                break
+            except OSError as e:
+                self._close()
+                if attempt:
+                    logging.warning(f"Model server at {self.path} unavailable: {e}")
+                    raise
+        if "error" in response:
+            raise RuntimeError(f"model server: {response['error']}")
+        return response
+
+    def stats(self) -> dict:
+        return self.call("stats")["stats"]
+
+
+class RemotePipeline:
+    """Stands in for a transformers pipeline (`pipeline(text_or_texts, **options)`)."""
+
+    def __init__(self, client: ModelClient, op: str):
+        self.client = client
+        self.op = op
+
+    def __call__(self, texts, **options):
+        inputs = [texts] if isinstance(texts, str) else list(texts)
+        return self.client.call(self.op, inputs, options)["outputs"]
+
+
+class RemoteEncoder:
+    """Stands in for a SentenceTransformer (`encode(sentences)`)."""
+
+    def __init__(self, client: ModelClient):
+        self.client = client
+
+    def encode(self, sentences, **options):
+        single = isinstance(sentences, str)
+        inputs = [sentences] if single else list(sentences)
+        if not inputs:
+            return np.zeros((0, 0), dtype=np.float32)
+        embeddings = decode_array(self.client.call("embed", inputs)["embeddings"])
+        return embeddings[0] if single else embeddings
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Serve the NLP models to app processes over a Unix socket.")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="Most inputs per model call")
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS,
+                        help="How long a request waits for others to batch with")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    batchers = load_batchers(args.max_batch, args.max_wait_ms / 1000)
+    logging.info(f"Models loaded in {time.perf_counter() - started:.1f} s")
+    with ModelServer(args.socket, batchers) as server:
+        logging.info(f"Serving on {args.socket} (batches of up to {args.max_batch}, "
+                     f"{args.max_wait_ms:g} ms wait)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
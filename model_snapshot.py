@@ -0,0 +1,243 @@
+# model_snapshot.py
+"""
+Local, verified snapshot of the NLP models for fast offline start-up.
+
+Without a snapshot, every start resolves the three models in models.py
+against the Hugging Face Hub and loads them from its cache, partly as
+pickled PyTorch weights. `prepare` pins each model to the exact commit of
+the requested revision and saves the model, with its tokenizer or
+configuration, to <dir>/<key> with safetensors weights. It then writes
+manifest.json with the repo, commit and the sha256 of every file.
+
+When the snapshot directory (NEWS_MODEL_SNAPSHOT, default
+model_snapshot) has a manifest, utils.py loads the models from it:
+- The Hub is switched to offline mode.
+- The safetensors weights are memory-mapped rather than unpickled.
+- Each model's files are checked against the manifest before it is first
+  loaded. A file that is missing or changed raises SnapshotError rather
+  than falling back to the network.
+
+A full sha256 check happens the first time a file is seen. After that,
+only its size and modification time are compared against the recorded
+stamp (.verified.json). `verify` re-hashes everything. A model whose repo
+no longer matches models.py (e.g. after setting NEWS_SUMMARY_MODEL) is
+loaded from the Hub as before.
+
+Usage:
+    python model_snapshot.py prepare [--dir model_snapshot] [--revision summary=<commit>]
+    python model_snapshot.py verify
+    python model_snapshot.py info
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+from models import MODEL_REPOS, SNAPSHOT_DIR
+
+MANIFEST = "manifest.json"
+STAMPS = ".verified.json"
+
+
+class SnapshotError(RuntimeError):
+    pass
+
+
+def load_manifest(directory: str = SNAPSHOT_DIR) -> dict:
+    """The snapshot's manifest, or None if there is no snapshot."""
+    try:
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _files(root: str) -> list[str]:
+    return sorted(os.path.relpath(os.path.join(dirpath, name), root)
+                  for dirpath, _, names in os.walk(root) for name in names)
+
+
+def _save(key: str, repo: str, commit: str, path: str):
+    if key == "keywords":
+        from sentence_transformers import SentenceTransformer
+
+        SentenceTransformer(repo, revision=commit).save(path, safe_serialization=True)
+        return
+    from transformers import pipeline
+
+    task = "sentiment-analysis" if key == "sentiment" else "summarization"
+    pipeline(task, model=repo, revision=commit).save_pretrained(path, safe_serialization=True)
+
+
+def prepare(directory: str = SNAPSHOT_DIR, revisions: dict = None) -> dict:
+    """
+    Save every model in MODEL_REPOS at its pinned revision (default:
+    the current commit of main) under `directory` and write the manifest.
+    """
+    from huggingface_hub import HfApi
+
+    revisions = revisions or {}
+    api = HfApi()
+    os.makedirs(directory, exist_ok=True)
+    manifest = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "models": {}}
+    for key, repo in MODEL_REPOS.items():
+        if key == "keywords" and "/" not in repo:
+            # sentence-transformers resolves short names in its own namespace
+            repo = f"sentence-transformers/{repo}"
+        commit = api.model_info(repo, revision=revisions.get(key, "main")).sha
+        path = os.path.join(directory, key)
+        staging = path + ".tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        started = time.perf_counter()
+        _save(key, repo, commit, staging)
+        files = {name: _sha256(os.path.join(staging, name)) for name in _files(staging)}
+        if not any(name.endswith(".safetensors") for name in files):
+            raise SnapshotError(f"{repo} was not saved with safetensors weights")
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(staging, path)
+        manifest["models"][key] = {"repo": MODEL_REPOS[key], "hub_repo": repo, "revision": commit,
+                                   "path": key, "files": files}
+        logging.info(f"{key}: {repo}@{commit[:10]} saved in {time.perf_counter() - started:.1f} s")
+    with open(os.path.join(directory, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    stamps = os.path.join(directory, STAMPS)
+    if os.path.exists(stamps):
+        os.remove(stamps)
+    return manifest
+
+
+_stamp_lock = threading.Lock()
+
+
+def verify(directory: str = SNAPSHOT_DIR, keys: list[str] = None, full: bool = False) -> dict:
+    """
+    Check the snapshot files of `keys` (default: all) against the manifest.
+    Files whose size and mtime match their stamp are only hashed with
+    `full`. Raises SnapshotError on the first mismatch; returns the manifest.
+    """
+    manifest = load_manifest(directory)
+    if manifest is None:
+        raise SnapshotError(f"no model snapshot in {directory}; run `python model_snapshot.py prepare`")
+    stamps_path = os.path.join(directory, STAMPS)
+    with _stamp_lock:
+        try:
+            with open(stamps_path, encoding="utf-8") as f:
+                stamps = json.load(f)
+        except (FileNotFoundError, ValueError):
+            stamps = {}
+        changed = False
+        for key in keys or list(manifest["models"]):
+            entry = manifest["models"][key]
+            for name, digest in entry["files"].items():
+                relpath = os.path.join(entry["path"], name)
+                path = os.path.join(directory, relpath)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    raise SnapshotError(f"model snapshot file missing: {path}") from None
+                stamp = [stat.st_size, stat.st_mtime_ns, digest]
+                if not full and stamps.get(relpath) == stamp:
+                    continue
+                if _sha256(path) != digest:
+                    raise SnapshotError(f"model snapshot file changed: {path}; "
+                                        f"run `python model_snapshot.py prepare` again")
+                stamps[relpath] = stamp
+                changed = True
+        if changed:
+            try:
+                with open(stamps_path, "w", encoding="utf-8") as f:
+                    json.dump(stamps, f)
+            except OSError:
+                # Read-only snapshot: verify in full again next time
+                pass
+    return manifest
+
+
+def snapshot_path(key: str, directory: str = SNAPSHOT_DIR) -> str:
+    """
+    The verified local directory of model `key`, or None if the snapshot
+    does not hold the model that models.py currently names.
+    """
+    manifest = load_manifest(directory)
+    entry = (manifest or {}).get("models", {}).get(key)
+    if entry is None or entry["repo"] != MODEL_REPOS[key]:
+        return None
+    verify(directory, [key])
+    return os.path.join(directory, entry["path"])
+
+
+def activate(directory: str = SNAPSHOT_DIR) -> bool:
+    """
+    Switch the Hugging Face libraries to offline mode if the snapshot holds
+    every model; call before importing them. Returns True if it did.
+    """
+    manifest = load_manifest(directory)
+    if manifest is None:
+        return False
+    stale = [key for key, repo in MODEL_REPOS.items()
+             if manifest["models"].get(key, {}).get("repo") != repo]
+    if stale:
+        logging.warning(f"Model snapshot in {directory} lacks {', '.join(stale)}; "
+                        f"loading those from the Hugging Face Hub")
+        return False
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+    return True
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Prepare and check the local model snapshot.")
+    parser.add_argument("--dir", default=SNAPSHOT_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    prepare_cmd = commands.add_parser("prepare", help="Download the pinned models and save them as safetensors")
+    prepare_cmd.add_argument("--revision", action="append", default=[], metavar="KEY=REV",
+                             help=f"Revision for one of {', '.join(MODEL_REPOS)} (default: main)")
+    commands.add_parser("verify", help="Re-hash every snapshot file against the manifest")
+    commands.add_parser("info", help="Show the snapshot's models and revisions")
+    args = parser.parse_args()
+
+    if args.command == "prepare":
+        revisions = dict(item.split("=", 1) for item in args.revision)
+        unknown = set(revisions) - set(MODEL_REPOS)
+        if unknown:
+            parser.error(f"unknown model key(s): {', '.join(sorted(unknown))}")
+        prepare(args.dir, revisions)
+    elif args.command == "verify":
+        try:
+            manifest = verify(args.dir, full=True)
+        except SnapshotError as e:
+            parser.exit(1, f"{e}\n")
+        count = sum(len(m["files"]) for m in manifest["models"].values())
+        print(f"{count} files match the manifest")
+    else:
+        manifest = load_manifest(args.dir)
+        if manifest is None:
+            print(f"No model snapshot in {args.dir}")
+            return
+        print(f"Snapshot created {manifest['created']}")
+        for key, entry in manifest["models"].items():
+            paths = [os.path.join(args.dir, entry["path"], name) for name in entry["files"]]
+            size = sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+            notes = [] if entry["repo"] == MODEL_REPOS.get(key) else ["not the configured model"]
+            if not all(os.path.exists(path) for path in paths):
+                notes.append("files missing")
+            print(f"{key:<10} {entry['hub_repo']}@{entry['revision'][:10]}  {size / 1e6:,.0f} MB"
+                  f"{'  (' + ', '.join(notes) + ')' if notes else ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# models.py
+"""
+Identifiers of the models used by the NLP layer (utils.py).
+
+Kept separate from utils.py so that code which only needs to know which
+models produced a stored analysis (the article store, monitoring) does not
+load the models themselves.
+
+Each model can be swapped through an environment variable (e.g. to compare
+a distilled summarizer with benchmarks/bench_nlp.py). The sentiment model
+must use the same three labels (LABEL_0/1/2 = negative/neutral/positive).
+
+MODEL_VERSIONS pins a model to the commit recorded in the model snapshot's
+manifest when the snapshot holds it (`repo@commit`). A model loaded from
+the Hub follows its main branch, so only its repo id is known.
+"""
+
+import json
+import os
+
+SENTIMENT_MODEL = os.environ.get("NEWS_SENTIMENT_MODEL", "cardiffnlp/twitter-roberta-base-sentiment")
+SUMMARY_MODEL = os.environ.get("NEWS_SUMMARY_MODEL", "facebook/bart-large-cnn")
+KEYWORD_MODEL = os.environ.get("NEWS_KEYWORD_MODEL", "distilbert-base-nli-mean-tokens")
+
+# Local copy of the models made by `python model_snapshot.py prepare`; used
+# instead of the Hub when present
+SNAPSHOT_DIR = os.environ.get("NEWS_MODEL_SNAPSHOT", "model_snapshot")
+
+# Hub repo of each model
+MODEL_REPOS = {
+    "sentiment": SENTIMENT_MODEL,
+    "summary": SUMMARY_MODEL,
+    "keywords": KEYWORD_MODEL,
+}
+
+
+def _snapshot_revisions(directory: str = SNAPSHOT_DIR) -> dict:
+    """{key: commit} of the snapshot's models that match MODEL_REPOS."""
+    # Read directly: model_snapshot.py imports this module
+    try:
+        with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return {key: entry["revision"] for key, entry in manifest.get("models", {}).items()
+            if MODEL_REPOS.get(key) == entry.get("repo")}
+
+
+_revisions = _snapshot_revisions()
+
+# Recorded with every stored analysis; a change here invalidates old results
+MODEL_VERSIONS = {key: f"{repo}@{_revisions[key]}" if key in _revisions else repo
+                  for key, repo in MODEL_REPOS.items()}
@@ -0,0 +1,259 @@
+# monitor.py
+"""
+Incremental topic monitoring.
+
+A subscription is a saved channel + topic pair. Each monitoring run crawls
+the channel's search results and skips links already seen for that
+subscription, so only new articles are fetched and analyzed. Where the
+search is sorted newest first (CNN), pagination stops at the first page
+that reaches a seen link, so the cost of a run follows the amount of new
+content rather than the total number of results. The other channels'
+searches are ordered by relevance and are paged up to the page limit.
+After a run capped by `max_new`, the next one pages past seen links on
+every channel, so the new links the cap left behind are not lost. Fetched
+text and analyses go to the article store (store.py), near-duplicates
+reuse stored analyses (neardup.py), and each run's new rows are appended
+to a history file.
+
+Usage:
+    python monitor.py add "climate change" --channels BBC CNN
+    python monitor.py list
+    python monitor.py run --max-new 10
+"""
+
+import argparse
+import json
+import logging
+import os
+from datetime import datetime
+
+from checkpoint import crawl_slug
+from extractors import CHANNELS
+from inference_pool import analyze_texts
+from metrics import serve as serve_metrics
+from models import MODEL_VERSIONS
+from neardup import AnalysisCache, LSHIndex, minhash
+from politeness import FetchError
+from record_sink import RecordSink, read_records
+from scrapers import scrape_article, scrape_links
+from semantic import EmbeddingIndex
+from store import ArticleStore
+from urlcanon import SeenIndex, canonicalize
+
+SUBSCRIPTIONS_FILE = "subscriptions.json"
+STATE_DIR = "monitor"
+HISTORY_FILE = "history.jsonl"
+
+
+def load_subscriptions(path: str = SUBSCRIPTIONS_FILE) -> list[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_subscriptions(subscriptions: list[dict], path: str = SUBSCRIPTIONS_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(subscriptions, f, indent=2)
+    os.replace(tmp, path)
+
+
+def add_subscription(channel: str, topic: str, path: str = SUBSCRIPTIONS_FILE) -> bool:
+    """Returns False if the subscription already exists."""
+    if channel not in CHANNELS:
+        raise ValueError(f"Unknown channel: {channel}")
+    topic = topic.strip()
+    subscriptions = load_subscriptions(path)
+    if any(s["channel"] == channel and s["topic"] == topic for s in subscriptions):
+        return False
+    subscriptions.append({"channel": channel, "topic": topic})
+    save_subscriptions(subscriptions, path)
+    return True
+
+
+def remove_subscription(channel: str, topic: str, path: str = SUBSCRIPTIONS_FILE) -> bool:
+    subscriptions = load_subscriptions(path)
+    kept = [s for s in subscriptions if not (s["channel"] == channel and s["topic"] == topic)]
+    if len(kept) == len(subscriptions):
+        return False
+    save_subscriptions(kept, path)
+    return True
+
+
+def _fill_row(row: dict, analysis: dict):
+    row.update({
+        "Sentiment": analysis["sentiment"],
+        "Score": analysis["score"],
+        "Summary": analysis["summary"],
+    })
+
+
+def run_subscription(subscription: dict, cache: AnalysisCache, state_dir: str = STATE_DIR,
+                     max_new: int = 10, summarize: bool = True,
+                     history: RecordSink = None) -> list[dict]:
+    """
+    Fetch and analyze the articles published since the subscription's last
+    run (at most `max_new`), saving them to the cache's article store.
+    Returns one row per new link; `Status` is "ok", "empty", "analysis_failed"
+    or the fetch failure class. Links that failed with a retryable error or
+    could not be analyzed are not marked seen, so the next run tries them
+    again. Articles that need the models are analyzed together once all are
+    fetched (on the inference pool when NEWS_INFERENCE_WORKERS is set).
+    """
+    channel, topic = subscription["channel"], subscription["topic"]
+    store = cache.store
+    run_at = datetime.now().isoformat(timespec="seconds")
+    seen_file = os.path.join(state_dir, f"{crawl_slug(channel, topic)}.seen")
+    # Exists while the last run hit max_new and newer-than-seen links may remain
+    capped_file = os.path.join(state_dir, f"{crawl_slug(channel, topic)}.capped")
+    catching_up = os.path.exists(capped_file)
+    rows = []
+    # Articles waiting for analysis, and their near-duplicates from this run
+    pending = {}
+    pending_index = LSHIndex(cache.index.threshold)
+    copies = []
+    with SeenIndex(seen_file) as seen:
+        links = scrape_links(channel, topic, seen_index=seen, stop_at_seen=not catching_up,
+                             max_articles=max_new, store=store)
+        if len(links) >= max_new:
+            open(capped_file, "w").close()
+        elif catching_up:
+            os.remove(capped_file)
+        for url in links:
+            row = {
+                "Run_At": run_at,
+                "Channel": channel,
+                "Topic": topic,
+                "URL": url,
+                "Status": "ok",
+                "Sentiment": None,
+                "Score": None,
+                "Summary": None,
+                "Near_Duplicate_Of": "",
+            }
+            try:
+                text = scrape_article(url, channel, store=store)
+            except FetchError as e:
+                row["Status"] = e.kind
+                if not e.retryable:
+                    seen.add(url)
+                rows.append(row)
+                continue
+            if not text:
+                row["Status"] = "empty"
+            else:
+                signature = minhash(text)
+                match = cache.find_similar(signature)
+                if match and match[0]["url"] == canonicalize(url):
+                    analysis = {k: match[0][k] for k in ("sentiment", "score", "summary")}
+                elif match:
+                    analysis = {k: match[0][k] for k in ("sentiment", "score", "summary")}
+                    row["Near_Duplicate_Of"] = match[0]["url"]
+                    cache.add(url, signature, analysis, channel=channel)
+                else:
+                    # Analyzed with the others below; marked seen once analyzed
+                    earlier = pending_index.query(signature)
+                    if earlier:
+                        row["Near_Duplicate_Of"] = earlier[0]
+                        copies.append((row, signature))
+                    else:
+                        pending[url] = (row, signature, text)
+                        pending_index.add(url, signature)
+                    rows.append(row)
+                    continue
+                _fill_row(row, analysis)
+            seen.add(url)
+            rows.append(row)
+        texts = [text for _, _, text in pending.values()]
+        analyses = dict(zip(pending, analyze_texts(texts, summarize=summarize, return_exceptions=True)))
+        for url, (row, signature, _) in pending.items():
+            if isinstance(analyses[url], Exception):
+                logging.error(f"Could not analyze {url}: {analyses[url]}")
+                row["Status"] = "analysis_failed"
+                continue
+            cache.add(url, signature, analyses[url], channel=channel)
+            _fill_row(row, analyses[url])
+            seen.add(url)
+        for row, signature in copies:
+            original = analyses[row["Near_Duplicate_Of"]]
+            if isinstance(original, Exception):
+                row["Status"] = "analysis_failed"
+                continue
+            analysis = {k: original[k] for k in ("sentiment", "score", "summary")}
+            cache.add(row["URL"], signature, analysis, channel=channel)
+            _fill_row(row, analysis)
+            seen.add(row["URL"])
+    if history is not None:
+        for row in rows:
+            history.write(row)
+        history.flush()
+    return rows
+
+
+def run_all(path: str = SUBSCRIPTIONS_FILE, state_dir: str = STATE_DIR, max_new: int = 10,
+            summarize: bool = True, cache: AnalysisCache = None,
+            store: ArticleStore = None) -> list[dict]:
+    """Run every saved subscription and return the new rows (the delta)."""
+    os.makedirs(state_dir, exist_ok=True)
+    own_store = store is None and cache is None
+    if cache is None:
+        store = store or ArticleStore()
+        cache = AnalysisCache(store, models=MODEL_VERSIONS, embeddings=EmbeddingIndex())
+    delta = []
+    with RecordSink(os.path.join(state_dir, HISTORY_FILE)) as history:
+        for subscription in load_subscriptions(path):
+            try:
+                rows = run_subscription(subscription, cache, state_dir, max_new, summarize, history)
+            except Exception as e:
+                logging.error(f"{subscription['channel']} / {subscription['topic']}: {e}")
+                continue
+            logging.info(f"{subscription['channel']} / {subscription['topic']}: {len(rows)} new")
+            delta.extend(rows)
+    if own_store:
+        cache.store.close()
+        cache.embeddings.close()
+    return delta
+
+
+def load_history(state_dir: str = STATE_DIR) -> list[dict]:
+    return list(read_records(os.path.join(state_dir, HISTORY_FILE)))
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Monitor saved topic subscriptions.")
+    parser.add_argument("--subscriptions", default=SUBSCRIPTIONS_FILE)
+    parser.add_argument("--state-dir", default=STATE_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Subscribe to a topic on one or more channels")
+    add.add_argument("topic")
+    add.add_argument("--channels", nargs="+", default=CHANNELS, choices=CHANNELS)
+    remove = commands.add_parser("remove", help="Remove subscriptions")
+    remove.add_argument("topic")
+    remove.add_argument("--channels", nargs="+", default=CHANNELS, choices=CHANNELS)
+    commands.add_parser("list", help="List subscriptions")
+    run = commands.add_parser("run", help="Fetch and analyze new articles for every subscription")
+    run.add_argument("--max-new", type=int, default=10, help="Maximum new articles per subscription")
+    run.add_argument("--no-summary", action="store_true", help="Skip summarization")
+    args = parser.parse_args()
+
+    if args.command == "add":
+        for channel in args.channels:
+            add_subscription(channel, args.topic, args.subscriptions)
+    elif args.command == "remove":
+        for channel in args.channels:
+            remove_subscription(channel, args.topic, args.subscriptions)
+    elif args.command == "list":
+        for s in load_subscriptions(args.subscriptions):
+            print(f"{s['channel']}: {s['topic']}")
+    else:
+        serve_metrics()
+        delta = run_all(args.subscriptions, args.state_dir, args.max_new, not args.no_summary)
+        for row in delta:
+            print(f"[{row['Channel']}] {row['Status']:<12} {row['Sentiment'] or '-':<8} {row['URL']}")
+        print(f"{len(delta)} new articles")
+
+
+if __name__ == "__main__":
+    main()
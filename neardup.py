@@ -0,0 +1,157 @@
+# neardup.py
+"""
+Near-duplicate detection for fetched articles.
+
+Wire stories (AP, Reuters, ...) appear almost verbatim on several channels.
+Each article's text gets a MinHash signature over word 5-gram shingles; an
+LSH index (banded signatures) finds earlier articles whose estimated
+Jaccard similarity is above a threshold without comparing against every
+stored article. `AnalysisCache` indexes the signatures of the analyzed
+articles in the article store (store.py), so a near-duplicate can reuse the
+sentiment, summary and keywords of the copy that was already analyzed.
+Analyses that carry a whole-text `embedding` also feed the semantic index
+(semantic.py) when the cache has one.
+"""
+
+import hashlib
+import re
+import threading
+
+import numpy as np
+
+from metrics import ANALYSIS_CACHE
+from semantic import EmbeddingIndex
+from store import ArticleStore
+
+NUM_PERM = 128
+BANDS = 16          # 16 bands x 8 rows: candidates start at roughly 0.7 similarity
+SHINGLE_WORDS = 5
+THRESHOLD = 0.8
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# Fixed seed: stored signatures must stay comparable across runs
+_rng = np.random.RandomState(20240611)
+_A = _rng.randint(1, (1 << 61) - 1, NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, (1 << 61) - 1, NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text: str, k: int = SHINGLE_WORDS) -> set:
+    words = re.findall(r"\w+", (text or "").lower())
+    if len(words) <= k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def minhash(text: str) -> np.ndarray:
+    """MinHash signature (NUM_PERM uint32 values) of the text's shingles."""
+    items = shingles(text)
+    if not items:
+        return np.full(NUM_PERM, _MAX_HASH, dtype=np.uint32)
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+         for s in items),
+        dtype=np.uint64, count=len(items),
+    )
+    # Universal hashing (a*x + b) mod p, one permutation per column
+    permuted = ((hashes[:, None] * _A + _B) % _MERSENNE) & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+class LSHIndex:
+    """Banded LSH over MinHash signatures; `query` verifies candidates against `threshold`."""
+
+    def __init__(self, threshold: float = THRESHOLD, bands: int = BANDS):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self._buckets = [{} for _ in range(bands)]
+        self._signatures = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, signature: np.ndarray):
+        for i in range(self.bands):
+            yield i, signature[i * self.rows:(i + 1) * self.rows].tobytes()
+
+    def add(self, key: str, signature: np.ndarray):
+        if key in self._signatures:
+            return
+        self._signatures[key] = signature
+        for i, band in self._band_keys(signature):
+            self._buckets[i].setdefault(band, []).append(key)
+
+    def query(self, signature: np.ndarray):
+        """Return (key, similarity) of the most similar entry above the threshold, or None."""
+        candidates = set()
+        for i, band in self._band_keys(signature):
+            candidates.update(self._buckets[i].get(band, ()))
+        best = None
+        for key in candidates:
+            sim = similarity(signature, self._signatures[key])
+            if sim >= self.threshold and (best is None or sim > best[1]):
+                best = (key, sim)
+        return best
+
+
+def encode_signature(signature: np.ndarray) -> bytes:
+    return signature.astype("<u4").tobytes()
+
+
+def decode_signature(value: bytes) -> np.ndarray:
+    return np.frombuffer(value, dtype="<u4").astype(np.uint32)
+
+
+class AnalysisCache:
+    """
+    Analyzed articles in `store` indexed by MinHash signature. Only analyses
+    produced by `models` (see models.MODEL_VERSIONS) are reused, so changing
+    a model does not serve stale results. Records are the store's rows.
+    """
+
+    def __init__(self, store: ArticleStore, models: dict = None, threshold: float = THRESHOLD,
+                 embeddings: EmbeddingIndex = None):
+        self.store = store
+        self.models = models
+        self.embeddings = embeddings
+        self.index = LSHIndex(threshold)
+        self._records = {}
+        # The app's background refreshes share the cache with the UI thread
+        self._lock = threading.Lock()
+        for record in store.signatures(models):
+            self._remember(record, decode_signature(record["signature"]))
+
+    def _remember(self, record: dict, signature: np.ndarray):
+        with self._lock:
+            self._records[record["url"]] = record
+            self.index.add(record["url"], signature)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def find_similar(self, signature: np.ndarray):
+        """Return (record, similarity) for a stored near-duplicate, or None."""
+        with self._lock:
+            match = self.index.query(signature)
+            ANALYSIS_CACHE.inc(result="miss" if match is None else "hit")
+            if match is None:
+                return None
+            key, sim = match
+            return self._records[key], sim
+
+    def add(self, url: str, signature: np.ndarray, analysis: dict, **fields):
+        """Save `analysis` for `url` in the store and index it."""
+        analysis = dict(analysis)
+        embedding = analysis.pop("embedding", None)
+        self.store.save_analysis(url, analysis, self.models,
+                                 signature=encode_signature(signature), **fields)
+        record = self.store.get(url)
+        self._remember(record, signature)
+        if self.embeddings is not None and embedding is not None:
+            self.embeddings.add(url, record["channel"], embedding)
@@ -0,0 +1,285 @@
+# politeness.py
+"""
+Per-host politeness scheduler for article downloads.
+
+Each host gets a token bucket (requests/sec with a small burst), a fixed
+number of concurrency slots and a "blocked until" time. A 429 or 503 with
+`Retry-After` pauses the whole host for that long and halves its rate;
+successful requests slowly raise the rate back towards the configured
+maximum. Retryable failures are retried with jittered exponential backoff,
+and every failure is classified so callers can tell a block from an empty
+article.
+"""
+
+import email.utils
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+    " AppleWebKit/537.36 (KHTML, like Gecko)"
+    " Chrome/91.0.4472.124 Safari/537.36"
+)
+
+# Failure classes
+RATE_LIMITED = "rate_limited"
+BLOCKED = "blocked"
+NOT_FOUND = "not_found"
+CLIENT_ERROR = "client_error"
+SERVER_ERROR = "server_error"
+TIMEOUT = "timeout"
+NETWORK = "network"
+
+RETRYABLE = {RATE_LIMITED, SERVER_ERROR, TIMEOUT, NETWORK}
+
+# Phrases that show up on bot-check / interstitial pages served with a 200
+SOFT_BLOCK_MARKERS = (
+    "captcha",
+    "are you a robot",
+    "access denied",
+    "unusual traffic",
+    "request unsuccessful",
+)
+
+_local = threading.local()
+
+# Optional requests transport adapter factory (see replay.py)
+_transport = None
+
+
+class FetchError(Exception):
+    """A download that failed for a known reason (`kind` is one of the failure classes)."""
+
+    def __init__(self, kind: str, url: str, status: int = None, message: str = ""):
+        self.kind = kind
+        self.url = url
+        self.status = status
+        detail = f" (HTTP {status})" if status else ""
+        super().__init__(f"{kind}{detail}: {message or url}")
+
+    @property
+    def retryable(self) -> bool:
+        return self.kind in RETRYABLE
+
+
+def set_transport(factory):
+    """
+    Mount `factory()` for http:// and https:// on every thread session
+    from now on (existing sessions are replaced); None restores the default.
+    """
+    global _transport
+    _transport = factory
+
+
+def thread_session() -> requests.Session:
+    # requests.Session is not thread-safe, so each thread keeps its own
+    session = getattr(_local, "session", None)
+    if session is None or getattr(_local, "transport", None) is not _transport:
+        session = requests.Session()
+        session.headers["User-Agent"] = USER_AGENT
+        if _transport is not None:
+            adapter = _transport()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        _local.session = session
+        _local.transport = _transport
+    return session
+
+
+def classify_status(resp) -> str:
+    """Failure class from the status line alone, or None for a 2xx/3xx."""
+    status = resp.status_code
+    if status == 429:
+        return RATE_LIMITED
+    if status == 503 and resp.headers.get("Retry-After"):
+        return RATE_LIMITED
+    if status in (401, 403):
+        return BLOCKED
+    if status in (404, 410):
+        return NOT_FOUND
+    if status >= 500:
+        return SERVER_ERROR
+    if status >= 400:
+        return CLIENT_ERROR
+    return None
+
+
+def is_soft_block(text: str) -> bool:
+    # Real articles are large; a short page full of bot-check wording is a soft block
+    if len(text) >= 20000:
+        return False
+    head = text[:5000].lower()
+    return any(marker in head for marker in SOFT_BLOCK_MARKERS)
+
+
+def classify_response(resp) -> str:
+    """Return the failure class of a response, or None if it looks like a real page."""
+    kind = classify_status(resp)
+    if kind is None and is_soft_block(resp.text):
+        kind = BLOCKED
+    return kind
+
+
+def classify_exception(exc: Exception) -> str:
+    if isinstance(exc, requests.Timeout):
+        return TIMEOUT
+    return NETWORK
+
+
+def parse_retry_after(value: str) -> float:
+    """`Retry-After` is either delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+
+class _HostState:
+    def __init__(self, rate: float, burst: int, concurrency: int):
+        self.max_rate = rate
+        self.bucket = TokenBucket(rate, burst)
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+        self.counts = {}
+
+
+class PolitenessScheduler:
+    """
+    `host_limits` overrides the defaults per host, e.g.
+    {"www.bbc.com": {"rate": 2.0, "burst": 4, "concurrency": 4}}.
+    """
+
+    def __init__(self, rate: float = 1.0, burst: int = 2, concurrency: int = 2,
+                 max_retries: int = 4, base_backoff: float = 1.0, max_backoff: float = 60.0,
+                 min_rate: float = 0.05, host_limits: dict = None):
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.min_rate = min_rate
+        self.host_limits = host_limits or {}
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _state(self, host: str) -> _HostState:
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                limits = self.host_limits.get(host, {})
+                state = self._hosts[host] = _HostState(
+                    limits.get("rate", self.rate),
+                    limits.get("burst", self.burst),
+                    limits.get("concurrency", self.concurrency),
+                )
+            return state
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": spreads retries out so workers don't retry in lockstep
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+
+    def _record(self, state: _HostState, outcome: str):
+        with state.lock:
+            state.counts[outcome] = state.counts.get(outcome, 0) + 1
+            bucket = state.bucket
+            if outcome == "ok":
+                # Additive increase back towards the configured rate
+                bucket.rate = min(state.max_rate, bucket.rate + state.max_rate * 0.05)
+            elif outcome in (RATE_LIMITED, BLOCKED):
+                # Multiplicative decrease when the host pushes back
+                bucket.rate = max(self.min_rate, bucket.rate / 2)
+
+    def fetch(self, url: str, session: requests.Session = None, timeout: float = 15,
+              reader=None):
+        """
+        Download `url` within the host's limits, retrying retryable failures.
+        Returns the response on success and raises FetchError otherwise.
+
+        With `reader`, the body is streamed instead: `reader(resp)` is called
+        while the host slot is held, may stop reading early, and must return
+        the text it read; fetch then returns that text.
+        """
+        session = session or thread_session()
+        host = urlparse(url).hostname or ""
+        state = self._state(host)
+        error = None
+        for attempt in range(self.max_retries + 1):
+            pause = state.blocked_until - time.monotonic()
+            if pause > 0:
+                time.sleep(pause)
+            with state.slots:
+                state.bucket.acquire()
+                try:
+                    if reader is None:
+                        resp = session.get(url, timeout=timeout)
+                        kind = classify_response(resp)
+                    else:
+                        with session.get(url, timeout=timeout, stream=True) as resp:
+                            kind = classify_status(resp)
+                            if kind is None:
+                                text = reader(resp)
+                                if is_soft_block(text):
+                                    kind = BLOCKED
+                except requests.RequestException as e:
+                    resp = None
+                    kind = classify_exception(e)
+                    error = FetchError(kind, url, message=str(e))
+            if kind is None:
+                self._record(state, "ok")
+                return resp if reader is None else text
+            self._record(state, kind)
+            if resp is not None:
+                error = FetchError(kind, url, status=resp.status_code)
+            if kind not in RETRYABLE or attempt == self.max_retries:
+                break
+            delay = self._backoff(attempt)
+            if kind == RATE_LIMITED and resp is not None:
+                retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                if retry_after is not None:
+                    delay = max(delay, min(retry_after, self.max_backoff * 5))
+                with state.lock:
+                    state.blocked_until = max(state.blocked_until, time.monotonic() + delay)
+            time.sleep(delay)
+        raise error
+
+    def stats(self) -> dict:
+        """Outcome counts and current request rate per host."""
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {
+            host: {"rate": round(state.bucket.rate, 3), **state.counts}
+            for host, state in hosts.items()
+        }
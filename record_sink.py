@@ -0,0 +1,233 @@
+# record_sink.py
+"""
+Append-only record sink for the link crawlers.
+
+Records are buffered in small batches and appended to disk as either
+JSON lines (one file) or Parquet row groups (one part file per batch in a
+directory). Nothing already written is ever rewritten, so memory stays
+bounded by the batch size and I/O stays linear in the number of records.
+The final CSV is produced on demand with `export_csv`.
+"""
+
+import csv
+import json
+import os
+import sys
+import time
+
+# Column layout shared by every scraping/*_links script
+LINK_COLUMNS = [
+    "Source",
+    "Link",
+    "Headline",
+    "Description",
+    "Date",
+    "Timestamp",
+    "Topic",
+    "Author",
+    "Article_Content",
+]
+
+
+def require_pyarrow(what: str):
+    """Raise ImportError up front if pyarrow, which Parquet files need, is not installed."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError(f"{what} needs pyarrow, which is optional: pip install pyarrow") from None
+
+
+def _detect_format(path: str) -> str:
+    if path.endswith(".jsonl") or path.endswith(".json"):
+        return "jsonl"
+    if path.endswith(".parquet") or os.path.isdir(path):
+        return "parquet"
+    return "jsonl"
+
+
+class RecordSink:
+    """
+    Buffers records and appends them to `path` whenever `flush_rows`
+    records are pending or `flush_seconds` have passed since the last flush.
+
+    JSONL batches are written with a single append + fsync; a crash can at
+    worst leave a torn last line, which is trimmed the next time the sink
+    is opened and skipped by `read_records`. Parquet batches are written to
+    a temporary file and renamed into place, so a part is either complete
+    or absent. With `append=False` records left over from a previous run
+    are discarded; `resume_offset` (a previous `offset`) rolls the sink back
+    to that point so records written after a crawl checkpoint are dropped.
+    """
+
+    def __init__(self, path: str, fmt: str = None, flush_rows: int = 50,
+                 flush_seconds: float = 30.0, append: bool = True,
+                 resume_offset: int = None):
+        self.path = path
+        self.fmt = fmt or _detect_format(path)
+        if self.fmt not in ("jsonl", "parquet"):
+            raise ValueError(f"Unsupported sink format: {self.fmt}")
+        if self.fmt == "parquet":
+            # Fail now rather than at the first flush, after a crawl has run
+            require_pyarrow(f"Parquet sink {path}")
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.rows_written = 0
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._parts = 0
+
+        if self.fmt == "jsonl":
+            parent = os.path.dirname(os.path.abspath(path))
+            os.makedirs(parent, exist_ok=True)
+            self._file = open(path, "ab" if append else "wb")
+            if resume_offset is not None:
+                self._file.truncate(resume_offset)
+                self._file.seek(resume_offset)
+            self._trim_torn_tail()
+        else:
+            os.makedirs(path, exist_ok=True)
+            keep = 0 if not append else resume_offset
+            if keep is not None:
+                for part in _parquet_parts(path)[keep:]:
+                    os.remove(part)
+            self._file = None
+            self._parts = len(_parquet_parts(path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def offset(self) -> int:
+        """
+        Flush pending records and return the durable position of the sink:
+        bytes for JSONL, part count for Parquet.
+        """
+        self.flush()
+        if self.fmt == "jsonl":
+            return self._file.tell()
+        return self._parts
+
+    def write(self, record: dict):
+        self._buffer.append(record)
+        if (len(self._buffer) >= self.flush_rows
+                or time.monotonic() - self._last_flush >= self.flush_seconds):
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        if self.fmt == "jsonl":
+            payload = "".join(
+                json.dumps(r, default=str, ensure_ascii=False) + "\n" for r in self._buffer
+            )
+            self._file.write(payload.encode("utf-8"))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        else:
+            self._write_parquet_part(self._buffer)
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    def close(self):
+        self.flush()
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+
+    def export_csv(self, csv_path: str, columns: list[str] = None) -> int:
+        """Flush pending records and stream everything on disk into `csv_path`."""
+        self.flush()
+        return export_csv(self.path, csv_path, columns=columns)
+
+    def _trim_torn_tail(self):
+        size = self._file.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(max(0, size - 65536))
+            tail = f.read()
+        if tail.endswith(b"\n"):
+            return
+        cut = tail.rfind(b"\n")
+        keep = size - len(tail) + cut + 1 if cut >= 0 else max(0, size - len(tail))
+        self._file.truncate(keep)
+        self._file.seek(keep)
+
+    def _write_parquet_part(self, records: list[dict]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        rows = [{k: (v if v is None or isinstance(v, (int, float, str, bool)) else str(v))
+                 for k, v in r.items()} for r in records]
+        table = pa.Table.from_pylist(rows)
+        final = os.path.join(self.path, f"part-{self._parts:06d}.parquet")
+        tmp = final + ".tmp"
+        pq.write_table(table, tmp)
+        with open(tmp, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, final)
+        self._parts += 1
+
+
+def _parquet_parts(path: str) -> list[str]:
+    return sorted(
+        os.path.join(path, name)
+        for name in os.listdir(path)
+        if name.startswith("part-") and name.endswith(".parquet")
+    )
+
+
+def read_records(path: str, fmt: str = None):
+    """Yield records from a sink, skipping a torn final JSONL line if present."""
+    fmt = fmt or _detect_format(path)
+    if fmt == "jsonl":
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    else:
+        import pyarrow.parquet as pq
+
+        if not os.path.isdir(path):
+            return
+        for part in _parquet_parts(path):
+            for batch in pq.ParquetFile(part).iter_batches():
+                yield from batch.to_pylist()
+
+
+def export_csv(path: str, csv_path: str, columns: list[str] = None, fmt: str = None) -> int:
+    """
+    Stream all records of a sink into a CSV file. Columns default to the
+    keys of the first record; missing values are written as '-' to match the
+    padding the crawlers used before.
+    """
+    count = 0
+    writer = None
+    with open(csv_path, "w", newline="", encoding="utf-8") as out:
+        for record in read_records(path, fmt=fmt):
+            if writer is None:
+                fieldnames = columns or list(record.keys())
+                writer = csv.DictWriter(out, fieldnames=fieldnames, restval="-",
+                                        extrasaction="ignore")
+                writer.writeheader()
+            writer.writerow(record)
+            count += 1
+        if writer is None and columns:
+            csv.DictWriter(out, fieldnames=columns).writeheader()
+    return count
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python record_sink.py <sink.jsonl | sink_dir.parquet> <output.csv>")
+        sys.exit(1)
+    n = export_csv(sys.argv[1], sys.argv[2])
+    print(f"Exported {n} records to {sys.argv[2]}")
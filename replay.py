@@ -0,0 +1,392 @@
+# replay.py
+"""
+Record/replay of the scrapers' network traffic.
+
+With NEWS_REPLAY=record, every article download made through the
+politeness scheduler's sessions and every search-results page the link
+crawlers read from Chrome is saved into a cassette directory
+(NEWS_CASSETTE). With NEWS_REPLAY=replay nothing leaves the machine: a
+local HTTP server serves the cassette, a requests transport adapter sends
+the downloads to it, and Chrome loads the recorded result pages from it
+with every other host name unresolvable. Pagination moves between the
+recorded pages instead of clicking through the live site, so a replayed
+run of the app's pipeline sees exactly what the recorded one saw.
+
+NEWS_REPLAY_LATENCY_MS and NEWS_REPLAY_KBPS add a delay before every
+response and cap its transfer rate, to time runs under slower networks.
+Downloads still go through the politeness scheduler, so its per-host
+limits apply as they would live.
+
+A cassette is a directory with `http.jsonl` (url, status, headers and
+body file per response), `pages.jsonl` (crawl, page, url and body file
+per search-results page) and the bodies in `bodies/`, named by SHA-1.
+Later entries for the same URL or page replace earlier ones.
+
+Usage:
+    NEWS_REPLAY=record NEWS_CASSETTE=cassettes/demo streamlit run app.py
+    NEWS_REPLAY=replay NEWS_CASSETTE=cassettes/demo NEWS_REPLAY_LATENCY_MS=80 streamlit run app.py
+    python replay.py info cassettes/demo
+    python replay.py serve cassettes/demo --latency-ms 80 --kbps 2000
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+from requests.adapters import HTTPAdapter
+
+import politeness
+
+MODE = os.environ.get("NEWS_REPLAY", "")
+DEFAULT_DIR = os.environ.get("NEWS_CASSETTE", os.path.join("cassettes", "default"))
+LATENCY_MS = float(os.environ.get("NEWS_REPLAY_LATENCY_MS", "0"))
+KBPS = float(os.environ.get("NEWS_REPLAY_KBPS", "0"))
+
+_HTTP_LOG = "http.jsonl"
+_PAGES_LOG = "pages.jsonl"
+_BODIES = "bodies"
+# Response headers worth replaying (bodies are stored decoded)
+_KEEP_HEADERS = ("content-type", "location", "retry-after")
+
+_active = None
+
+
+def _read_jsonl(path: str) -> list[dict]:
+    if not os.path.exists(path):
+        return []
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A torn last line from an interrupted recording
+                continue
+    return entries
+
+
+class Cassette:
+    """Recorded responses and search-results pages in `directory`."""
+
+    def __init__(self, directory: str = DEFAULT_DIR):
+        self.directory = directory
+        os.makedirs(os.path.join(directory, _BODIES), exist_ok=True)
+        self._lock = threading.Lock()
+        self.responses = {e["url"]: e for e in _read_jsonl(os.path.join(directory, _HTTP_LOG))}
+        self.pages = {(e["crawl"], e["page"]): e
+                      for e in _read_jsonl(os.path.join(directory, _PAGES_LOG))}
+
+    def _save_body(self, body: bytes) -> str:
+        name = hashlib.sha1(body).hexdigest()
+        path = os.path.join(self.directory, _BODIES, name)
+        if not os.path.exists(path):
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, path)
+        return name
+
+    def _append(self, log: str, entry: dict):
+        with open(os.path.join(self.directory, log), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def body(self, entry: dict) -> bytes:
+        with open(os.path.join(self.directory, _BODIES, entry["body"]), "rb") as f:
+            return f.read()
+
+    def record_response(self, url: str, status: int, headers, body: bytes):
+        entry = {
+            "url": url,
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() in _KEEP_HEADERS},
+            "body": self._save_body(body),
+        }
+        with self._lock:
+            self._append(_HTTP_LOG, entry)
+            self.responses[url] = entry
+
+    def record_page(self, crawl: str, page: int, url: str, html: str):
+        """Save what Chrome showed on result page `page` of the crawl that started at `crawl`."""
+        entry = {"crawl": crawl, "page": page, "url": url,
+                 "body": self._save_body(html.encode("utf-8"))}
+        with self._lock:
+            self._append(_PAGES_LOG, entry)
+            self.pages[(crawl, page)] = entry
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        replay = self.server.replay
+        parsed = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        entry = None
+        if parsed.path == "/http":
+            entry = replay.cassette.responses.get(query.get("url"))
+            headers = entry["headers"] if entry else {}
+        elif parsed.path == "/page":
+            entry = replay.cassette.pages.get((query.get("crawl"), int(query.get("page", 0))))
+            # Recorded pages are the DOM after the site's scripts ran; do not run them again
+            headers = {"Content-Type": "text/html; charset=utf-8",
+                       "Content-Security-Policy": "script-src 'none'"}
+        if entry is None:
+            logging.warning(f"Not in the cassette: {self.path}")
+            replay.send(self, 404, {"X-Cassette-Miss": "1"}, b"")
+            return
+        replay.send(self, entry.get("status", 200), headers, replay.cassette.body(entry))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayServer:
+    """
+    Serves a cassette on 127.0.0.1: /http?url=... for recorded responses and
+    /page?crawl=...&page=N for recorded search-results pages, each after
+    `latency` seconds and at most `bandwidth` bytes/s (0 = unlimited).
+    """
+
+    def __init__(self, cassette: Cassette, latency: float = 0.0, bandwidth: float = 0.0,
+                 port: int = 0):
+        self.cassette = cassette
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.replay = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def http_url(self, url: str) -> str:
+        return f"{self.url}/http?url={quote(url, safe='')}"
+
+    def page_url(self, crawl: str, page: int) -> str:
+        return f"{self.url}/page?crawl={quote(crawl, safe='')}&page={page}"
+
+    def send(self, handler: BaseHTTPRequestHandler, status: int, headers: dict, body: bytes):
+        if self.latency:
+            time.sleep(self.latency)
+        try:
+            handler.send_response(status)
+            for key, value in headers.items():
+                handler.send_header(key, value)
+            handler.send_header("Content-Length", str(len(body)))
+            handler.end_headers()
+            if not self.bandwidth:
+                handler.wfile.write(body)
+                return
+            # Trickle the body out in 50 ms worth of bytes at a time
+            step = max(1024, int(self.bandwidth / 20))
+            for start in range(0, len(body), step):
+                chunk = body[start:start + step]
+                handler.wfile.write(chunk)
+                handler.wfile.flush()
+                time.sleep(len(chunk) / self.bandwidth)
+        except (BrokenPipeError, ConnectionResetError):
+            # The streaming reader stops once it has the article body
+            pass
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True,
+                                        name="replay-server")
+        self._thread.start()
+        return self
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class CassetteAdapter(HTTPAdapter):
+    """
+    Transport for the scheduler's sessions: records every GET response into
+    the cassette, or (with a `server`) sends the request to the replay
+    server instead of the network.
+    """
+
+    def __init__(self, cassette: Cassette, server: ReplayServer = None):
+        super().__init__()
+        self.cassette = cassette
+        self.server = server
+
+    def send(self, request, **kwargs):
+        if self.server is None:
+            resp = super().send(request, **kwargs)
+            if request.method == "GET":
+                # Read the whole body, even if the caller then streams only part of it
+                self.cassette.record_response(request.url, resp.status_code, resp.headers,
+                                              resp.content)
+            return resp
+        original = request.url
+        request = request.copy()
+        request.url = self.server.http_url(original)
+        kwargs["proxies"] = {}
+        resp = super().send(request, **kwargs)
+        # Relative redirects and error messages refer to the recorded URL
+        resp.url = original
+        return resp
+
+
+class CassetteDriver:
+    """
+    Wraps a WebDriver for one crawl (the first URL it loads). When
+    recording, every `page_source` the crawler reads is saved as that
+    crawl's current result page. When replaying, it loads the recorded
+    pages from the replay server, reports their original URL as
+    `current_url`, and `pagination` swaps the site's advance/seek callbacks
+    for moves between the recorded pages.
+    """
+
+    def __init__(self, driver, cassette: Cassette, server: ReplayServer = None):
+        self._driver = driver
+        self.cassette = cassette
+        self.server = server
+        self._crawl = None
+        self._page = 0
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+    def get(self, url: str):
+        if self._crawl is not None:
+            # Later navigation (e.g. CNN's seek) belongs to the same crawl
+            if self.server is None:
+                self._driver.get(url)
+            return
+        self._crawl, self._page = url, 0
+        if self.server is None:
+            self._driver.get(url)
+            return
+        if (url, 0) not in self.cassette.pages:
+            logging.warning(f"Not in the cassette: search page {url}")
+        self._driver.get(self.server.page_url(url, 0))
+
+    @property
+    def page_source(self) -> str:
+        html = self._driver.page_source
+        if self.server is None and self._crawl is not None:
+            self.cassette.record_page(self._crawl, self._page, self._driver.current_url, html)
+        return html
+
+    @property
+    def current_url(self) -> str:
+        if self.server is None:
+            return self._driver.current_url
+        entry = self.cassette.pages.get((self._crawl, self._page))
+        return entry["url"] if entry else self._crawl
+
+    def _open(self, page: int) -> bool:
+        if (self._crawl, page) not in self.cassette.pages:
+            return False
+        self._page = page
+        self._driver.get(self.server.page_url(self._crawl, page))
+        return True
+
+    def pagination(self, advance, seek, wait_timeout: int):
+        """The (advance, seek, wait_timeout) that `scrapers._collect_links` should use."""
+        if self.server is not None:
+            # Recorded pages are static: the cards are either there or not
+            return (lambda driver, page, cards: self._open(page + 1),
+                    lambda driver, page: self._open(page),
+                    min(wait_timeout, 2))
+
+        def recording_advance(driver, page, cards):
+            moved = advance(driver, page, cards)
+            if moved:
+                self._page = page + 1
+            return moved
+
+        def recording_seek(driver, page):
+            seek(driver, page)
+            self._page = page
+
+        return recording_advance, recording_seek if seek else None, wait_timeout
+
+
+def activate(mode: str, directory: str = DEFAULT_DIR, latency: float = 0.0,
+             bandwidth: float = 0.0) -> Cassette:
+    """Start recording into, or replaying from, the cassette in `directory`."""
+    global _active
+    if mode not in ("record", "replay"):
+        raise ValueError(f"replay mode must be 'record' or 'replay', not {mode!r}")
+    deactivate()
+    cassette = Cassette(directory)
+    server = ReplayServer(cassette, latency, bandwidth).start() if mode == "replay" else None
+    _active = (cassette, server)
+    politeness.set_transport(lambda: CassetteAdapter(cassette, server))
+    logging.info(f"{mode.capitalize()}ing network traffic: {directory}"
+                 + (f" (served at {server.url})" if server else ""))
+    return cassette
+
+
+def activate_from_env():
+    """Apply NEWS_REPLAY / NEWS_CASSETTE / NEWS_REPLAY_LATENCY_MS / NEWS_REPLAY_KBPS, if set."""
+    if MODE and _active is None:
+        activate(MODE, DEFAULT_DIR, LATENCY_MS / 1000, KBPS * 1000)
+
+
+def deactivate():
+    global _active
+    if _active is not None and _active[1] is not None:
+        _active[1].close()
+    _active = None
+    politeness.set_transport(None)
+
+
+def chrome_arguments() -> list[str]:
+    """Extra Chrome flags: when replaying, only the replay server resolves."""
+    if _active is None or _active[1] is None:
+        return []
+    return ["--host-resolver-rules=MAP * ~NOTFOUND , EXCLUDE 127.0.0.1"]
+
+
+def wrap_driver(driver):
+    if _active is None:
+        return driver
+    return CassetteDriver(driver, *_active)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Inspect or serve recorded network cassettes.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    info = commands.add_parser("info", help="Summarize a cassette")
+    info.add_argument("directory")
+    serve = commands.add_parser("serve", help="Serve a cassette until interrupted")
+    serve.add_argument("directory")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--latency-ms", type=float, default=LATENCY_MS)
+    serve.add_argument("--kbps", type=float, default=KBPS, help="Bandwidth cap in kB/s (0 = none)")
+    args = parser.parse_args()
+
+    cassette = Cassette(args.directory)
+    if args.command == "info":
+        hosts = {}
+        for url in cassette.responses:
+            host = urlparse(url).hostname
+            hosts[host] = hosts.get(host, 0) + 1
+        crawls = {crawl for crawl, _ in cassette.pages}
+        print(f"{len(cassette.responses)} responses, {len(cassette.pages)} result pages "
+              f"from {len(crawls)} crawls")
+        for host, count in sorted(hosts.items(), key=lambda item: -item[1]):
+            print(f"{count:>6}  {host}")
+        return
+    server = ReplayServer(cassette, args.latency_ms / 1000, args.kbps * 1000, port=args.port)
+    print(f"Serving {args.directory} at {server.url} (/http?url=..., /page?crawl=...&page=N)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,7 @@
 # scrapers.py
 
+import os
 import time
-import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
 
 from selenium import webdriver
@@ -19,7 +18,45 @@ from selenium.common.exceptions import (
 
 from webdriver_manager.chrome import ChromeDriverManager
 
+from checkpoint import CrawlCheckpoint, checkpoint_path
+from politeness import FetchError, PolitenessScheduler
+from extractors import SEARCH_CARDS, parse_article, parse_search_cards
+from replay import CassetteDriver, activate_from_env, chrome_arguments, wrap_driver
+from streaming import read_article_html
+from urlcanon import SeenIndex, canonicalize
+from metrics import BROWSERS
+from store import ArticleStore
+from tracing import annotate, span, traced
+
+
+# Shared by every article download so per-host limits hold across channels
+_scheduler = PolitenessScheduler(rate=1.0, burst=2, concurrency=2, max_retries=3)
+
+# Stop downloading once the article body is complete (see streaming.py)
+STREAM_ARTICLES = os.environ.get("NEWS_STREAM_ARTICLES", "1") != "0"
+
+# Record or replay downloads and result pages when NEWS_REPLAY is set (see replay.py)
+activate_from_env()
+
+
+@traced("article.download")
+def _fetch_html(url: str, channel: str) -> str:
+    """
+    Download an article page through the politeness scheduler. Raises
+    FetchError when the page is blocked, rate-limited or unreachable, so the
+    scrape_*_article functions only return "" when a page had no article text.
+    """
+    annotate(channel=channel)
+    if STREAM_ARTICLES:
+        html = _scheduler.fetch(url, timeout=15,
+                                reader=lambda resp: read_article_html(resp, channel))
+    else:
+        html = _scheduler.fetch(url, timeout=15).text
+    annotate(chars=len(html))
+    return html
+
 
+@traced("browser.start")
 def _init_driver(headless: bool = True):
     opts = ChromeOptions()
     if headless:
@@ -34,395 +71,472 @@ def _init_driver(headless: bool = True):
         " AppleWebKit/537.36 (KHTML, like Gecko)"
         " Chrome/91.0.4472.124 Safari/537.36"
     )
+    for arg in chrome_arguments():
+        opts.add_argument(arg)
     driver = webdriver.Chrome(
         service=ChromeService(ChromeDriverManager().install()), options=opts
     )
     driver.set_page_load_timeout(45)
-    return driver
+    BROWSERS.inc()
+    return wrap_driver(driver)
 
 
-def scrape_bbc_links(topic: str, max_articles: int = 5, max_pages: int = 10) -> list[str]:
-    query = topic.strip().replace(" ", "+")
-    url = f"https://www.bbc.com/search?q={query}"
-    card_sel = 'div[data-testid="newport-card"]'
-    link_sel = "a[data-testid='internal-link']"
-    next_btn_sel = "div.sc-faaff782-0 button:has(svg[icon='chevron-right']):not([disabled])"
-    prefix = "https://www.bbc.com/news/articles"
+def _quit_driver(driver):
+    try:
+        driver.quit()
+    finally:
+        BROWSERS.dec()
+
+
+def _as_cards(links: list[str]) -> list[dict]:
+    """Link cards: {"url", "headline", "description"} per search result."""
+    return [{"url": link, "headline": None, "description": None} for link in links]
+
+
+def _links_or_cards(cards: list[dict], details: bool):
+    return cards if details else [card["url"] for card in cards]
+
+
+def _collect_links(
+    driver,
+    channel: str,
+    advance,
+    max_articles: int,
+    max_pages: int,
+    wait_timeout: int = 10,
+    checkpoint: CrawlCheckpoint = None,
+    seek=None,
+    seen_index: SeenIndex = None,
+    stop_at_seen: bool = False,
+) -> list[dict]:
+    """
+    Shared pagination loop for the search-result crawlers.
+
+    Each result page is parsed from one `page_source` snapshot with
+    `extractors.parse_search_cards(channel, ...)`, rather than querying the
+    browser for every card's link, headline and description.
+    `advance(driver, page, cards)` moves from result page `page` to
+    the next one, returning False when there are no more pages. If a
+    `checkpoint` is given, links and the page cursor are committed after
+    every page, and an interrupted crawl resumes after the last committed
+    page: `seek(driver, page)` jumps there directly when the site allows it,
+    otherwise `advance` is replayed without collecting cards. Re-running a
+    finished crawl returns the checkpointed links without paginating again.
+    Links are canonicalized with `channel`'s rules before deduping, and
+    links already in `seen_index` are skipped. With `stop_at_seen`,
+    pagination stops after the first page that contains an already-seen
+    link, since everything after it is older; this only applies to
+    channels whose search is sorted by date (`newest_first` in
+    SEARCH_CARDS), the others page on up to `max_pages`.
+    Returns link cards (see `_as_cards`); links restored from a checkpoint
+    have no headline or description. Under replay.py, a recorded crawl
+    paginates through its recorded pages instead.
+    """
+    card_sel = SEARCH_CARDS[channel]["card"]
+    stop_at_seen = stop_at_seen and SEARCH_CARDS[channel].get("newest_first", False)
+    if isinstance(driver, CassetteDriver):
+        advance, seek, wait_timeout = driver.pagination(advance, seek, wait_timeout)
+    links = _as_cards(checkpoint.links) if checkpoint else []
+    seen = {canonicalize(link["url"], channel) for link in links}
+    start = 0
+    interrupted = False
+    if checkpoint and checkpoint.resuming:
+        start = checkpoint.page
+        try:
+            if seek is not None:
+                seek(driver, start)
+            else:
+                for page in range(start):
+                    WebDriverWait(driver, wait_timeout).until(
+                        EC.presence_of_all_elements_located((By.CSS_SELECTOR, card_sel))
+                    )
+                    cards = driver.find_elements(By.CSS_SELECTOR, card_sel)
+                    if not advance(driver, page, cards):
+                        return links[:max_articles]
+        except Exception:
+            return links[:max_articles]
 
-    driver = _init_driver()
-    driver.get(url)
-    WebDriverWait(driver, 30).until(EC.presence_of_element_located((By.CSS_SELECTOR, card_sel)))
-
-    links = []
-    for _ in range(max_pages):
-        cards = driver.find_elements(By.CSS_SELECTOR, card_sel)
-        for card in cards:
-            if len(links) >= max_articles:
-                break
-            try:
-                href = card.find_element(By.CSS_SELECTOR, link_sel).get_attribute("href")
-                if href.startswith(prefix) and href not in links:
-                    links.append(href)
-            except Exception:
-                continue
+    for page in range(start, max_pages):
         if len(links) >= max_articles:
             break
+        with span("links.page", channel=channel, page=page) as page_span:
+            try:
+                WebDriverWait(driver, wait_timeout).until(
+                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, card_sel))
+                )
+            except TimeoutException:
+                page_span.set(timeout=True)
+                break
+            cards = driver.find_elements(By.CSS_SELECTOR, card_sel)
+            reached_seen = False
+            found = len(links)
+            for card in parse_search_cards(channel, driver.page_source, driver.current_url):
+                if len(links) >= max_articles:
+                    break
+                href = canonicalize(card["url"], channel)
+                if href and seen_index is not None and href in seen_index:
+                    reached_seen = stop_at_seen
+                    continue
+                if href and href not in seen:
+                    seen.add(href)
+                    links.append(dict(card, url=href))
+                    if checkpoint:
+                        checkpoint.add(href)
+            page_span.set(cards=len(cards), new_links=len(links) - found)
+        if checkpoint:
+            checkpoint.commit(page + 1)
+        if len(links) >= max_articles or reached_seen:
+            break
         try:
-            btn = WebDriverWait(driver, 30).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, next_btn_sel))
-            )
-            driver.execute_script("arguments[0].scrollIntoView(true);", btn)
-            time.sleep(0.5)
-            driver.execute_script("arguments[0].click();", btn)
-            WebDriverWait(driver, 30).until(EC.staleness_of(cards[0]))
-            WebDriverWait(driver, 30).until(EC.presence_of_element_located((By.CSS_SELECTOR, card_sel)))
-            time.sleep(0.5)
+            with span("links.advance", channel=channel, page=page):
+                if not advance(driver, page, cards):
+                    break
+        except TimeoutException:
+            break
         except Exception:
+            # e.g. a browser crash: keep the checkpoint open so a rerun resumes
+            interrupted = True
             break
 
-    driver.quit()
+    if checkpoint and not interrupted:
+        checkpoint.finish()
     return links[:max_articles]
 
 
+def scrape_bbc_links(topic: str, max_articles: int = 5, max_pages: int = 10,
+                     checkpoint: CrawlCheckpoint = None,
+                     seen_index: SeenIndex = None,
+                     stop_at_seen: bool = False, details: bool = False) -> list:
+    if checkpoint and checkpoint.done:
+        return _links_or_cards(_as_cards(checkpoint.links[:max_articles]), details)
+    query = topic.strip().replace(" ", "+")
+    url = f"https://www.bbc.com/search?q={query}"
+    card_sel = SEARCH_CARDS["BBC"]["card"]
+    next_btn_sel = "div.sc-faaff782-0 button:has(svg[icon='chevron-right']):not([disabled])"
+
+    def advance(driver, page, cards):
+        btn = WebDriverWait(driver, 30).until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, next_btn_sel))
+        )
+        driver.execute_script("arguments[0].scrollIntoView(true);", btn)
+        time.sleep(0.5)
+        driver.execute_script("arguments[0].click();", btn)
+        WebDriverWait(driver, 30).until(EC.staleness_of(cards[0]))
+        WebDriverWait(driver, 30).until(EC.presence_of_element_located((By.CSS_SELECTOR, card_sel)))
+        time.sleep(0.5)
+        return True
+
+    driver = _init_driver()
+    try:
+        driver.get(url)
+        cards = _collect_links(driver, "BBC", advance, max_articles, max_pages,
+                               wait_timeout=30, checkpoint=checkpoint,
+                               seen_index=seen_index, stop_at_seen=stop_at_seen)
+        return _links_or_cards(cards, details)
+    finally:
+        _quit_driver(driver)
+
+
 def scrape_bbc_article(url: str) -> str:
+    html = _fetch_html(url, "BBC")
     try:
-        resp = requests.get(url, timeout=15)
-        soup = BeautifulSoup(resp.text, "html.parser")
-        art = soup.find("article")
-        if not art:
-            return ""
-        paras = art.find_all("p")
-        return " ".join(p.get_text().strip() for p in paras)
+        return parse_article("BBC", html)
     except Exception:
         return ""
 
 
-def scrape_cnn_links(topic: str, max_articles: int = 5, max_pages: int = 10) -> list[str]:
+def scrape_cnn_links(topic: str, max_articles: int = 5, max_pages: int = 10,
+                     checkpoint: CrawlCheckpoint = None,
+                     seen_index: SeenIndex = None,
+                     stop_at_seen: bool = False, details: bool = False) -> list:
+    if checkpoint and checkpoint.done:
+        return _links_or_cards(_as_cards(checkpoint.links[:max_articles]), details)
     q = topic.strip().replace(" ", "+")
-    url = (
-        "https://edition.cnn.com/search?"
-        f"q={q}&from=0&size=10&page=1&sort=newest&types=article&section="
-    )
-    card_sel = 'div[data-component-name="card"]'
-    link_sel = "a.container__link"
+    page_size = 10
     next_btn_sel = "div.pagination-arrow-right"
 
-    driver = _init_driver()
-    driver.set_page_load_timeout(30)
-    driver.get(url)
+    def page_url(page: int) -> str:
+        return (
+            "https://edition.cnn.com/search?"
+            f"q={q}&from={page * page_size}&size={page_size}&page={page + 1}"
+            "&sort=newest&types=article&section="
+        )
 
-    links = []
-    for _ in range(max_pages):
-        try:
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, card_sel))
-            )
-        except TimeoutException:
-            break
-        cards = driver.find_elements(By.CSS_SELECTOR, card_sel)
-        for card in cards:
-            if len(links) >= max_articles:
-                break
-            try:
-                href = card.find_element(By.CSS_SELECTOR, link_sel).get_attribute("href")
-                if href and href not in links:
-                    links.append(href)
-            except Exception:
-                continue
-        if len(links) >= max_articles:
-            break
-        try:
-            btn = WebDriverWait(driver, 15).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, next_btn_sel))
-            )
-            btn.click()
-            time.sleep(2)
-        except Exception:
-            break
+    def advance(driver, page, cards):
+        btn = WebDriverWait(driver, 15).until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, next_btn_sel))
+        )
+        btn.click()
+        time.sleep(2)
+        return True
 
-    driver.quit()
-    return links[:max_articles]
+    def seek(driver, page):
+        # CNN exposes the result offset in the URL
+        driver.get(page_url(page))
+
+    driver = _init_driver()
+    driver.set_page_load_timeout(30)
+    try:
+        driver.get(page_url(0))
+        cards = _collect_links(driver, "CNN", advance, max_articles, max_pages,
+                               wait_timeout=15, checkpoint=checkpoint, seek=seek,
+                               seen_index=seen_index, stop_at_seen=stop_at_seen)
+        return _links_or_cards(cards, details)
+    finally:
+        _quit_driver(driver)
 
 
 def scrape_cnn_article(url: str) -> str:
+    html = _fetch_html(url, "CNN")
     try:
-        resp = requests.get(url, timeout=15)
-        soup = BeautifulSoup(resp.text, "html.parser")
-        paras = soup.find_all("p")
-        return " ".join(p.get_text().strip() for p in paras)
+        return parse_article("CNN", html)
     except Exception:
         return ""
 
 
-def scrape_dawn_links(topic: str, max_articles: int = 5, max_pages: int = 10) -> list[str]:
+def scrape_dawn_links(topic: str, max_articles: int = 5, max_pages: int = 10,
+                      checkpoint: CrawlCheckpoint = None,
+                      seen_index: SeenIndex = None,
+                      stop_at_seen: bool = False, details: bool = False) -> list:
+    if checkpoint and checkpoint.done:
+        return _links_or_cards(_as_cards(checkpoint.links[:max_articles]), details)
     q = topic.strip().replace(" ", "+")
     url = (
         "https://www.dawn.com/search?"
         "cx=016184311056644083324%3Aa1i8yd7zymy&cof=FORID%3A10&ie=UTF-8"
         f"&q={q}"
     )
-    card_sel = "div.gsc-webResult.gsc-result"
-    link_sel = "div.gs-title a.gs-title"
+    card_sel = SEARCH_CARDS["Dawn News"]["card"]
     page_btn_sel = "div.gsc-cursor-page"
 
-    driver = _init_driver()
-    driver.get(url)
-    time.sleep(2)
+    def open_page(driver, index):
+        buttons = driver.find_elements(By.CSS_SELECTOR, page_btn_sel)
+        if index >= len(buttons):
+            return False
+        driver.execute_script("arguments[0].click();", buttons[index])
+        time.sleep(2)
+        return True
 
-    links = []
-    for page in range(max_pages):
-        try:
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, card_sel))
-            )
-        except TimeoutException:
-            break
-        cards = driver.find_elements(By.CSS_SELECTOR, card_sel)
-        for card in cards:
-            if len(links) >= max_articles:
-                break
-            try:
-                href = card.find_element(By.CSS_SELECTOR, link_sel).get_attribute("href")
-                if href and href not in links:
-                    links.append(href)
-            except Exception:
-                continue
-        if len(links) >= max_articles:
-            break
+    def advance(driver, page, cards):
         # click next page button
-        buttons = driver.find_elements(By.CSS_SELECTOR, page_btn_sel)
-        if page + 1 < len(buttons):
-            try:
-                driver.execute_script("arguments[0].click();", buttons[page + 1])
-                time.sleep(2)
-            except Exception:
-                break
-        else:
-            break
+        return open_page(driver, page + 1)
 
-    driver.quit()
-    return links[:max_articles]
+    def seek(driver, page):
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_all_elements_located((By.CSS_SELECTOR, card_sel))
+        )
+        open_page(driver, page)
+
+    driver = _init_driver()
+    try:
+        driver.get(url)
+        time.sleep(2)
+        cards = _collect_links(driver, "Dawn News", advance, max_articles, max_pages,
+                               checkpoint=checkpoint, seek=seek,
+                               seen_index=seen_index, stop_at_seen=stop_at_seen)
+        return _links_or_cards(cards, details)
+    finally:
+        _quit_driver(driver)
 
 
 def scrape_dawn_article(url: str) -> str:
+    html = _fetch_html(url, "Dawn News")
     try:
-        resp = requests.get(url, timeout=15)
-        soup = BeautifulSoup(resp.text, "html.parser")
-        container = soup.find("div", class_="story__content")
-        if not container:
-            return ""
-        paras = container.find_all("p")
-        return "\n".join(p.get_text(strip=True) for p in paras)
+        return parse_article("Dawn News", html)
     except Exception:
         return ""
 
 
-def scrape_fox_links(topic: str, max_articles: int = 5, max_pages: int = 5) -> list[str]:
+def _load_more(button_sel: str, wait_timeout: int, pause: float):
+    """Builds an `advance` callback that clicks a "load more" style button."""
+    def advance(driver, page, cards):
+        btn = WebDriverWait(driver, wait_timeout).until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, button_sel))
+        )
+        driver.execute_script("arguments[0].click();", btn)
+        time.sleep(pause)
+        return True
+    return advance
+
+
+def scrape_fox_links(topic: str, max_articles: int = 5, max_pages: int = 5,
+                     checkpoint: CrawlCheckpoint = None,
+                     seen_index: SeenIndex = None,
+                     stop_at_seen: bool = False, details: bool = False) -> list:
+    if checkpoint and checkpoint.done:
+        return _links_or_cards(_as_cards(checkpoint.links[:max_articles]), details)
     q = topic.strip().replace(" ", "%20")
     url = f"https://www.foxnews.com/search-results/search#q={q}"
-    card_sel = "article.article"
-    link_sel = "h2.title a"
     load_more_sel = "div.button.load-more a"
 
     driver = _init_driver()
-    driver.get(url)
-
-    links = []
-    for _ in range(max_pages):
-        try:
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, card_sel))
-            )
-        except TimeoutException:
-            break
-        cards = driver.find_elements(By.CSS_SELECTOR, card_sel)
-        for card in cards:
-            if len(links) >= max_articles:
-                break
-            try:
-                elem = card.find_element(By.CSS_SELECTOR, link_sel)
-                href = elem.get_attribute("href")
-                if href and href not in links:
-                    links.append(href)
-            except Exception:
-                continue
-        if len(links) >= max_articles:
-            break
-        try:
-            btn = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, load_more_sel))
-            )
-            driver.execute_script("arguments[0].click();", btn)
-            time.sleep(3)
-        except Exception:
-            break
-
-    driver.quit()
-    return links[:max_articles]
+    try:
+        driver.get(url)
+        cards = _collect_links(driver, "Fox News", _load_more(load_more_sel, 10, 3),
+                               max_articles, max_pages, checkpoint=checkpoint,
+                               seen_index=seen_index, stop_at_seen=stop_at_seen)
+        return _links_or_cards(cards, details)
+    finally:
+        _quit_driver(driver)
 
 
 def scrape_fox_article(url: str) -> str:
+    html = _fetch_html(url, "Fox News")
     try:
-        resp = requests.get(url, timeout=15)
-        soup = BeautifulSoup(resp.text, "html.parser")
-        main = soup.find("main")
-        if not main:
-            return ""
-        paras = main.find_all("p")
-        return "\n".join(p.get_text(strip=True) for p in paras)
+        return parse_article("Fox News", html)
     except Exception:
         return ""
 
 
-def scrape_trt_links(topic: str, max_articles: int = 5, max_pages: int = 10) -> list[str]:
+def scrape_trt_links(topic: str, max_articles: int = 5, max_pages: int = 10,
+                     checkpoint: CrawlCheckpoint = None,
+                     seen_index: SeenIndex = None,
+                     stop_at_seen: bool = False, details: bool = False) -> list:
+    if checkpoint and checkpoint.done:
+        return _links_or_cards(_as_cards(checkpoint.links[:max_articles]), details)
     q = topic.strip().replace(" ", "%20")
     url = f"https://www.trtworld.com/search?q={q}"
-    card_sel = "div.Card.Card-Search"
     load_more_sel = ".btn-loadmore"
 
     driver = _init_driver()
-    driver.get(url)
-    time.sleep(2)
-
-    links = []
-    for _ in range(max_pages):
-        try:
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, card_sel))
-            )
-        except TimeoutException:
-            break
-        cards = driver.find_elements(By.CSS_SELECTOR, card_sel)
-        for card in cards:
-            if len(links) >= max_articles:
-                break
-            try:
-                href = card.find_element(By.TAG_NAME, "a").get_attribute("href")
-                if href and href not in links:
-                    links.append(href)
-            except Exception:
-                continue
-        if len(links) >= max_articles:
-            break
-        try:
-            btn = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, load_more_sel))
-            )
-            driver.execute_script("arguments[0].click();", btn)
-            time.sleep(3)
-        except Exception:
-            break
-
-    driver.quit()
-    return links[:max_articles]
+    try:
+        driver.get(url)
+        time.sleep(2)
+        cards = _collect_links(driver, "TRT News", _load_more(load_more_sel, 10, 3),
+                               max_articles, max_pages, checkpoint=checkpoint,
+                               seen_index=seen_index, stop_at_seen=stop_at_seen)
+        return _links_or_cards(cards, details)
+    finally:
+        _quit_driver(driver)
 
 
 def scrape_trt_article(url: str) -> str:
+    html = _fetch_html(url, "TRT News")
     try:
-        resp = requests.get(url, timeout=15)
-        soup = BeautifulSoup(resp.text, "html.parser")
-        paras = soup.find_all("p")
-        return " ".join(p.get_text().strip() for p in paras)
+        return parse_article("TRT News", html)
     except Exception:
         return ""
 
 
-def scrape_aljazeera_links(topic: str, max_articles: int = 5, max_pages: int = 10) -> list[str]:
+def scrape_aljazeera_links(topic: str, max_articles: int = 5, max_pages: int = 10,
+                           checkpoint: CrawlCheckpoint = None,
+                           seen_index: SeenIndex = None,
+                           stop_at_seen: bool = False, details: bool = False) -> list:
+    if checkpoint and checkpoint.done:
+        return _links_or_cards(_as_cards(checkpoint.links[:max_articles]), details)
     q = topic.strip().replace(" ", "%20")
     url = f"https://www.aljazeera.com/search/{q}"
-    card_sel = "article.gc.u-clickable-card"
-    link_sel = "a.u-clickable-card__link"
     more_sel = "button.show-more-button.grid-full-width"
     cookie_sel = "button#onetrust-accept-btn-handler"
 
     driver = _init_driver()
-    driver.get(url)
-    time.sleep(2)
-
-    # dismiss cookie popup if present
     try:
-        btn = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, cookie_sel))
-        )
-        btn.click()
-    except Exception:
-        pass
+        driver.get(url)
+        time.sleep(2)
 
-    links = []
-    for _ in range(max_pages):
-        try:
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, card_sel))
-            )
-        except TimeoutException:
-            break
-        cards = driver.find_elements(By.CSS_SELECTOR, card_sel)
-        for card in cards:
-            if len(links) >= max_articles:
-                break
-            try:
-                href = card.find_element(By.CSS_SELECTOR, link_sel).get_attribute("href")
-                if href and href not in links:
-                    links.append(href)
-            except Exception:
-                continue
-        if len(links) >= max_articles:
-            break
+        # dismiss cookie popup if present
         try:
             btn = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, more_sel))
+                EC.element_to_be_clickable((By.CSS_SELECTOR, cookie_sel))
             )
-            driver.execute_script("arguments[0].click();", btn)
-            time.sleep(5)
+            btn.click()
         except Exception:
-            break
+            pass
 
-    driver.quit()
-    return links[:max_articles]
+        cards = _collect_links(driver, "Al Jazeera", _load_more(more_sel, 10, 5),
+                               max_articles, max_pages, checkpoint=checkpoint,
+                               seen_index=seen_index, stop_at_seen=stop_at_seen)
+        return _links_or_cards(cards, details)
+    finally:
+        _quit_driver(driver)
 
 
 def scrape_aljazeera_article(url: str) -> str:
+    html = _fetch_html(url, "Al Jazeera")
     try:
-        resp = requests.get(url, timeout=15)
-        soup = BeautifulSoup(resp.text, "html.parser")
-        main = soup.find("main")
-        if not main:
-            return ""
-        paras = main.find_all("p")
-        return "\n".join(p.get_text(strip=True) for p in paras)
+        return parse_article("Al Jazeera", html)
     except Exception:
         return ""
 
 
-def scrape_links(channel: str, topic: str) -> list[str]:
+@traced("links")
+def scrape_links(channel: str, topic: str, checkpoint_dir: str = None,
+                 seen_index: SeenIndex = None, stop_at_seen: bool = False,
+                 max_articles: int = 5, store: ArticleStore = None,
+                 max_age: float = None, details: bool = False) -> list:
+    """
+    If `checkpoint_dir` is given, the crawl is checkpointed there per
+    channel and topic, and an interrupted crawl resumes where it stopped.
+    Links already in `seen_index` (processed by an earlier run) are skipped;
+    with `stop_at_seen`, pagination also stops once it reaches them on
+    channels whose search is sorted newest first. With a
+    `store`, the links found are recorded under the topic, and with
+    `max_age` (seconds) a search for the topic stored within that window
+    that returned at least `max_articles` links is reused without scraping.
+    With `details`, returns link cards (url, headline and description from
+    the search result) instead of URLs.
+    """
+    annotate(channel=channel, topic=topic)
+    if store is not None and max_age is not None:
+        recent = store.topic_articles(channel, topic, max_age=max_age, limit=max_articles)
+        if len(recent) >= max_articles:
+            annotate(stored=True)
+            cards = [{"url": row["url"], "headline": row["headline"], "description": None}
+                     for row in recent]
+            return _links_or_cards(cards, details)
+    checkpoint = None
+    if checkpoint_dir:
+        checkpoint = CrawlCheckpoint(
+            checkpoint_path(checkpoint_dir, channel, topic), key=f"{channel}:{topic}"
+        )
+    kwargs = dict(max_articles=max_articles, checkpoint=checkpoint,
+                  seen_index=seen_index, stop_at_seen=stop_at_seen, details=True)
     if channel == "BBC":
-        return scrape_bbc_links(topic)
+        cards = scrape_bbc_links(topic, **kwargs)
     elif channel == "CNN":
-        return scrape_cnn_links(topic)
+        cards = scrape_cnn_links(topic, **kwargs)
     elif channel == "Dawn News":
-        return scrape_dawn_links(topic)
+        cards = scrape_dawn_links(topic, **kwargs)
     elif channel == "Fox News":
-        return scrape_fox_links(topic)
+        cards = scrape_fox_links(topic, **kwargs)
     elif channel == "TRT News":
-        return scrape_trt_links(topic)
+        cards = scrape_trt_links(topic, **kwargs)
     elif channel == "Al Jazeera":
-        return scrape_aljazeera_links(topic)
+        cards = scrape_aljazeera_links(topic, **kwargs)
     else:
         return []
-
-
-def scrape_article(url: str, channel: str) -> str:
+    if store is not None and cards:
+        store.add_links(channel, topic, [c["url"] for c in cards],
+                        headlines=[c["headline"] for c in cards])
+    return _links_or_cards(cards, details)
+
+
+@traced("article")
+def scrape_article(url: str, channel: str, store: ArticleStore = None) -> str:
+    """
+    With a `store`, text already stored for the URL is returned without a
+    download, and newly fetched text is saved.
+    """
+    annotate(channel=channel, url=url)
+    if store is not None:
+        stored = store.get(url)
+        if stored and stored["text"]:
+            annotate(stored=True)
+            return stored["text"]
     if channel == "BBC":
-        return scrape_bbc_article(url)
+        text = scrape_bbc_article(url)
     elif channel == "CNN":
-        return scrape_cnn_article(url)
+        text = scrape_cnn_article(url)
     elif channel == "Dawn News":
-        return scrape_dawn_article(url)
+        text = scrape_dawn_article(url)
     elif channel == "Fox News":
-        return scrape_fox_article(url)
+        text = scrape_fox_article(url)
     elif channel == "TRT News":
-        return scrape_trt_article(url)
+        text = scrape_trt_article(url)
     elif channel == "Al Jazeera":
-        return scrape_aljazeera_article(url)
+        text = scrape_aljazeera_article(url)
     else:
         return ""
+    if store is not None and text:
+        store.save_article(url, channel, text)
+    return text
@@ -5,11 +5,18 @@ from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import pandas as pd
-import time
+from selenium.common.exceptions import TimeoutException
+import os
+import sys
 import re
+import time
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from record_sink import RecordSink, LINK_COLUMNS, export_csv
+from checkpoint import CrawlCheckpoint
+from urlcanon import canonicalize
+
 
 
 topic = input("Enter topic: ")
@@ -18,6 +25,15 @@ topic_formatted = topic.strip().replace(' ', '+')
 url = f"https://www.dawn.com/search?cx=016184311056644083324%3Aa1i8yd7zymy&cof=FORID%3A10&ie=UTF-8&q={topic_formatted}"
 source = "Dawn News"
 
+# Resume an interrupted crawl from its last committed page
+checkpoint = CrawlCheckpoint(f"{source}_articles_{topic}.checkpoint.json", key=f"{source}:{topic}")
+if checkpoint.done:
+    print("This crawl already completed; delete the checkpoint file to start over.")
+    export_csv(f"{source}_articles_{topic}.jsonl", f"{source}_articles_{topic}.csv", columns=LINK_COLUMNS)
+    sys.exit(0)
+if not checkpoint.resuming:
+    checkpoint.reset()
+
 # Setup Selenium WebDriver in headless mode
 chrome_options = Options()
 chrome_options.add_argument("--headless")  # Run headless Chrome
@@ -31,17 +47,12 @@ driver = webdriver.Chrome(
 
 driver.get(url)
 time.sleep(3)
-data = {
-    "Source": [],
-    "Link": [],
-    "Headline": [],
-    "Description": [],
-    "Date": [],
-    "Timestamp": [],
-    "Topic": [],
-    "Author": [],
-    "Article_Content": [],
-}
+# Records are appended to disk in small batches instead of being held in memory
+sink = RecordSink(
+    f"{source}_articles_{topic}.jsonl",
+    append=checkpoint.resuming,
+    resume_offset=checkpoint.offset if checkpoint.resuming else None,
+)
 
 
 def scrape_articles():
@@ -64,7 +75,9 @@ def scrape_articles():
             link_element = article.find_element(
                 By.CSS_SELECTOR, "div.gs-title a.gs-title"
             )
-            link = link_element.get_attribute("href")
+            link = canonicalize(link_element.get_attribute("href"), "Dawn News")
+            if checkpoint.seen(link):
+                continue
             print(f"Article Link: {link}")
 
             # Extract headline
@@ -82,56 +95,83 @@ def scrape_articles():
             date_match = re.search(r"\d{2}-[a-zA-Z]{3}-\d{4}", snippet_element.text)
             date = date_match.group(0) if date_match else "Unknown"
 
-            # Append data to dictionary (you will need to define these variables before the loop)
-            data["Source"].append("DAWN.COM")  # Assuming source is DAWN
-            data["Link"].append(link)
-            data["Headline"].append(headline)
-            data["Description"].append(description)
-            data["Date"].append(date)
-            data["Timestamp"].append(datetime.now())
-            data["Topic"].append(topic)  # Assuming topic is predefined
-            data["Article_Content"].append("-")  # Article content is not fetched yet
-            data["Author"].append("-")  # Author not available in the structure
+            # Append the record to the sink
+            checkpoint.add(link)
+            sink.write({
+                "Source": "DAWN.COM",  # Assuming source is DAWN
+                "Link": link,
+                "Headline": headline,
+                "Description": description,
+                "Date": date,
+                "Timestamp": datetime.now(),
+                "Topic": topic,  # Assuming topic is predefined
+                "Author": "-",  # Author not available in the structure
+                "Article_Content": "-",  # Article content is not fetched yet
+            })
 
         except Exception as e:
             print(f"Error scraping article: {e}")
 
 
-scrape_articles()
+def open_page(index):
+    # Wait for the page cursor elements to be clickable
+    page_buttons = WebDriverWait(driver, 10).until(
+        EC.presence_of_all_elements_located(
+            (By.CSS_SELECTOR, "div.gsc-cursor-page")
+        )
+    )
 
+    # Ensure we're not on the last page
+    if index >= len(page_buttons):
+        return False
+    driver.execute_script("arguments[0].click();", page_buttons[index])
+    time.sleep(3)  # Allow time for the new page content to load
+    return True
 
 
-for i in range(10):
-    try:
-        print(f"Page {i+1}...")
+def commit_page(page):
+    # Persist the records and the pagination cursor together
+    checkpoint.commit(page, offset=sink.offset)
 
-        # Wait for the page cursor elements to be clickable
-        page_buttons = WebDriverWait(driver, 10).until(
-            EC.presence_of_all_elements_located(
-                (By.CSS_SELECTOR, "div.gsc-cursor-page")
-            )
-        )
 
-        # Ensure we're not on the last page
-        if i < len(page_buttons):
-            # Click the next page button
-            next_page_button = page_buttons[i + 1]  # Select the next page button
-            driver.execute_script("arguments[0].click();", next_page_button)
-            time.sleep(3)  # Allow time for the new page content to load
+if checkpoint.resuming:
+    # The result cursor lets us jump straight to the last committed page
+    print(f"Resuming after page {checkpoint.page}...")
+    if checkpoint.page > 1:
+        open_page(checkpoint.page - 1)
+else:
+    scrape_articles()
+    commit_page(1)
+
 
+interrupted = False
+for i in range(checkpoint.page - 1, 10):
+    try:
+        print(f"Page {i+1}...")
+
+        # Click the next page button
+        if open_page(i + 1):
             # Scrape articles on the new page
             scrape_articles()
+            commit_page(i + 2)
         else:
             print("No more pages to load.")
             break
 
+    except TimeoutException:
+        print("No more content to load.")
+        break
     except Exception as e:
-        print(f"No more content to load or unable to navigate to the next page: {e}")
+        # Leave the checkpoint open so the next run resumes from here
+        print(f"Crawl interrupted, rerun to resume: {e}")
+        interrupted = True
         break
 
 
-df = pd.DataFrame(data)
-df.to_csv(f"{source}_articles_{topic}.csv", index=False)
+if not interrupted:
+    checkpoint.finish(offset=sink.offset)
+sink.close()
+sink.export_csv(f"{source}_articles_{topic}.csv", columns=LINK_COLUMNS)
 print("Articles scraped successfully!")
 
 
@@ -1,66 +1,19 @@
-import pandas as pd
-import numpy as np
-import requests
-from bs4 import BeautifulSoup
-import json
+# Thin wrapper kept for the old workflow; see enrich.py for options
+# (worker count, per-host limit, Parquet input/output).
+import logging
+import os
+import sys
 
-topic = input("Enter topic: ")
-
-filename = f"BBC_articles_{topic}_final.csv"
-df = pd.read_csv(filename)
-
-article_links = np.array(df["Link"])
-
-article_contents = []
-authors = []
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from enrich import enrich
 
-i = 1
-print("Links...")
-for link in article_links:
-    try:
-        response = requests.get(link)
-        print(f"{i} Getting article from link: {link}")
-        i += 1
-        soup = BeautifulSoup(response.text, "html.parser")
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-        # Extract article content
-        article_tag = soup.find("article")
-        if article_tag:
-            paragraphs = article_tag.find_all("p")
-            if paragraphs:
-                article_text = " ".join([para.get_text() for para in paragraphs])
-            else:
-                article_text = "No article content found"
-        else:
-            article_text = "No article tag found"
-        article_contents.append(article_text)
-
-        # Extract author from JSON-LD
-        author = "BBC"  # Default author
-        script_tag = soup.find("script", type="application/ld+json")
-        if script_tag:
-            try:
-                json_data = json.loads(script_tag.string)
-                if isinstance(json_data, dict):
-                    if "author" in json_data:
-                        author_info = json_data["author"]
-                        if isinstance(author_info, dict) and "name" in author_info:
-                            author = author_info["name"]
-                        elif isinstance(author_info, list) and "name" in author_info[0]:
-                            author = author_info[0]["name"]
-            except json.JSONDecodeError:
-                pass
-        authors.append(author)
-
-    except Exception as e:
-        print(f"Failed to scrape content for {link}: {e}")
-        article_contents.append("Content could not be scraped")
-        authors.append("BBC")
+topic = input("Enter topic: ")
 
-df["Article_Content"] = article_contents
-df["Author"] = authors
+filename = f"BBC_articles_{topic}_final.csv"
+output_filename = "bbc_articles_dataset.csv"
 
-output_filename = f"bbc_articles_dataset.csv"
-df.to_csv(output_filename, index=False)
+enrich(filename, output_filename, channel="BBC")
 
 print(f"Updated file saved to {output_filename}")
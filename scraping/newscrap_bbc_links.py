@@ -7,11 +7,17 @@ from selenium.webdriver.chrome.options import Options as ChromeOptions # Renamed
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException, StaleElementReferenceException
-import pandas as pd
+import os
+import sys
 import time
 from datetime import datetime
 import logging # Added for better error logging
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from record_sink import RecordSink, LINK_COLUMNS, export_csv
+from checkpoint import CrawlCheckpoint
+from urlcanon import canonicalize
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -22,6 +28,16 @@ topic_formatted = topic.strip().replace(' ', '+')
 url = f"https://www.bbc.com/search?q={topic_formatted}"
 source = "BBC"
 
+# --- Checkpoint ---
+# Resume an interrupted crawl from its last committed page
+checkpoint = CrawlCheckpoint(f"{source}_articles_{topic}.checkpoint.json", key=f"{source}:{topic}")
+if checkpoint.done:
+    logging.info("This crawl already completed; delete the checkpoint file to start over.")
+    export_csv(f"{source}_articles_{topic}.jsonl", f"{source}_articles_{topic}_final.csv", columns=LINK_COLUMNS)
+    exit()
+if not checkpoint.resuming:
+    checkpoint.reset()
+
 # --- Chrome Driver Setup ---
 logging.info("Setting up Chrome options...")
 chrome_options = ChromeOptions()
@@ -47,17 +63,15 @@ except Exception as e:
     exit() # Exit if the driver cannot be initialized
 
 # --- Data Storage ---
-data = {
-    "Source": [],
-    "Link": [],
-    "Headline": [],
-    "Description": [],
-    "Date": [],
-    "Timestamp": [],
-    "Topic": [],
-    "Author": [],
-    "Article_Content": [],
-}
+# Records are appended to disk in small batches instead of being held in memory
+sink_filename = f"{source}_articles_{topic}.jsonl"
+sink = RecordSink(
+    sink_filename,
+    flush_rows=50,
+    flush_seconds=30,
+    append=checkpoint.resuming,
+    resume_offset=checkpoint.offset if checkpoint.resuming else None,
+)
 
 # --- Constants ---
 # Updated CSS Selectors based on bbc.txt analysis
@@ -111,7 +125,9 @@ def scrape_articles():
             # Find the link element within the article container
             # Need to find the 'a' tag first which wraps the whole card usually
             card_link_element = article.find_element(By.CSS_SELECTOR, LINK_SELECTOR)
-            link = card_link_element.get_attribute("href")
+            link = canonicalize(card_link_element.get_attribute("href"), "BBC")
+            if checkpoint.seen(link):
+                continue # Already collected on an earlier page or run
 
             # Find the headline element within the card
             headline_element = article.find_element(By.CSS_SELECTOR, HEADLINE_SELECTOR)
@@ -137,15 +153,18 @@ def scrape_articles():
             if link and headline:
                 # *** Apply the link prefix filter ***
                 if link.startswith(LINK_PREFIX_FILTER):
-                    data["Source"].append(source)
-                    data["Link"].append(link)
-                    data["Headline"].append(headline)
-                    data["Description"].append(description)
-                    data["Date"].append(date_str)
-                    data["Timestamp"].append(datetime.now())
-                    data["Topic"].append(topic)
-                    data["Article_Content"].append("-") # Placeholder
-                    data["Author"].append("-") # Placeholder
+                    checkpoint.add(link)
+                    sink.write({
+                        "Source": source,
+                        "Link": link,
+                        "Headline": headline,
+                        "Description": description,
+                        "Date": date_str,
+                        "Timestamp": datetime.now(),
+                        "Topic": topic,
+                        "Author": "-", # Placeholder
+                        "Article_Content": "-", # Placeholder
+                    })
                     articles_scraped_count += 1
                 else:
                     # Log skipped articles due to filter
@@ -169,6 +188,57 @@ def scrape_articles():
         # Optionally return False here if this should stop pagination
     return True # Indicate successful scraping of found articles
 
+def go_to_next_page(current_page):
+    """
+    Clicks 'Next' and waits until the results of page `current_page + 1`
+    have replaced the current ones. Returns False if the current page has
+    no articles to check staleness against.
+    """
+    # Find the first article on the current page to check for staleness later
+    logging.debug("Locating first article on current page for staleness check...")
+    try:
+        first_article_on_page = WebDriverWait(driver, 10).until( # Shorter wait here is ok
+            EC.presence_of_element_located((By.CSS_SELECTOR, ARTICLE_CONTAINER_SELECTOR))
+        )
+    except TimeoutException:
+        logging.warning(f"Could not find first article on page {current_page} for staleness check. Stopping pagination.")
+        return False
+
+    # Find and wait for the 'Next' button to be clickable using the refined selector
+    logging.debug("Waiting for 'Next' button to be clickable...")
+    next_button = WebDriverWait(driver, WAIT_TIMEOUT).until(
+        EC.element_to_be_clickable(
+            (By.CSS_SELECTOR, NEXT_BUTTON_SELECTOR)
+        )
+    )
+    logging.debug("'Next' button found and clickable.")
+
+    # *** Scroll the button into view before clicking ***
+    logging.debug("Scrolling 'Next' button into view...")
+    driver.execute_script("arguments[0].scrollIntoView(true);", next_button)
+    time.sleep(0.5) # Brief pause after scroll
+
+    # Click the 'Next' button
+    logging.debug("Clicking 'Next' button using JavaScript...")
+    driver.execute_script("arguments[0].click();", next_button)
+    time.sleep(1) # *** Increased pause after click slightly ***
+
+    # Wait for the page to update by checking if the old first article is stale
+    logging.debug("Waiting for page content to update (staleness check)...")
+    WebDriverWait(driver, WAIT_TIMEOUT).until(
+        EC.staleness_of(first_article_on_page)
+    )
+    logging.info(f"Navigation to page {current_page + 1} likely successful (staleness confirmed).")
+
+    # Add an extra wait for the *new* articles to appear after navigation
+    logging.debug(f"Waiting for new articles to appear on page {current_page + 1}...")
+    WebDriverWait(driver, WAIT_TIMEOUT).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, ARTICLE_CONTAINER_SELECTOR))
+    )
+    logging.debug(f"New articles detected on page {current_page + 1}.")
+    return True
+
+
 # --- Main Execution ---
 logging.info(f"Navigating to URL: {url}")
 try:
@@ -189,65 +259,35 @@ except Exception as e:
     driver.quit()
     exit()
 
-# Scrape the first page
-logging.info("Scraping first page...")
-scrape_result = scrape_articles()
-if scrape_result == "stale": # Handle potential initial staleness
-    logging.info("Retrying scrape on first page due to staleness.")
-    time.sleep(1) # Brief pause before retry
-    scrape_articles()
+if checkpoint.resuming:
+    # Click through the pages that were already committed without re-scraping them
+    logging.info(f"Resuming after page {checkpoint.page}...")
+    for page in range(1, checkpoint.page):
+        if not go_to_next_page(page):
+            logging.error(f"Could not reach page {checkpoint.page} to resume from.")
+            driver.quit()
+            exit()
+else:
+    # Scrape the first page
+    logging.info("Scraping first page...")
+    scrape_result = scrape_articles()
+    if scrape_result == "stale": # Handle potential initial staleness
+        logging.info("Retrying scrape on first page due to staleness.")
+        time.sleep(1) # Brief pause before retry
+        scrape_articles()
+    checkpoint.commit(1, offset=sink.offset)
 
 # Pagination Loop
 MAX_PAGES = 50 # Limit the number of pages to scrape
-for i in range(MAX_PAGES):
+interrupted = False
+for i in range(checkpoint.page - 1, MAX_PAGES):
     current_page = i + 1
     logging.info(f"--- Attempting to navigate from page {current_page} to {current_page + 1} ---")
 
     try:
-        # Find the first article on the current page to check for staleness later
-        logging.debug("Locating first article on current page for staleness check...")
-        try:
-            first_article_on_page = WebDriverWait(driver, 10).until( # Shorter wait here is ok
-                EC.presence_of_element_located((By.CSS_SELECTOR, ARTICLE_CONTAINER_SELECTOR))
-            )
-        except TimeoutException:
-            logging.warning(f"Could not find first article on page {current_page} for staleness check. Stopping pagination.")
+        if not go_to_next_page(current_page):
             break
 
-        # Find and wait for the 'Next' button to be clickable using the refined selector
-        logging.debug("Waiting for 'Next' button to be clickable...")
-        next_button = WebDriverWait(driver, WAIT_TIMEOUT).until(
-            EC.element_to_be_clickable(
-                (By.CSS_SELECTOR, NEXT_BUTTON_SELECTOR)
-            )
-        )
-        logging.debug("'Next' button found and clickable.")
-
-        # *** Scroll the button into view before clicking ***
-        logging.debug("Scrolling 'Next' button into view...")
-        driver.execute_script("arguments[0].scrollIntoView(true);", next_button)
-        time.sleep(0.5) # Brief pause after scroll
-
-        # Click the 'Next' button
-        logging.debug("Clicking 'Next' button using JavaScript...")
-        driver.execute_script("arguments[0].click();", next_button)
-        time.sleep(1) # *** Increased pause after click slightly ***
-
-        # Wait for the page to update by checking if the old first article is stale
-        logging.debug("Waiting for page content to update (staleness check)...")
-        WebDriverWait(driver, WAIT_TIMEOUT).until(
-            EC.staleness_of(first_article_on_page)
-        )
-        logging.info(f"Navigation to page {current_page + 1} likely successful (staleness confirmed).")
-
-        # Add an extra wait for the *new* articles to appear after navigation
-        logging.debug(f"Waiting for new articles to appear on page {current_page + 1}...")
-        WebDriverWait(driver, WAIT_TIMEOUT).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, ARTICLE_CONTAINER_SELECTOR))
-        )
-        logging.debug(f"New articles detected on page {current_page + 1}.")
-
-
         # Scrape the new page
         logging.info(f"Scraping page {current_page + 1}...")
         scrape_result = scrape_articles()
@@ -259,42 +299,8 @@ for i in range(MAX_PAGES):
             logging.warning(f"Scrape function reported no articles found on page {current_page + 1}, stopping pagination.")
             break
 
-
-        # Save data periodically
-        if (current_page + 1) % 5 == 0: # Save after page 5, 10, 15 etc.
-            logging.info(f"Saving data batch after page {current_page + 1}...")
-            try:
-                # Filter out empty lists before creating DataFrame
-                valid_data = {k: v for k, v in data.items() if v}
-                if valid_data and len(valid_data.get("Link", [])) > 0 : # Ensure we have core data
-                    # Ensure all lists have the same length for the batch
-                    # Find the current length of the Link list (which represents collected items)
-                    current_len = len(data.get("Link", []))
-                    # Determine how many items were added in the last 5 pages (approx)
-                    # This logic isn't perfect for batching *only* the last 5 pages,
-                    # it saves *all* data collected so far. A different approach
-                    # would be needed to save only the delta.
-                    # For simplicity, we save all accumulated data.
-                    if current_len > 0:
-                        batch_data_aligned = {}
-                        all_keys = list(data.keys())
-                        for k in all_keys:
-                            v = data.get(k, [])
-                            padded_v = v + ['-'] * (current_len - len(v)) # Pad to current max length
-                            batch_data_aligned[k] = padded_v
-
-                        df_batch = pd.DataFrame(batch_data_aligned)
-                        batch_filename = f"scraped_articles_batch_{source}_{topic}_page_{current_page + 1}.csv"
-                        df_batch.to_csv(batch_filename, index=False)
-                        logging.info(f"Batch data saved to {batch_filename}")
-                    else:
-                        logging.warning(f"No link data to save in batch for page {current_page + 1}.")
-                else:
-                    logging.warning(f"No valid data to save in batch for page {current_page + 1}.")
-
-            except Exception as e:
-                logging.error(f"Error saving batch file at page {current_page + 1}: {e}")
-
+        # Make sure everything from this page is durable before moving on
+        checkpoint.commit(current_page + 1, offset=sink.offset)
 
     except TimeoutException:
         # This timeout could be waiting for the button, staleness, or new articles
@@ -309,38 +315,24 @@ for i in range(MAX_PAGES):
         # Consider adding more specific error handling if needed
         import traceback
         logging.error(traceback.format_exc()) # Log the full traceback for debugging
+        # Leave the checkpoint open so the next run resumes from here
+        interrupted = True
         break # Exit loop on other errors
 
 # --- Final Save and Cleanup ---
 logging.info("Scraping finished or max pages reached. Saving final data...")
 try:
-    # Ensure all lists in the data dictionary have the same length before creating the final DataFrame
-    if data["Link"]: # Check if any data was actually collected
-        max_final_len = 0
-        try:
-            # Find the length of the longest list (should ideally be the same after filtering)
-             max_final_len = max(len(lst) for lst in data.values() if lst is not None)
-        except ValueError: # Handles case where data might be completely empty after filtering
-            logging.warning("Data dictionary appears empty or invalid for final save.")
-            max_final_len = 0
-
-        if max_final_len > 0:
-            final_data_aligned = {}
-            all_keys = list(data.keys()) # Get all expected keys
-            for k in all_keys:
-                v = data.get(k, []) # Get the list or an empty list if key missing
-                 # Pad shorter lists with a default value (e.g., None or '-')
-                padded_v = v + ['-'] * (max_final_len - len(v))
-                final_data_aligned[k] = padded_v
-
-            df = pd.DataFrame(final_data_aligned)
-            final_filename = f"{source}_articles_{topic}_final.csv"
-            df.to_csv(final_filename, index=False)
-            logging.info(f"All scraped articles saved successfully to {final_filename}! Total rows: {len(df)}") # Log row count
-        else:
-             logging.warning("No data with positive length collected, skipping final save.")
+    if interrupted:
+        logging.info("Crawl was interrupted; rerun the script to resume after the last saved page.")
+    else:
+        checkpoint.finish(offset=sink.offset)
+    sink.close()
+    if checkpoint.links:
+        final_filename = f"{source}_articles_{topic}_final.csv"
+        total_rows = sink.export_csv(final_filename, columns=LINK_COLUMNS)
+        logging.info(f"All scraped articles saved successfully to {final_filename}! Total rows: {total_rows}") # Log row count
     else:
-        logging.warning("No data was collected (Link list is empty), skipping final save.")
+        logging.warning("No data was collected, skipping final save.")
 except Exception as e:
     logging.error(f"Failed to save final CSV file: {e}")
     import traceback
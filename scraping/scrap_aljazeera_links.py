@@ -5,9 +5,15 @@ from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import pandas as pd
+import os
+import sys
 import time
 from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from record_sink import RecordSink, LINK_COLUMNS, export_csv
+from checkpoint import CrawlCheckpoint
+from urlcanon import canonicalize
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
 topic = input("Enter topic: ")
@@ -15,6 +21,15 @@ processed_topic = topic.strip().replace(' ', '%20')
 url = f"https://www.aljazeera.com/search/{processed_topic}"
 source = "Al Jazeera"
 
+# Resume an interrupted crawl from its last committed page
+checkpoint = CrawlCheckpoint(f"{source}_articles_{topic}.checkpoint.json", key=f"{source}:{topic}")
+if checkpoint.done:
+    print("This crawl already completed; delete the checkpoint file to start over.")
+    export_csv(f"{source}_articles_{topic}.jsonl", f"{source}_articles_{topic}.csv", columns=LINK_COLUMNS)
+    sys.exit(0)
+if not checkpoint.resuming:
+    checkpoint.reset()
+
 # Setup Selenium WebDriver in headless mode
 chrome_options = Options()
 chrome_options.add_argument("--log-level=3")  # Suppresses non-critical errors
@@ -33,17 +48,12 @@ driver = webdriver.Chrome(
 driver.get(url)
 time.sleep(5)  # Let the page load, increase the time to let the content load
 
-data = {
-    "Source": [],
-    "Link": [],
-    "Headline": [],
-    "Description": [],
-    "Date": [],
-    "Timestamp": [],
-    "Topic": [],
-    "Author": [],
-    "Article_Content": [],
-}
+# Records are appended to disk in small batches instead of being held in memory
+sink = RecordSink(
+    f"{source}_articles_{topic}.jsonl",
+    append=checkpoint.resuming,
+    resume_offset=checkpoint.offset if checkpoint.resuming else None,
+)
 
 
 def scrape_articles():
@@ -71,7 +81,9 @@ def scrape_articles():
                 link_element = article.find_element(
                     By.CSS_SELECTOR, "a.u-clickable-card__link"
                 )
-                link = link_element.get_attribute("href")
+                link = canonicalize(link_element.get_attribute("href"), "Al Jazeera")
+                if checkpoint.seen(link):
+                    continue
                 print(f"Article Link: {link}")
 
                 # Extract the headline
@@ -92,19 +104,19 @@ def scrape_articles():
                 )
                 date = date_element.text if date_element else "Unknown"
 
-                # Append extracted data to the data dictionary
-                data["Source"].append(source)
-                data["Link"].append(link)
-                data["Headline"].append(headline)
-                data["Description"].append(description)
-                data["Date"].append(date)
-                data["Timestamp"].append(datetime.now())
-                data["Region"].append(region)
-                data["Topic"].append(topic)
-                data["Article_Content"].append(
-                    "-"
-                )  # No content extraction in this structure
-                data["Author"].append("-")  # No author extraction in this structure
+                # Append the extracted record to the sink
+                checkpoint.add(link)
+                sink.write({
+                    "Source": source,
+                    "Link": link,
+                    "Headline": headline,
+                    "Description": description,
+                    "Date": date,
+                    "Timestamp": datetime.now(),
+                    "Topic": topic,
+                    "Author": "-",  # No author extraction in this structure
+                    "Article_Content": "-",  # No content extraction in this structure
+                })
 
             except NoSuchElementException as e:
                 print(f"Error scraping article (element not found): {e}")
@@ -133,27 +145,40 @@ def dismiss_cookie_banner():
         print(f"Error dismissing cookie banner: {e}")
 
 
+def show_more():
+    # Wait for the "Show More" button to be clickable, increased wait time to 10 seconds
+    show_more_button = WebDriverWait(driver, 10).until(
+        EC.element_to_be_clickable(
+            (By.CSS_SELECTOR, "button.show-more-button.grid-full-width")
+        )
+    )
+
+    # Click the "Show More" button to load more content
+    show_more_button.click()
+    time.sleep(5)  # Allow time for the new content to load, increased wait time
+
+
 # Dismiss the cookie banner if it exists
 dismiss_cookie_banner()
 
+if checkpoint.resuming:
+    # Replay the "Show More" clicks without re-scraping already committed cards
+    print(f"Resuming after page {checkpoint.page}...")
+    for _ in range(checkpoint.page):
+        show_more()
+
 # Loop for pagination or showing more content
-for i in range(50):
+interrupted = False
+for i in range(checkpoint.page, 50):
     try:
         print(f"Page {i+1}...")
 
         # Scrape articles on the current page
         scrape_articles()
+        # Persist the records and the pagination cursor together
+        checkpoint.commit(i + 1, offset=sink.offset)
 
-        # Wait for the "Show More" button to be clickable, increased wait time to 10 seconds
-        show_more_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable(
-                (By.CSS_SELECTOR, "button.show-more-button.grid-full-width")
-            )
-        )
-
-        # Click the "Show More" button to load more content
-        show_more_button.click()
-        time.sleep(5)  # Allow time for the new content to load, increased wait time
+        show_more()
 
     except TimeoutException:
         print(
@@ -161,12 +186,16 @@ for i in range(50):
         )
         break
     except Exception as e:
-        print(f"Error during pagination: {e}")
+        # Leave the checkpoint open so the next run resumes from here
+        print(f"Error during pagination, rerun to resume: {e}")
+        interrupted = True
         break
 
 # Save data to CSV
-df = pd.DataFrame(data)
-df.to_csv(f"{source}_articles_{topic}.csv", index=False)
+if not interrupted:
+    checkpoint.finish(offset=sink.offset)
+sink.close()
+sink.export_csv(f"{source}_articles_{topic}.csv", columns=LINK_COLUMNS)
 print("Articles scraped successfully!")
 
 # Close the driver
@@ -1,59 +1,19 @@
-import pandas as pd
-import numpy as np
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
+# Thin wrapper kept for the old workflow; see enrich.py for options
+# (worker count, per-host limit, Parquet input/output).
+import logging
+import os
+import sys
 
-topic = input("Enter topic: ")
-
-filename = f"cnn_articles_{topic}.csv"
-df = pd.read_csv(filename)
-
-
-article_links = np.array(df["Link"])
-
-
-article_contents = []
-authors = []
-
-i = 1
-print("Links...")
-for link in article_links:
-    try:
-        response = requests.get(link)
-        print(f"{i} Getting article from link: {link}")
-        i += 1
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        paragraphs = soup.find_all("p")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from enrich import enrich
 
-        article_text = None
-        if paragraphs:
-            article_text = " ".join([para.get_text() for para in paragraphs])
-        else:
-            print("Article not found")
-
-        article_contents.append(article_text)
-
-        author_element = soup.find("span", class_="byline__name")
-        if author_element:
-            author = author_element.get_text().strip()
-        else:
-            author = "CNN"
-            print("Author not found...")
-
-        authors.append(author)
-
-    except Exception as e:
-        print(f"Failed to scrape content for {link}: {e}")
-        article_contents.append("Content could not be scraped")
-        authors.append("CNN")
-
-df["Article_Content"] = article_contents
-df["Author"] = authors
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+topic = input("Enter topic: ")
 
+filename = f"cnn_articles_{topic}.csv"
 output_filename = f"cnn_articles_{topic}.csv"
-df.to_csv(output_filename, index=False)
+
+enrich(filename, output_filename, channel="CNN")
 
 print(f"Updated file saved to {output_filename}")
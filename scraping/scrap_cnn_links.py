@@ -5,15 +5,42 @@ from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import pandas as pd
+from selenium.common.exceptions import TimeoutException
+import os
+import sys
 import time
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from record_sink import RecordSink, LINK_COLUMNS, export_csv
+from checkpoint import CrawlCheckpoint
+from urlcanon import canonicalize
+
 # CNN search results URL
 topic = input("Enter topic: ")
 topic_formatted = topic.strip().replace(' ', '+')
 
-url = f"https://edition.cnn.com/search?q={topic_formatted}&from=0&size=10&page=1&sort=newest&types=article&section="
+PAGE_SIZE = 10
+
+
+def page_url(page):
+    # CNN exposes the result offset in the URL, so any page can be opened directly
+    return (
+        f"https://edition.cnn.com/search?q={topic_formatted}&from={(page - 1) * PAGE_SIZE}"
+        f"&size={PAGE_SIZE}&page={page}&sort=newest&types=article&section="
+    )
+
+
+url = page_url(1)
+
+# Resume an interrupted crawl from its last committed page
+checkpoint = CrawlCheckpoint(f"cnn_articles_{topic}.checkpoint.json", key=f"CNN:{topic}")
+if checkpoint.done:
+    print("This crawl already completed; delete the checkpoint file to start over.")
+    export_csv(f"cnn_articles_{topic}.jsonl", f"cnn_articles_{topic}.csv", columns=LINK_COLUMNS)
+    sys.exit(0)
+if not checkpoint.resuming:
+    checkpoint.reset()
 
 # Setup Selenium WebDriver in headless mode
 chrome_options = Options()
@@ -28,20 +55,12 @@ driver = webdriver.Chrome(
 )
 
 
-driver.get(url)
-time.sleep(3)  # Let the page load
-
-data = {
-    "Source": [],
-    "Link": [],
-    "Headline": [],
-    "Description": [],
-    "Date": [],
-    "Timestamp": [],
-    "Topic": [],
-    "Author": [],
-    "Article_Content": [],
-}
+# Records are appended to disk in small batches instead of being held in memory
+sink = RecordSink(
+    f"cnn_articles_{topic}.jsonl",
+    append=checkpoint.resuming,
+    resume_offset=checkpoint.offset if checkpoint.resuming else None,
+)
 
 
 # Function to scrape articles from the current page
@@ -60,7 +79,9 @@ def scrape_articles():
             source = "CNN"
 
             link_element = article.find_element(By.CSS_SELECTOR, "a.container__link")
-            link = link_element.get_attribute("href")
+            link = canonicalize(link_element.get_attribute("href"), "CNN")
+            if checkpoint.seen(link):
+                continue
 
             print(link)
 
@@ -78,22 +99,43 @@ def scrape_articles():
             )
             description = description_element.text if description_element else None
 
-            # Append data to the dictionary
-            data["Source"].append(source)
-            data["Link"].append(link)
-            data["Headline"].append(headline)
-            data["Description"].append(description)
-            data["Date"].append(date)
+            # Append the record to the sink
+            checkpoint.add(link)
+            sink.write({
+                "Source": source,
+                "Link": link,
+                "Headline": headline,
+                "Description": description,
+                "Date": date,
+                "Timestamp": datetime.now(),
+                "Topic": topic,
+                "Author": "-",
+                "Article_Content": "-",
+            })
 
         except Exception as e:
             print(f"Error scraping article: {e}")
 
 
-scrape_articles()
+def commit_page(page):
+    # Persist the records and the pagination cursor together
+    checkpoint.commit(page, offset=sink.offset)
+
+
+if checkpoint.resuming:
+    print(f"Resuming after page {checkpoint.page}...")
+    driver.get(page_url(checkpoint.page))
+    time.sleep(3)  # Let the page load
+else:
+    driver.get(url)
+    time.sleep(3)  # Let the page load
+    scrape_articles()
+    commit_page(1)
 
 # Pagination loop
 
-for i in range(10):
+interrupted = False
+for i in range(checkpoint.page - 1, 10):
     try:
         print(f"Page {i+1}...")
         # Wait for the "Next Page" button to be clickable (Check if it exists and click)
@@ -107,23 +149,22 @@ for i in range(10):
 
         # Scrape articles from the new page
         scrape_articles()
+        commit_page(i + 2)
 
+    except TimeoutException:
+        print("No more pages to scrape.")
+        break
     except Exception as e:
-        print(f"No more pages to scrape or unable to click the next button: {e}")
+        # Leave the checkpoint open so the next run resumes from here
+        print(f"Crawl interrupted, rerun to resume: {e}")
+        interrupted = True
         break
 
 
-size = len(data["Source"])
-timestamps = [datetime.now() for i in range(size)]
-topics = [topic for i in range(size)]
-
-data["Timestamp"] = timestamps
-data["Topic"] = topics
-data["Article_Content"] = "-"
-data["Author"] = "-"
-
-df = pd.DataFrame(data)
-df.to_csv(f"cnn_articles_{topic}.csv", index=False)
+if not interrupted:
+    checkpoint.finish(offset=sink.offset)
+sink.close()
+sink.export_csv(f"cnn_articles_{topic}.csv", columns=LINK_COLUMNS)
 print("Articles scraped successfully!")
 
 
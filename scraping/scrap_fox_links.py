@@ -5,16 +5,32 @@ from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import pandas as pd
+from selenium.common.exceptions import TimeoutException
+import os
+import sys
 import time
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from record_sink import RecordSink, LINK_COLUMNS, export_csv
+from checkpoint import CrawlCheckpoint
+from urlcanon import canonicalize
+
 # Set the base URL for Fox News search
 topic=input("Enter the topic you want to search for: ")
 processed_topic = topic.strip().replace(' ', '%20')
 url = f"https://www.foxnews.com/search-results/search#q={processed_topic}"
 source = "Fox News"
 
+# Resume an interrupted crawl from its last committed page
+checkpoint = CrawlCheckpoint(f"{source}_articles_{topic}.checkpoint.json", key=f"{source}:{topic}")
+if checkpoint.done:
+    print("This crawl already completed; delete the checkpoint file to start over.")
+    export_csv(f"{source}_articles_{topic}.jsonl", f"{source}_articles_{topic}.csv", columns=LINK_COLUMNS)
+    sys.exit(0)
+if not checkpoint.resuming:
+    checkpoint.reset()
+
 # Setup Selenium WebDriver in headless mode
 chrome_options = Options()
 chrome_options.add_argument("--headless")  # Run headless Chrome
@@ -41,17 +57,12 @@ driver = webdriver.Chrome(
 
 # time.sleep(3)  # Allow the search results to load
 
-data = {
-    "Source": [],
-    "Link": [],
-    "Headline": [],
-    "Description": [],
-    "Date": [],
-    "Timestamp": [],
-    "Topic": [],
-    "Author": [],
-    "Article_Content": [],
-}
+# Records are appended to disk in small batches instead of being held in memory
+sink = RecordSink(
+    f"{source}_articles_{topic}.jsonl",
+    append=checkpoint.resuming,
+    resume_offset=checkpoint.offset if checkpoint.resuming else None,
+)
 
 
 def scrape_articles():
@@ -71,7 +82,9 @@ def scrape_articles():
         try:
             # Fetch the article link correctly from the <h2 class="title"><a href="">
             link_element = article.find_element(By.CSS_SELECTOR, "h2.title a")
-            link = link_element.get_attribute("href") if link_element else None
+            link = canonicalize(link_element.get_attribute("href") if link_element else None, "Fox News")
+            if checkpoint.seen(link):
+                continue
             print(f"Article Link: {link}")
 
             # Fetch the article headline
@@ -87,47 +100,78 @@ def scrape_articles():
             date_element = article.find_element(By.CSS_SELECTOR, "span.time")
             date = date_element.text if date_element else "Unknown"
 
-            # Add the extracted data to the dictionary
-            data["Source"].append(source)
-            data["Link"].append(link)
-            data["Headline"].append(headline)
-            data["Description"].append(description)
-            data["Date"].append(date)
-            data["Timestamp"].append(datetime.now())
-            data["Topic"].append(topic)
-            data["Article_Content"].append("-")
-            data["Author"].append("-")
+            # Append the extracted record to the sink
+            checkpoint.add(link)
+            sink.write({
+                "Source": source,
+                "Link": link,
+                "Headline": headline,
+                "Description": description,
+                "Date": date,
+                "Timestamp": datetime.now(),
+                "Topic": topic,
+                "Author": "-",
+                "Article_Content": "-",
+            })
 
         except Exception as e:
             print(f"Error scraping article: {e}")
 
 
-scrape_articles()
+def load_more():
+    # Wait for the "Load More" button to be clickable
+    load_more_button = WebDriverWait(driver, 10).until(
+        EC.element_to_be_clickable((By.CSS_SELECTOR, "div.button.load-more a"))
+    )
+
+    # Click the "Load More" button to load more content
+    load_more_button.click()
+    time.sleep(3)  # Allow time for the new content to load
+
+
+def commit_page(page):
+    # Persist the records and the pagination cursor together
+    checkpoint.commit(page, offset=sink.offset)
+
+
+driver.get(url)
+
+if checkpoint.resuming:
+    # Results only grow by clicking "Load More", so replay the clicks without
+    # re-scraping; cards that were already collected are skipped anyway
+    print(f"Resuming after page {checkpoint.page}...")
+    for _ in range(checkpoint.page - 1):
+        load_more()
+else:
+    scrape_articles()
+    commit_page(1)
 
 # Loop for pagination or showing more content
-for i in range(5):
+interrupted = False
+for i in range(checkpoint.page - 1, 5):
     try:
         print(f"Page {i+1}...")
 
-        # Wait for the "Load More" button to be clickable
-        load_more_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, "div.button.load-more a"))
-        )
-
-        # Click the "Load More" button to load more content
-        load_more_button.click()
-        time.sleep(3)  # Allow time for the new content to load
+        load_more()
 
         # Scrape articles or load more content
         scrape_articles()
+        commit_page(i + 2)
 
+    except TimeoutException:
+        print("No more content to load.")
+        break
     except Exception as e:
-        print(f"No more content to load or unable to click the 'Load More' button: {e}")
+        # Leave the checkpoint open so the next run resumes from here
+        print(f"Crawl interrupted, rerun to resume: {e}")
+        interrupted = True
         break
 
 # Save the data to a CSV file
-df = pd.DataFrame(data)
-df.to_csv(f"{source}_articles_{topic}.csv", index=False)
+if not interrupted:
+    checkpoint.finish(offset=sink.offset)
+sink.close()
+sink.export_csv(f"{source}_articles_{topic}.csv", columns=LINK_COLUMNS)
 print("Articles scraped successfully!")
 
 # Close the driver
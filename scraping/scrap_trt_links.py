@@ -5,14 +5,31 @@ from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import pandas as pd
+from selenium.common.exceptions import TimeoutException
+import os
+import sys
 import time
 from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from record_sink import RecordSink, LINK_COLUMNS, export_csv
+from checkpoint import CrawlCheckpoint
+from urlcanon import canonicalize
+
 topic=input("Enter the topic you want to search for: ")
 processed_topic = topic.strip().replace(' ', '%20')
 
 url = f"https://www.trtworld.com/search?q={processed_topic}"
 
+# Resume an interrupted crawl from its last committed page
+checkpoint = CrawlCheckpoint(f"trt_articles_{topic}.checkpoint.json", key=f"TRT World:{topic}")
+if checkpoint.done:
+    print("This crawl already completed; delete the checkpoint file to start over.")
+    export_csv(f"trt_articles_{topic}.jsonl", f"trt_articles_{topic}.csv", columns=LINK_COLUMNS)
+    sys.exit(0)
+if not checkpoint.resuming:
+    checkpoint.reset()
+
 
 chrome_options = Options()
 chrome_options.add_argument("--headless")
@@ -23,20 +40,12 @@ driver = webdriver.Chrome(
     service=ChromeService(ChromeDriverManager().install()), options=chrome_options
 )
 
-driver.get(url)
-time.sleep(3)
-
-data = {
-    "Source": [],
-    "Link": [],
-    "Headline": [],
-    "Description": [],
-    "Date": [],
-    "Timestamp": [],
-    "Topic": [],
-    "Author": [],
-    "Article_Content": [],
-}
+# Records are appended to disk in small batches instead of being held in memory
+sink = RecordSink(
+    f"trt_articles_{topic}.jsonl",
+    append=checkpoint.resuming,
+    resume_offset=checkpoint.offset if checkpoint.resuming else None,
+)
 
 
 def scrape_articles():
@@ -57,7 +66,9 @@ def scrape_articles():
             source = "TRT World"
 
             link_element = article.find_element(By.TAG_NAME, "a")
-            link = link_element.get_attribute("href")
+            link = canonicalize(link_element.get_attribute("href"), "TRT News")
+            if checkpoint.seen(link):
+                continue
             print(f"Article Link: {link}")
 
             headline_element = article.find_element(
@@ -73,47 +84,73 @@ def scrape_articles():
             )
             description = description_element.text if description_element else None
 
-            data["Source"].append(source)
-            data["Link"].append(link)
-            data["Headline"].append(headline)
-            data["Description"].append(description)
-            data["Date"].append(date)
-            data["Timestamp"].append(datetime.now)
-            data["Topic"].append(topic)
-            data["Article_Content"].append("-")
-            data["Author"].append("-")
+            checkpoint.add(link)
+            sink.write({
+                "Source": source,
+                "Link": link,
+                "Headline": headline,
+                "Description": description,
+                "Date": date,
+                "Timestamp": datetime.now(),
+                "Topic": topic,
+                "Author": "-",
+                "Article_Content": "-",
+            })
 
         except Exception as e:
             print(f"Error scraping article: {e}")
 
 
-scrape_articles()
+def load_more():
+    load_more_button = WebDriverWait(driver, 10).until(
+        EC.element_to_be_clickable((By.CLASS_NAME, "btn-loadmore"))
+    )
 
-for i in range(50):
-    try:
-        print(f"Loading more articles, attempt {i+1}...")
+    load_more_button.click()
+
+    time.sleep(3)
 
-        load_more_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.CLASS_NAME, "btn-loadmore"))
-        )
 
-        load_more_button.click()
+def commit_page(page):
+    # Persist the records and the pagination cursor together
+    checkpoint.commit(page, offset=sink.offset)
 
-        time.sleep(3)
+
+driver.get(url)
+time.sleep(3)
+
+if checkpoint.resuming:
+    # Replay the "load more" clicks without re-scraping already committed cards
+    print(f"Resuming after page {checkpoint.page}...")
+    for _ in range(checkpoint.page - 1):
+        load_more()
+else:
+    scrape_articles()
+    commit_page(1)
+
+interrupted = False
+for i in range(checkpoint.page - 1, 50):
+    try:
+        print(f"Loading more articles, attempt {i+1}...")
+
+        load_more()
 
         scrape_articles()
+        commit_page(i + 2)
 
+    except TimeoutException:
+        print("No more content to load.")
+        break
     except Exception as e:
-        print(f"No more content to load or unable to click the button: {e}")
+        # Leave the checkpoint open so the next run resumes from here
+        print(f"Crawl interrupted, rerun to resume: {e}")
+        interrupted = True
         break
 
-size = len(data["Source"])
-timestamps = [datetime.now() for _ in range(size)]
-topics = [topic for _ in range(size)]
-
-
-df = pd.DataFrame(data)
-df.to_csv(f"trt_articles_{topic}.csv", index=False)
+if not interrupted:
+    checkpoint.finish(offset=sink.offset)
+sink.close()
+sink.export_csv(f"trt_articles_{topic}.csv", columns=LINK_COLUMNS)
 print("Articles scraped successfully!")
 
 driver.quit()
@@ -1,51 +1,18 @@
-import pandas as pd
-import numpy as np
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
+# Thin wrapper kept for the old workflow; see enrich.py for options
+# (worker count, per-host limit, Parquet input/output).
+import logging
+import os
+import sys
 
-filename = "trt_articles_Merged.csv"
-df = pd.read_csv(filename)
-topic = input("Enter topic: ")
-
-article_links = np.array(df["Link"])
-
-
-article_contents = []
-authors = []
-
-i = 1
-for link in article_links:
-    try:
-        response = requests.get(link)
-        print(f"{i} Getting article from link: {link}")
-        i += 1
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        paragraphs = soup.find_all("p")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from enrich import enrich
 
-        article_text = None
-        if paragraphs:
-            article_text = " ".join([para.get_text() for para in paragraphs])
-        else:
-            print("Article not found")
-
-        article_contents.append(article_text)
-
-        author = "TRT World"
-
-        authors.append(author)
-
-    except Exception as e:
-        print(f"Failed to scrape content for {link}: {e}")
-        article_contents.append("Content could not be scraped")
-        authors.append("Unknown")
-
-df["Article_Content"] = article_contents
-df["Author"] = authors
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+filename = "trt_articles_Merged.csv"
+topic = input("Enter topic: ")
 
 output_filename = f"trt_articles_{topic}.csv"
-df.to_csv(output_filename, index=False)
+enrich(filename, output_filename, channel="TRT News")
 
 print(f"Updated file saved to {output_filename}")
@@ -0,0 +1,358 @@
+# semantic.py
+"""
+Semantic similarity index over article embeddings.
+
+`utils.get_keywords` embeds each article's whole text with the sentence
+model to rank its keywords; `utils.analyze_text` now returns that
+embedding and `AnalysisCache.add` hands it to an `EmbeddingIndex`. Vectors
+are L2-normalized and kept as an append-only float16 matrix (1.5 KB per
+article at 768 dimensions) next to a list of their URLs and channels, so
+the most similar articles are those with the largest dot product.
+
+Below IVF_MIN_SIZE vectors every search is exact. Above it, an inverted
+file (IVF) index clusters the vectors with k-means into about sqrt(N)
+lists and a search only scores the vectors in the `nprobe` lists whose
+centroids are closest to the query: more probes give better recall at a
+higher cost (see benchmarks/bench_semantic.py and the README). New vectors
+join their nearest list as they are added; the centroids are retrained
+once the index has doubled since they were last trained.
+
+Usage:
+    python semantic.py backfill            # embed stored articles missing from the index
+    python semantic.py query "flooding in south asia" -k 10
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+from models import KEYWORD_MODEL
+from urlcanon import canonicalize
+
+DEFAULT_DIR = os.environ.get("NEWS_EMBEDDINGS_DIR", "embeddings")
+IVF_MIN_SIZE = 5_000
+NPROBE = 16
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 50_000
+
+_VECTORS = "vectors.f16"
+_KEYS = "keys.tsv"
+_META = "meta.json"
+_IVF = "ivf.npz"
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 8192) -> np.ndarray:
+    """Index of the closest centroid (by dot product) for each row."""
+    out = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), chunk):
+        block = vectors[start:start + chunk].astype(np.float32)
+        out[start:start + chunk] = (block @ centroids.T).argmax(axis=1)
+    return out
+
+
+def kmeans(vectors: np.ndarray, k: int, iterations: int = KMEANS_ITERATIONS,
+           seed: int = 0) -> np.ndarray:
+    """Spherical k-means on unit vectors; returns `k` unit centroids (float32)."""
+    rng = np.random.default_rng(seed)
+    if len(vectors) > KMEANS_SAMPLE:
+        vectors = vectors[rng.choice(len(vectors), KMEANS_SAMPLE, replace=False)]
+    vectors = vectors.astype(np.float32)
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = _nearest(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        empty = ~sums.any(axis=1)
+        # Re-seed empty clusters with random points
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        centroids = normalize(sums)
+    return centroids
+
+
+class EmbeddingIndex:
+    """
+    Persistent embedding index in `directory`. Adding a URL again replaces
+    its vector (the old row stays on disk but is never returned). Searches
+    return (url, channel, similarity) tuples, best first.
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIR, model: str = KEYWORD_MODEL,
+                 nprobe: int = NPROBE):
+        self.directory = directory
+        self.model = model
+        self.nprobe = nprobe
+        self.dim = None
+        self._size = 0
+        # Row-aligned arrays, grown by doubling; only the first _size rows are used
+        self._vectors = np.empty((0, 0), dtype=np.float16)
+        self._codes = np.empty(0, dtype=np.int16)
+        self._assign = np.empty(0, dtype=np.int32)
+        self._urls = []
+        self._rows = {}
+        self._channels = []
+        self._channel_codes = {}
+        self._centroids = None
+        self._trained_size = 0
+        self._lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load(self):
+        meta_path = self._path(_META)
+        if not os.path.exists(meta_path):
+            return
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["model"] != self.model:
+            # Never discard stored vectors: re-embedding them all is expensive
+            raise ValueError(f"Embeddings in {self.directory} were made with {meta['model']}, "
+                             f"not {self.model}; move the directory aside (or set "
+                             f"NEWS_EMBEDDINGS_DIR) and run `python semantic.py backfill`")
+        self.dim = meta["dim"]
+        vectors = np.empty(0, dtype="<f2")
+        if os.path.exists(self._path(_VECTORS)):
+            vectors = np.fromfile(self._path(_VECTORS), dtype="<f2")
+        lines = []
+        if os.path.exists(self._path(_KEYS)):
+            with open(self._path(_KEYS), "r", encoding="utf-8") as f:
+                lines = f.read().split("\n")
+        torn = lines.pop() != "" if lines else False
+        # A crash between the two appends leaves one file longer; trim both
+        n = min(len(vectors) // self.dim, len(lines))
+        if n * self.dim != len(vectors):
+            with open(self._path(_VECTORS), "r+b") as f:
+                f.truncate(n * self.dim * 2)
+        keys = [line.split("\t", 1) for line in lines[:n]]
+        if torn or n != len(lines):
+            self._write_keys(keys)
+        self._grow(n)
+        self._vectors[:n] = vectors[:n * self.dim].reshape(n, self.dim)
+        self._append_keys([u for _, u in keys], [c for c, _ in keys])
+        self._size = n
+        if os.path.exists(self._path(_IVF)):
+            ivf = np.load(self._path(_IVF))
+            self._centroids = ivf["centroids"]
+            self._trained_size = int(ivf["trained_size"])
+            assign = ivf["assign"][:n]
+            self._assign[:len(assign)] = assign
+            self._assign[len(assign):n] = _nearest(self._vectors[len(assign):n], self._centroids)
+
+    def _write_keys(self, keys):
+        tmp = self._path(_KEYS) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(f"{channel}\t{url}\n" for channel, url in keys)
+        os.replace(tmp, self._path(_KEYS))
+
+    def _grow(self, needed: int):
+        if needed <= len(self._vectors):
+            return
+        capacity = max(needed, 2 * len(self._vectors), 1024)
+        vectors = np.empty((capacity, self.dim), dtype=np.float16)
+        codes = np.empty(capacity, dtype=np.int16)
+        assign = np.empty(capacity, dtype=np.int32)
+        if self._size:
+            vectors[:self._size] = self._vectors[:self._size]
+            codes[:self._size] = self._codes[:self._size]
+            assign[:self._size] = self._assign[:self._size]
+        self._vectors, self._codes, self._assign = vectors, codes, assign
+
+    def _append_keys(self, urls: list[str], channels: list[str]):
+        """Register rows _size .. _size + len(urls) - 1."""
+        for offset, (url, channel) in enumerate(zip(urls, channels)):
+            row = self._size + offset
+            code = self._channel_codes.setdefault(channel, len(self._channel_codes))
+            self._codes[row] = code
+            self._urls.append(url)
+            self._channels.append(channel)
+            self._rows[url] = row
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, url: str) -> bool:
+        return canonicalize(url) in self._rows
+
+    # -- writes --
+
+    def add(self, url: str, channel: str, embedding: np.ndarray):
+        self.add_many([url], [channel], [embedding])
+
+    def add_many(self, urls: list[str], channels: list[str], embeddings):
+        """Append vectors (any float dtype, normalized here) for `urls`."""
+        if not len(urls):
+            return
+        vectors = normalize(embeddings).astype(np.float16)
+        urls = [canonicalize(u) for u in urls]
+        channels = [c or "" for c in channels]
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                with open(self._path(_META), "w", encoding="utf-8") as f:
+                    json.dump({"model": self.model, "dim": self.dim}, f)
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-dimensional embeddings, got {vectors.shape[1]}")
+            with open(self._path(_VECTORS), "ab") as f:
+                f.write(vectors.astype("<f2").tobytes())
+            with open(self._path(_KEYS), "a", encoding="utf-8") as f:
+                f.writelines(f"{channel}\t{url}\n" for channel, url in zip(channels, urls))
+            needed = self._size + len(vectors)
+            self._grow(needed)
+            self._vectors[self._size:needed] = vectors
+            if self._centroids is not None:
+                self._assign[self._size:needed] = _nearest(vectors, self._centroids)
+            self._append_keys(urls, channels)
+            self._size = needed
+            if self._size >= IVF_MIN_SIZE and self._size >= 2 * self._trained_size:
+                self.train()
+
+    def train(self, save: bool = True):
+        """(Re)build the IVF lists over every stored vector; `save=False` keeps them in memory only."""
+        with self._lock:
+            vectors = self._vectors[:self._size]
+            self._centroids = kmeans(vectors, max(1, int(np.sqrt(self._size))))
+            self._assign[:self._size] = _nearest(vectors, self._centroids)
+            self._trained_size = self._size
+            if save:
+                self._save_ivf()
+
+    def _save_ivf(self):
+        if self._centroids is None:
+            return
+        tmp = self._path(_IVF) + ".tmp.npz"
+        np.savez(tmp, centroids=self._centroids, assign=self._assign[:self._size],
+                 trained_size=np.int64(self._trained_size))
+        os.replace(tmp, self._path(_IVF))
+
+    def flush(self):
+        """Save the IVF list assignments of vectors added since training."""
+        with self._lock:
+            self._save_ivf()
+
+    def close(self):
+        self.flush()
+
+    # -- reads --
+
+    def get(self, url: str) -> np.ndarray:
+        row = self._rows.get(canonicalize(url))
+        return None if row is None else self._vectors[row].astype(np.float32)
+
+    def search(self, embedding: np.ndarray, k: int = 10, channel: str = None,
+               exclude_channel: str = None, exclude_url: str = None,
+               nprobe: int = None, exact: bool = False) -> list[tuple]:
+        """
+        The `k` stored articles most similar to `embedding`, optionally only
+        from `channel` or not from `exclude_channel`. `exact` scans every
+        vector instead of the `nprobe` nearest IVF lists.
+        """
+        query = normalize(embedding)[0]
+        exclude_url = canonicalize(exclude_url) if exclude_url else None
+        with self._lock:
+            if not self._size:
+                return []
+            if exact or self._centroids is None:
+                rows = np.arange(self._size)
+            else:
+                probes = np.argpartition(-(self._centroids @ query), (nprobe or self.nprobe) - 1)
+                probes = probes[:nprobe or self.nprobe]
+                rows = np.flatnonzero(np.isin(self._assign[:self._size], probes))
+            if channel is not None:
+                rows = rows[self._codes[rows] == self._channel_codes.get(channel, -1)]
+            if exclude_channel is not None:
+                rows = rows[self._codes[rows] != self._channel_codes.get(exclude_channel, -1)]
+            if not len(rows):
+                return []
+            scores = self._vectors[rows].astype(np.float32) @ query
+            # Take the top few and widen only if replaced rows crowd them out
+            m = min(len(scores), k + 16)
+            while True:
+                top = np.argpartition(-scores, m - 1)[:m] if m < len(scores) else np.arange(len(scores))
+                results = []
+                for i in top[np.argsort(-scores[top])]:
+                    row = rows[i]
+                    url = self._urls[row]
+                    if self._rows[url] != row or url == exclude_url:
+                        continue
+                    results.append((url, self._channels[row], float(scores[i])))
+                    if len(results) == k:
+                        return results
+                if m == len(scores):
+                    return results
+                m = min(len(scores), m * 4)
+
+    def similar(self, url: str, k: int = 5, other_channels: bool = True,
+                embedding: np.ndarray = None) -> list[tuple]:
+        """Articles similar to a stored one; by default only from other channels."""
+        url = canonicalize(url)
+        if embedding is None:
+            embedding = self.get(url)
+        if embedding is None:
+            return []
+        row = self._rows.get(url)
+        channel = self._channels[row] if row is not None else None
+        return self.search(embedding, k, exclude_channel=channel if other_channels else None,
+                           exclude_url=url)
+
+
+def backfill(store, index: EmbeddingIndex, batch_size: int = 64) -> int:
+    """Embed stored articles that have text but no vector yet; returns how many."""
+    from utils import embed_texts
+
+    rows = [r for r in store.texts() if r["url"] not in index]
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        index.add_many([r["url"] for r in batch], [r["channel"] for r in batch],
+                       embed_texts([r["text"] for r in batch]))
+    index.flush()
+    return len(rows)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Semantic search over stored articles.")
+    parser.add_argument("--dir", default=DEFAULT_DIR, help="Embedding index directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    fill = commands.add_parser("backfill", help="Embed stored articles missing from the index")
+    fill.add_argument("--store", default=None, help="Article store path")
+    query = commands.add_parser("query", help="Find stored articles about a topic")
+    query.add_argument("text")
+    query.add_argument("-k", type=int, default=10)
+    query.add_argument("--channel")
+    query.add_argument("--exact", action="store_true", help="Scan every vector instead of the IVF lists")
+    args = parser.parse_args()
+
+    with EmbeddingIndex(args.dir) as index:
+        if args.command == "backfill":
+            from store import DEFAULT_PATH, ArticleStore
+
+            with ArticleStore(args.store or DEFAULT_PATH) as store:
+                print(f"Embedded {backfill(store, index)} articles; {len(index)} in the index")
+        else:
+            from utils import embed_texts
+
+            for url, channel, score in index.search(embed_texts([args.text])[0], args.k,
+                                                    channel=args.channel, exact=args.exact):
+                print(f"{score:.3f}  {channel:<11} {url}")
+
+
+if __name__ == "__main__":
+    main()
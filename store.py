@@ -0,0 +1,374 @@
+# store.py
+"""
+Local article store (SQLite).
+
+The system of record for fetched and analyzed articles, keyed by canonical
+URL (see urlcanon.py). A row holds the channel, extracted text and its
+content hash, the analysis outputs with the versions of the models that
+produced them, the MinHash signature used for near-duplicate detection and
+fetch/analysis timestamps. `article_topics` records which topic searches
+returned which articles, and when. `articles_fts` is an FTS5 full-text
+index over headlines and text, kept up to date by triggers, so stored
+coverage can be searched without scraping.
+
+The database runs in WAL mode, so the app, the monitor and batch jobs can
+read while one of them writes. Writes are batched: `write` buffers rows
+and `upsert` applies a batch in a single transaction.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+from urlcanon import canonicalize
+
+DEFAULT_PATH = os.environ.get("NEWS_STORE_PATH", "articles.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    url TEXT PRIMARY KEY,
+    channel TEXT,
+    headline TEXT,
+    author TEXT,
+    published_at TEXT,
+    text TEXT,
+    content_hash TEXT,
+    sentiment TEXT,
+    score REAL,
+    summary TEXT,
+    keywords TEXT,
+    models TEXT,
+    signature BLOB,
+    fetched_at TEXT,
+    analyzed_at TEXT,
+    first_seen_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS articles_content_hash ON articles(content_hash);
+CREATE INDEX IF NOT EXISTS articles_channel ON articles(channel, fetched_at);
+
+CREATE TABLE IF NOT EXISTS article_topics (
+    topic TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    url TEXT NOT NULL,
+    seen_at TEXT NOT NULL,
+    PRIMARY KEY (topic, channel, url)
+);
+"""
+
+# External-content FTS5 index: the text lives only in `articles`. The update
+# trigger only fires when the indexed columns change, not on analysis writes.
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE articles_fts USING fts5(
+    headline, text, content='articles', content_rowid='rowid',
+    tokenize='porter unicode61'
+);
+CREATE TRIGGER articles_fts_insert AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, headline, text) VALUES (new.rowid, new.headline, new.text);
+END;
+CREATE TRIGGER articles_fts_delete AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, headline, text)
+    VALUES ('delete', old.rowid, old.headline, old.text);
+END;
+CREATE TRIGGER articles_fts_update AFTER UPDATE OF headline, text ON articles
+WHEN old.headline IS NOT new.headline OR old.text IS NOT new.text BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, headline, text)
+    VALUES ('delete', old.rowid, old.headline, old.text);
+    INSERT INTO articles_fts (rowid, headline, text) VALUES (new.rowid, new.headline, new.text);
+END;
+"""
+
+# bm25 column weights: a match in the headline counts twice
+SEARCH_WEIGHTS = (2.0, 1.0)
+
+# Columns a caller may set; first_seen_at/updated_at are maintained here
+COLUMNS = [
+    "url",
+    "channel",
+    "headline",
+    "author",
+    "published_at",
+    "text",
+    "content_hash",
+    "sentiment",
+    "score",
+    "summary",
+    "keywords",
+    "models",
+    "signature",
+    "fetched_at",
+    "analyzed_at",
+]
+_JSON_COLUMNS = ("keywords", "models")
+
+
+def now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def age_seconds(timestamp: str) -> float:
+    """Seconds since an ISO timestamp written by the store."""
+    return (datetime.now(timezone.utc) - datetime.fromisoformat(timestamp)).total_seconds()
+
+
+def content_hash(text: str) -> str:
+    normalized = " ".join((text or "").split())
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def normalize_topic(topic: str) -> str:
+    return " ".join((topic or "").lower().split())
+
+
+def _decode(row: sqlite3.Row) -> dict:
+    record = dict(row)
+    for column in _JSON_COLUMNS:
+        if record.get(column) is not None:
+            record[column] = json.loads(record[column])
+    return record
+
+
+class ArticleStore:
+    """
+    Thread-safe handle on the store. Rows passed to `upsert`/`write` are
+    dicts with any subset of COLUMNS plus `url`; columns missing from a row
+    (or None) keep their stored value.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, batch_size: int = 100):
+        self.path = path
+        self.batch_size = batch_size
+        self._pending = []
+        self._lock = threading.RLock()
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        # Autocommit mode; batches use explicit transactions
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self.searchable = self._create_search_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+    def _create_search_index(self) -> bool:
+        exists = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'articles_fts'"
+        ).fetchone()
+        if exists:
+            return True
+        # One transaction; the rebuild indexes articles stored before the index existed
+        try:
+            self._conn.executescript(
+                "BEGIN;" + SEARCH_SCHEMA
+                + "INSERT INTO articles_fts (articles_fts) VALUES ('rebuild'); COMMIT;"
+            )
+        except sqlite3.OperationalError as e:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            logging.warning(f"Full-text search unavailable (SQLite without FTS5?): {e}")
+            return False
+        return True
+
+    def rebuild_search_index(self):
+        """Re-index every article (e.g. after a VACUUM, which may renumber rowids)."""
+        with self._lock:
+            self._conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+
+    # -- writes --
+
+    def upsert(self, rows: list[dict]):
+        """Insert or update `rows` in one transaction."""
+        if not rows:
+            return
+        stamp = now()
+        params = []
+        for row in rows:
+            values = []
+            for column in COLUMNS:
+                value = row.get(column)
+                if column == "url":
+                    value = canonicalize(value)
+                elif column in _JSON_COLUMNS and value is not None:
+                    value = json.dumps(value, sort_keys=True)
+                values.append(value)
+            params.append(values + [stamp, stamp])
+        updates = ", ".join(
+            f"{c} = COALESCE(excluded.{c}, articles.{c})" for c in COLUMNS if c != "url"
+        )
+        sql = (
+            f"INSERT INTO articles ({', '.join(COLUMNS)}, first_seen_at, updated_at) "
+            f"VALUES ({', '.join('?' * (len(COLUMNS) + 2))}) "
+            f"ON CONFLICT(url) DO UPDATE SET {updates}, updated_at = excluded.updated_at"
+        )
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(sql, params)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def write(self, row: dict):
+        """Buffer a row; the buffer is upserted every `batch_size` rows and on `flush`."""
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            rows, self._pending = self._pending, []
+            self.upsert(rows)
+
+    def save_article(self, url: str, channel: str, text: str, **fields):
+        """Upsert a freshly fetched article immediately."""
+        self.upsert([{
+            "url": url,
+            "channel": channel,
+            "text": text,
+            "content_hash": content_hash(text),
+            "fetched_at": now(),
+            **fields,
+        }])
+
+    def save_analysis(self, url: str, analysis: dict, models: dict, **fields):
+        """Upsert analysis outputs (sentiment, score, summary, keywords, ...) with their model versions."""
+        self.upsert([{"url": url, **analysis, **fields, "models": models, "analyzed_at": now()}])
+
+    def add_links(self, channel: str, topic: str, urls: list[str], headlines: list[str] = None):
+        """
+        Record that a `topic` search on `channel` returned `urls`; search
+        result `headlines` fill in articles that have none yet.
+        """
+        stamp = now()
+        topic = normalize_topic(topic)
+        headlines = headlines or [None] * len(urls)
+        params = [(topic, channel, canonicalize(u), stamp) for u in urls]
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO articles (url, channel, headline, first_seen_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?) ON CONFLICT(url) DO UPDATE SET "
+                    "headline = COALESCE(articles.headline, excluded.headline)",
+                    [(url, channel, headline, stamp, stamp)
+                     for (_, _, url, _), headline in zip(params, headlines)],
+                )
+                self._conn.executemany(
+                    "INSERT INTO article_topics (topic, channel, url, seen_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(topic, channel, url) DO UPDATE SET seen_at = excluded.seen_at",
+                    params,
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # -- reads --
+
+    def _query(self, sql: str, params=()) -> list[dict]:
+        with self._lock:
+            return [_decode(row) for row in self._conn.execute(sql, params)]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def get(self, url: str) -> dict:
+        rows = self._query("SELECT * FROM articles WHERE url = ?", (canonicalize(url),))
+        return rows[0] if rows else None
+
+    def find_by_hash(self, digest: str) -> list[dict]:
+        return self._query("SELECT * FROM articles WHERE content_hash = ?", (digest,))
+
+    def texts(self) -> list[dict]:
+        """url, channel and text of every article that has text."""
+        return self._query("SELECT url, channel, text FROM articles WHERE text IS NOT NULL")
+
+    def topic_articles(self, channel: str, topic: str, max_age: float = None,
+                       analyzed_only: bool = False, limit: int = None) -> list[dict]:
+        """
+        Articles a `topic` search on `channel` returned, most recently seen
+        first. `max_age` (seconds) keeps only links seen that recently.
+        Each row also carries the `seen_at` time of the search.
+        """
+        sql = (
+            "SELECT a.*, t.seen_at FROM article_topics t JOIN articles a ON a.url = t.url "
+            "WHERE t.topic = ? AND t.channel = ?"
+        )
+        params = [normalize_topic(topic), channel]
+        if max_age is not None:
+            cutoff = (datetime.now(timezone.utc) - timedelta(seconds=max_age)).isoformat(timespec="seconds")
+            sql += " AND t.seen_at >= ?"
+            params.append(cutoff)
+        if analyzed_only:
+            sql += " AND a.analyzed_at IS NOT NULL"
+        sql += " ORDER BY t.seen_at DESC, a.first_seen_at DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self._query(sql, params)
+
+    def search(self, query: str, channel: str = None, limit: int = 50,
+               analyzed_only: bool = False) -> list[dict]:
+        """
+        Full-text search over stored headlines and text, best match first.
+        `query` uses FTS5 syntax: words (stemmed, all required), "exact
+        phrases", OR, NOT, parentheses and NEAR(a b, 10). Rows carry the
+        article columns except the text, plus `rank` (lower is better) and
+        a highlighted `snippet`. Raises ValueError for a malformed query.
+        """
+        if not self.searchable:
+            raise RuntimeError("This SQLite build has no FTS5; full-text search is unavailable")
+        columns = ", ".join(f"a.{c}" for c in COLUMNS if c not in ("text", "signature"))
+        sql = (
+            f"SELECT {columns}, a.first_seen_at, bm25(articles_fts, ?, ?) AS rank, "
+            "snippet(articles_fts, 1, '**', '**', ' ... ', 24) AS snippet "
+            "FROM articles_fts JOIN articles a ON a.rowid = articles_fts.rowid "
+            "WHERE articles_fts MATCH ?"
+        )
+        params = [*SEARCH_WEIGHTS, query]
+        if channel is not None:
+            sql += " AND a.channel = ?"
+            params.append(channel)
+        if analyzed_only:
+            sql += " AND a.analyzed_at IS NOT NULL"
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+        try:
+            return self._query(sql, params)
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid search query {query!r}: {e}") from None
+
+    def signatures(self, models: dict = None):
+        """
+        Yield the analysis columns of analyzed rows that have a MinHash
+        signature (not the text), optionally only those produced by `models`.
+        """
+        sql = (
+            "SELECT url, channel, sentiment, score, summary, keywords, models, signature, analyzed_at "
+            "FROM articles WHERE signature IS NOT NULL AND analyzed_at IS NOT NULL"
+        )
+        params = ()
+        if models is not None:
+            sql += " AND models = ?"
+            params = (json.dumps(models, sort_keys=True),)
+        yield from self._query(sql, params)
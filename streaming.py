@@ -0,0 +1,107 @@
+# streaming.py
+"""
+Streaming article downloads with early termination.
+
+Instead of downloading the whole page and then parsing it, the response
+body is read in chunks and fed to an incremental HTMLParser that only
+watches for two things: the channel's article container closing (`article`
+for BBC, `main` for Fox and Al Jazeera, `div.story__content` for Dawn), or
+a JSON-LD article with a non-empty articleBody, which is the object
+`extract_jsonld` picks. As soon as either happens the rest of the page
+(related stories, footers, trailing scripts) is not downloaded.
+The prefix read so far is then handed to the usual extractors. Stopped on
+a JSON-LD hit, the text is the same as with a full download. Stopped on
+the container, it is the DOM extractor's text: a JSON-LD articleBody placed
+after the container is never read, although a full download would prefer
+it (benchmarks/bench_stream.py counts such pages separately). CNN and TRT
+take every <p> on the page, so for them only a JSON-LD hit can stop the
+read early.
+"""
+
+import codecs
+from html.parser import HTMLParser
+
+from extractors import jsonld_article, parse_article
+
+# Channel -> (tag, class) of the container its DOM extractor reads
+CONTAINERS = {
+    "BBC": ("article", None),
+    "Dawn News": ("div", "story__content"),
+    "Fox News": ("main", None),
+    "Al Jazeera": ("main", None),
+}
+
+
+class ArticleBoundaryParser(HTMLParser):
+    """Sets `complete` once the first target container closes or JSON-LD articleBody is seen."""
+
+    def __init__(self, container: tuple = None):
+        super().__init__(convert_charrefs=False)
+        self.container = container
+        self.complete = False
+        self._depth = 0
+        self._script = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "script":
+            if (dict(attrs).get("type") or "").lower() == "application/ld+json":
+                self._script = []
+            return
+        if self.container is None or tag != self.container[0]:
+            return
+        if self._depth:
+            self._depth += 1
+            return
+        wanted = self.container[1]
+        classes = (dict(attrs).get("class") or "").split()
+        if wanted is None or wanted in classes:
+            self._depth = 1
+
+    def handle_endtag(self, tag):
+        if tag == "script":
+            if self._script is not None:
+                article = jsonld_article("".join(self._script))
+                self._script = None
+                if article and article["body"]:
+                    self.complete = True
+            return
+        if self._depth and tag == self.container[0]:
+            self._depth -= 1
+            if not self._depth:
+                self.complete = True
+
+    def handle_data(self, data):
+        if self._script is not None:
+            self._script.append(data)
+
+
+def read_article_html(resp, channel: str, chunk_size: int = 16384) -> str:
+    """
+    Read a streamed response until the article is complete (or the body
+    ends) and return the HTML read so far. Suitable as a scheduler `reader`.
+    """
+    parser = ArticleBoundaryParser(CONTAINERS.get(channel))
+    encoding = resp.encoding or "utf-8"
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        # A charset Python does not know; resp.text falls back the same way
+        encoding = "utf-8"
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    parts = []
+    for chunk in resp.iter_content(chunk_size=chunk_size):
+        text = decoder.decode(chunk)
+        parts.append(text)
+        parser.feed(text)
+        if parser.complete:
+            break
+    else:
+        parts.append(decoder.decode(b"", final=True))
+    return "".join(parts)
+
+
+def fetch_article(url: str, channel: str, scheduler, timeout: float = 15) -> str:
+    """Stream `url` through `scheduler`, stopping early, and extract its text."""
+    html = scheduler.fetch(url, timeout=timeout,
+                           reader=lambda resp: read_article_html(resp, channel))
+    return parse_article(channel, html)
@@ -0,0 +1,151 @@
+# topic_cache.py
+"""
+Cache-first topic queries.
+
+Before scraping a topic on a channel, the app asks the article store for
+analyzed articles that a search for the same topic returned within a
+freshness window (TTL). If the topic was searched within the TTL, the
+results are served straight from the store without launching a browser,
+even when the search found fewer than were asked for. Stale channels are
+refreshed on a background thread pool while the older stored results are
+shown, with their age, in the meantime.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import REFRESH_JOBS, REFRESH_QUEUE
+from neardup import AnalysisCache, minhash
+from politeness import FetchError
+from scrapers import scrape_article, scrape_links
+from store import age_seconds
+
+DEFAULT_TTL = 60 * 60
+
+
+def stored_results(cache: AnalysisCache, channel: str, topic: str, limit: int,
+                   ttl: float = None) -> list[dict]:
+    """
+    Analyzed articles (made with the cache's models) from `topic` searches
+    on `channel`, newest first; with `ttl`, only searches within that many
+    seconds.
+    """
+    rows = cache.store.topic_articles(channel, topic, max_age=ttl, analyzed_only=True)
+    if cache.models is not None:
+        rows = [r for r in rows if r["models"] == cache.models]
+    return rows[:limit]
+
+
+def data_age(rows: list[dict]) -> float:
+    """Seconds since the oldest search that returned one of `rows`."""
+    if not rows:
+        return None
+    return max(age_seconds(r["seen_at"]) for r in rows)
+
+
+def search_age(rows: list[dict], job: dict = None) -> float:
+    """
+    Seconds since the topic was last searched: the newest search that
+    returned one of `rows`, or the end of a successful refresh `job`
+    (which may have found nothing new), whichever is more recent.
+    """
+    ages = [age_seconds(r["seen_at"]) for r in rows]
+    if job and job["state"] == "done" and job.get("finished"):
+        ages.append(time.time() - job["finished"])
+    return min(ages) if ages else None
+
+
+def format_age(seconds: float) -> str:
+    if seconds is None:
+        return "no data"
+    if seconds < 60:
+        return "just now"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min ago"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)} h ago"
+    return f"{int(seconds // 86400)} days ago"
+
+
+def refresh_topic(cache: AnalysisCache, channel: str, topic: str, max_articles: int = 5,
+                  summarize: bool = True) -> int:
+    """
+    Scrape `topic` on `channel`, then fetch and analyze the results into the
+    store (reusing stored text and analyses where possible). Returns the
+    number of articles that now have an analysis.
+    """
+    # Importing utils pulls in transformers, so only pay for it when needed
+    from utils import analyze_text
+
+    store = cache.store
+    links = scrape_links(channel, topic, max_articles=max_articles, store=store)
+    analyzed = 0
+    for url in links:
+        try:
+            text = scrape_article(url, channel, store=store)
+        except FetchError as e:
+            logging.warning(f"{url}: {e}")
+            continue
+        if not text:
+            continue
+        stored = store.get(url)
+        if stored and stored["analyzed_at"] and stored["models"] == cache.models:
+            analyzed += 1
+            continue
+        signature = minhash(text)
+        match = cache.find_similar(signature)
+        if match:
+            cached, _ = match
+            analysis = {k: cached[k] for k in ("sentiment", "score", "summary", "keywords")}
+        else:
+            analysis = analyze_text(text, summarize=summarize, keywords=summarize)
+        cache.add(url, signature, analysis, channel=channel)
+        analyzed += 1
+    return analyzed
+
+
+class BackgroundRefresher:
+    """Runs `refresh_topic` jobs on a small thread pool, at most one per channel + topic."""
+
+    def __init__(self, cache: AnalysisCache, workers: int = 2):
+        self.cache = cache
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="refresh")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _key(self, channel: str, topic: str):
+        return channel, " ".join(topic.lower().split())
+
+    def submit(self, channel: str, topic: str, max_articles: int = 5,
+               summarize: bool = True) -> bool:
+        """Start a refresh unless one is already running; returns True if started."""
+        key = self._key(channel, topic)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job and job["state"] == "running":
+                return False
+            job = self._jobs[key] = {"state": "running", "started": time.time()}
+            REFRESH_QUEUE.inc()
+
+        def run():
+            try:
+                job["articles"] = refresh_topic(self.cache, channel, topic, max_articles, summarize)
+                job["state"] = "done"
+            except Exception as e:
+                logging.error(f"Background refresh of {channel} / {topic} failed: {e}")
+                job["error"] = str(e)
+                job["state"] = "failed"
+            job["finished"] = time.time()
+            REFRESH_QUEUE.dec()
+            REFRESH_JOBS.inc(state=job["state"])
+
+        self._pool.submit(run)
+        return True
+
+    def status(self, channel: str, topic: str) -> dict:
+        """The last job for this channel + topic: state, started/finished times, articles or error."""
+        with self._lock:
+            job = self._jobs.get(self._key(channel, topic))
+            return dict(job) if job else None
@@ -0,0 +1,158 @@
+# tracing.py
+"""
+Lightweight timing spans for finding where a run spends its time.
+
+`span(name, **attributes)` times a block and nests under the span that is
+current in the same context (thread or task), which contextvars tracks;
+`traced(name)` does the same for a whole function and `annotate(...)` adds
+attributes to the current span. A span without a parent starts a trace,
+and every finished span is appended to that trace's `spans` list, so the
+app can draw a waterfall of one run (`start_trace` / `Span.end` for code
+that cannot wrap the run in a `with` block).
+
+Finished spans are also written to a JSONL trace file (NEWS_TRACE_FILE,
+default traces.jsonl; set it to an empty string to turn the file off), one
+object per span with its trace and parent ids, start time, duration and
+attributes. Other modules can also subscribe to finished spans with
+`add_listener` (metrics.py turns them into latency histograms).
+"""
+
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+TRACE_FILE = os.environ.get("NEWS_TRACE_FILE", "traces.jsonl")
+
+_current = ContextVar("span", default=None)
+_ids = itertools.count(1)
+_file = None
+_file_lock = threading.Lock()
+# Called with every finished span (e.g. metrics.py)
+_listeners = []
+
+
+class Span:
+    def __init__(self, name: str, attributes: dict = None, parent: "Span" = None):
+        self.name = name
+        self.attributes = attributes or {}
+        self.parent = parent
+        self.trace = parent.trace if parent is not None else self
+        self.trace_id = parent.trace_id if parent is not None else uuid.uuid4().hex[:16]
+        self.id = next(_ids)
+        self.depth = parent.depth + 1 if parent is not None else 0
+        self.thread = threading.current_thread().name
+        self.start = time.time()
+        self.duration = None
+        self.error = None
+        # Finished spans of the trace (only kept on its root)
+        self.spans = [] if parent is None else None
+        self._started = time.perf_counter()
+        self._token = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    @property
+    def offset(self) -> float:
+        """Seconds from the start of the trace to the start of this span."""
+        return self.start - self.trace.start
+
+    def end(self):
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self._started
+        if self._token is not None:
+            try:
+                _current.reset(self._token)
+            except ValueError:
+                # Ended from another context; nothing to restore there
+                pass
+        self.trace.spans.append(self)
+        _write(self)
+        for listener in _listeners:
+            listener(self)
+
+    def to_dict(self) -> dict:
+        record = {
+            "trace": self.trace_id,
+            "span": self.id,
+            "parent": self.parent.id if self.parent is not None else None,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "thread": self.thread,
+            "attributes": self.attributes,
+        }
+        if self.error:
+            record["error"] = self.error
+        return record
+
+
+def _write(finished: Span):
+    global _file
+    if not TRACE_FILE:
+        return
+    line = json.dumps(finished.to_dict(), default=str) + "\n"
+    with _file_lock:
+        if _file is None:
+            _file = open(TRACE_FILE, "a", encoding="utf-8")
+        _file.write(line)
+        if finished.trace is finished:
+            _file.flush()
+
+
+def add_listener(listener):
+    """Call `listener(span)` whenever a span finishes."""
+    _listeners.append(listener)
+
+
+def current_span() -> Span:
+    return _current.get()
+
+
+def annotate(**attributes):
+    """Add attributes to the current span, if there is one."""
+    current = _current.get()
+    if current is not None:
+        current.attributes.update(attributes)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    current = Span(name, attributes, _current.get())
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        current.end()
+
+
+def traced(name: str):
+    """Decorator: run the function inside `span(name)`."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def start_trace(name: str, **attributes) -> Span:
+    """
+    Start a new trace and make its root span current until `end()` is
+    called on it. The root's `spans` lists every finished span of the trace.
+    """
+    root = Span(name, attributes)
+    root._token = _current.set(root)
+    return root
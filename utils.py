@@ -1,12 +1,22 @@
 # utils.py
+import os
 import re
 import string
+import threading
+
+from model_snapshot import activate as use_model_snapshot, snapshot_path
+# Before transformers is imported, which reads the offline switch once
+use_model_snapshot()
 from transformers import pipeline
 from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 from wordcloud import WordCloud
 import matplotlib.pyplot as plt
-from transformers import AutoTokenizer
+from transformers import AutoTokenizer, TextIteratorStreamer
+
+from model_manager import ModelManager
+from models import MODEL_REPOS
+from tracing import annotate, span, traced
 
 
 def preprocess_text(text: str) -> str:
@@ -18,17 +28,30 @@ def preprocess_text(text: str) -> str:
     text = re.sub(r"\s+", " ", text).strip()
     return text
 
-# Load pipelines/models once
-sentiment_pipeline = pipeline(
-    "sentiment-analysis",
-    model="cardiffnlp/twitter-roberta-base-sentiment"
-)
-summarizer = pipeline(
-    "summarization",
-    model="facebook/bart-large-cnn"
-)
-keyword_model = SentenceTransformer('distilbert-base-nli-mean-tokens')
+def model_source(key: str) -> str:
+    """The verified snapshot directory of a model (see model_snapshot.py), else its Hub id."""
+    return snapshot_path(key) or MODEL_REPOS[key]
+
+# Local models, or the shared model server (model_server.py) when
+# NEWS_MODEL_SERVER names its socket
+MODEL_SERVER = os.environ.get("NEWS_MODEL_SERVER", "")
+MODELS = ModelManager()
+if MODEL_SERVER:
+    from model_server import ModelClient, RemoteEncoder, RemotePipeline
+    model_client = ModelClient(MODEL_SERVER)
+    sentiment_pipeline = RemotePipeline(model_client, "sentiment")
+    summarizer = RemotePipeline(model_client, "summarize")
+    keyword_model = RemoteEncoder(model_client)
+else:
+    # Loaded on first use and unloaded when idle or over budget (model_manager.py)
+    MODELS.register("sentiment", lambda: pipeline("sentiment-analysis", model=model_source("sentiment")))
+    MODELS.register("summary", lambda: pipeline("summarization", model=model_source("summary")))
+    MODELS.register("keywords", lambda: SentenceTransformer(model_source("keywords")))
+    sentiment_pipeline = MODELS.proxy("sentiment")
+    summarizer = MODELS.proxy("summary")
+    keyword_model = MODELS.proxy("keywords")
 
+@traced("nlp.sentiment")
 def classify_sentiment(text: str):
     text = preprocess_text(text)
     if not text:
@@ -52,60 +75,151 @@ def classify_sentiment(text: str):
     #     return summ['summary_text']
     # except Exception:
     #     return "Failed to generate summary."
-tokenizer = AutoTokenizer.from_pretrained("facebook/bart-large-cnn")
-def get_summary(text: str, max_chunk_tokens: int = 900):
+MODELS.register("summary_tokenizer", lambda: AutoTokenizer.from_pretrained(model_source("summary")))
+tokenizer = MODELS.proxy("summary_tokenizer")
+def _stream_chunk(chunk: str, prefix: str):
     """
-    If `text` token-length > model max (1024), split into chunks of
-    roughly `max_chunk_tokens` tokens, summarize each, and concat results.
+    Summarize `chunk`, yielding `prefix` plus the text generated so far, and
+    return the pipeline's summary (which the streamed text only approximates).
     """
+    streamer = TextIteratorStreamer(MODELS.get("summary_tokenizer"), skip_prompt=True,
+                                    skip_special_tokens=True)
+    result = {}
+
+    def generate():
+        try:
+            result["out"] = summarizer(chunk, max_length=130, min_length=30, do_sample=False,
+                                       streamer=streamer)
+        except Exception as e:
+            result["error"] = e
+            # Unblock the loop below if generation never finished
+            streamer.end()
+
+    thread = threading.Thread(target=generate, daemon=True, name="summary-stream")
+    thread.start()
+    partial = ""
+    for piece in streamer:
+        partial += piece
+        yield f"{prefix} {partial.strip()}" if prefix else partial.strip()
+    thread.join()
+    if "error" in result:
+        raise result["error"]
+    return result["out"][0]["summary_text"]
+
+def _summary_steps(text: str, max_chunk_tokens: int, stream_tokens: bool):
+    """The summary so far after each chunk (or generated token); the last one is the result."""
     text = preprocess_text(text)
     if not text:
-        return "No summary available."
+        yield "No summary available."
+        return
 
     # Tokenize once to get total length
     tokens = tokenizer.encode(text, return_tensors="pt")[0]
     total_len = tokens.size(0)
+    annotate(tokens=int(total_len))
 
     # If within limit, summarize in one go
     if total_len <= max_chunk_tokens:
-        try:
-            out = summarizer(text, max_length=130, min_length=30, do_sample=False)
-            return out[0]["summary_text"]
-        except Exception:
-            return "Failed to generate summary."
+        chunks = [text]
+    else:
+        # Otherwise, split the text into overlapping chunks of words
+        words = text.split()
+        # estimate words per chunk: assume avg 1.3 tokens per word
+        words_per_chunk = int(max_chunk_tokens / 1.3)
+        annotate(chunks=-(-len(words) // words_per_chunk))
+        chunks = [" ".join(words[i : i + words_per_chunk]) for i in range(0, len(words), words_per_chunk)]
 
-    # Otherwise, split the text into overlapping chunks of words
-    words = text.split()
-    # estimate words per chunk: assume avg 1.3 tokens per word
-    words_per_chunk = int(max_chunk_tokens / 1.3)
     summaries = []
-    for i in range(0, len(words), words_per_chunk):
-        chunk = " ".join(words[i : i + words_per_chunk])
+    for chunk in chunks:
         try:
-            out = summarizer(chunk, max_length=130, min_length=30, do_sample=False)
-            summaries.append(out[0]["summary_text"])
+            if stream_tokens:
+                summary = yield from _stream_chunk(chunk, " ".join(summaries))
+            else:
+                summary = summarizer(chunk, max_length=130, min_length=30, do_sample=False)[0]["summary_text"]
+            summaries.append(summary)
         except Exception:
-            continue
+            pass
+        # Also replaces the partial text of a chunk that failed
+        yield " ".join(summaries)
 
-    if summaries:
-        return " ".join(summaries)
-    else:
-        return "Failed to generate summary."
+    if not summaries:
+        yield "Failed to generate summary."
 
-def get_keywords(text: str, top_n: int = 50):
+@traced("nlp.summary")
+def get_summary(text: str, max_chunk_tokens: int = 900):
+    """
+    If `text` token-length > model max (1024), split into chunks of
+    roughly `max_chunk_tokens` tokens, summarize each, and concat results.
+    """
+    summary = None
+    for summary in _summary_steps(text, max_chunk_tokens, stream_tokens=False):
+        pass
+    return summary
+
+def stream_summary(text: str, max_chunk_tokens: int = 900):
+    """
+    get_summary as a generator of the summary so far, for showing it while
+    it is generated: it grows token by token (chunk by chunk through the
+    model server) and settles on each finished chunk's summary. The last
+    value is exactly what get_summary returns.
+    """
+    with span("nlp.summary", streamed=True):
+        yield from _summary_steps(text, max_chunk_tokens, stream_tokens=not MODEL_SERVER)
+
+@traced("nlp.keywords")
+def get_keywords_with_embedding(text: str, top_n: int = 50):
+    """
+    Keywords ranked by similarity to the whole text, plus the whole-text
+    embedding itself (for the semantic index), or ([], None).
+    """
     text = preprocess_text(text)
     words = list({w for w in text.split() if w.isalpha() and len(w) > 2})
     if not words:
-        return []
+        return [], None
     try:
         embeddings = keyword_model.encode(words)
         text_emb = keyword_model.encode([text])[0]
         sims = cosine_similarity([text_emb], embeddings)[0]
         top_idxs = sims.argsort()[-top_n:][::-1]
-        return [words[i] for i in top_idxs]
+        return [words[i] for i in top_idxs], text_emb
     except Exception:
+        return [], None
+
+def get_keywords(text: str, top_n: int = 50):
+    return get_keywords_with_embedding(text, top_n)[0]
+
+@traced("nlp.embed")
+def embed_texts(texts: list[str]):
+    """Whole-text embeddings (as in get_keywords) for a batch of texts or queries."""
+    annotate(texts=len(texts))
+    return keyword_model.encode([preprocess_text(t) for t in texts])
+
+def _card_text(card: dict) -> str:
+    """Headline and description of a search result, or the words of its URL slug."""
+    text = " ".join(t for t in (card.get("headline"), card.get("description")) if t)
+    if text:
+        return text
+    slug = card["url"].rstrip("/").rsplit("/", 1)[-1]
+    return re.sub(r"[-_]+|\.html?$|\d{6,}", " ", slug)
+
+@traced("nlp.rank")
+def rank_by_relevance(topic: str, cards: list[dict], top_n: int = None) -> list[dict]:
+    """
+    Order search-result cards (see scrapers.scrape_links(details=True)) by
+    the cosine similarity of their headline and description to the topic,
+    embedding the topic and every card in one batch. Each returned card gets
+    a `relevance` score; `top_n` keeps only the best ones.
+    """
+    if not cards:
         return []
+    embeddings = keyword_model.encode([topic] + [_card_text(c) for c in cards])
+    sims = cosine_similarity(embeddings[:1], embeddings[1:])[0]
+    ranked = [{**card, "relevance": float(sim)} for card, sim in zip(cards, sims)]
+    # Stable sort: equally relevant cards keep the site's order
+    ranked.sort(key=lambda card: -card["relevance"])
+    return ranked[:top_n] if top_n else ranked
 
+@traced("nlp.wordcloud")
 def generate_wordcloud(keywords):
     if not keywords:
         return None
@@ -115,3 +229,26 @@ def generate_wordcloud(keywords):
     ax.imshow(wc, interpolation="bilinear")
     ax.axis("off")
     return fig
+
+@traced("nlp.analyze")
+def analyze_text(text: str, summarize: bool = True, keywords: bool = False,
+                 max_words: int = 900) -> dict:
+    """
+    Run the models over an article's text (truncated to `max_words`) and
+    return the outputs in the article store's layout, ready for
+    `AnalysisCache.add(url, signature, analysis)`. `embedding` is the
+    whole-text embedding, a by-product of the keywords.
+    """
+    truncated = " ".join(text.split()[:max_words])
+    sentiment, score = classify_sentiment(truncated)
+    if keywords:
+        keyword_list, embedding = get_keywords_with_embedding(truncated)
+    else:
+        keyword_list, embedding = None, embed_texts([truncated])[0]
+    return {
+        "sentiment": sentiment,
+        "score": score,
+        "summary": get_summary(truncated) if summarize else None,
+        "keywords": keyword_list,
+        "embedding": embedding,
+    }